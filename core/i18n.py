@@ -197,6 +197,8 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
     "insert.btn.reorder": {LANG_VI: "Thay đổi vị trí cột", LANG_JP: "列順序変更"},
     "insert.btn.execute": {LANG_VI: "Thực thi", LANG_JP: "実行"},
     "insert.btn.clear": {LANG_VI: "Xóa dữ liệu", LANG_JP: "クリア"},
+    "insert.chk.upsert": {LANG_VI: "Upsert (MERGE theo khóa chính)", LANG_JP: "Upsert（主キーでMERGE）"},
+    "insert.chk.upsert_preview": {LANG_VI: "Xem trước dòng đã tồn tại", LANG_JP: "既存行をプレビュー"},
     "insert.msg.no_data_generate": {
         LANG_VI: "Không có dữ liệu để tạo câu insert.",
         LANG_JP: "Insert文を生成するデータがありません。",
@@ -249,6 +251,47 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         LANG_VI: "Insert thành công.",
         LANG_JP: "Insertに成功しました。",
     },
+    "insert.msg.delete_summary": {
+        LANG_VI: "Đã xóa {deleted} dòng cũ, {missing} khóa không còn tồn tại trong DB.",
+        LANG_JP: "既存データを{deleted}行削除しました（{missing}件のキーは既に存在しません）。",
+    },
+    "insert.msg.row_errors_rollback": {
+        LANG_VI: "{count} dòng insert lỗi (tô đỏ). Đã rollback cả phần xóa dữ liệu cũ, DB không thay đổi:\n{details}",
+        LANG_JP: "{count}行のInsertでエラーが発生しました（赤色表示）。既存データの削除も含めてロールバックしました:\n{details}",
+    },
+    "insert.msg.row_errors_partial": {
+        LANG_VI: "Đã insert {inserted}/{total} dòng. {count} dòng lỗi bị bỏ qua (tô đỏ):\n{details}",
+        LANG_JP: "{total}行中{inserted}行をInsertしました。エラーの{count}行はスキップしました（赤色表示）:\n{details}",
+    },
+    "insert.msg.partial_committed": {
+        LANG_VI: "{committed} dòng thuộc {upto}/{total} dòng đầu đã được commit trước khi lỗi, phần còn lại đã rollback.",
+        LANG_JP: "エラー前に先頭{upto}/{total}行のうち{committed}行がコミット済みです。残りはロールバックされました。",
+    },
+    "insert.msg.keep_uncommitted_rows": {
+        LANG_VI: "Xóa các dòng đã commit khỏi lưới, chỉ giữ lại dòng lỗi và dòng chưa ghi để gửi lại?",
+        LANG_JP: "コミット済みの行をグリッドから削除し、エラー行と未反映の行だけを残しますか？",
+    },
+    "insert.msg.keep_failed_rows": {
+        LANG_VI: "Xóa các dòng đã insert khỏi lưới, chỉ giữ lại dòng lỗi để sửa và gửi lại?",
+        LANG_JP: "Insert済みの行をグリッドから削除し、エラー行だけを残して再実行しますか？",
+    },
+    "insert.progress.title": {LANG_VI: "Đang ghi dữ liệu vào {table}...", LANG_JP: "{table} へ書き込み中..."},
+    "insert.progress.check_duplicates": {LANG_VI: "Đang kiểm tra dòng trùng khóa...", LANG_JP: "重複キーを確認中..."},
+    "insert.progress.deleting": {LANG_VI: "Xóa dữ liệu cũ", LANG_JP: "既存データ削除"},
+    "insert.progress.inserting": {LANG_VI: "Insert", LANG_JP: "Insert"},
+    "insert.progress.merging": {LANG_VI: "Upsert", LANG_JP: "Upsert"},
+    "insert.msg.upsert_no_pk": {
+        LANG_VI: "Bảng không có khóa chính, không thể upsert.",
+        LANG_JP: "主キーがないテーブルはUpsertできません。",
+    },
+    "insert.msg.upsert_success": {
+        LANG_VI: "Upsert thành công {merged}/{total} dòng.",
+        LANG_JP: "{total}行中{merged}行をUpsertしました。",
+    },
+    "insert.msg.upsert_summary": {
+        LANG_VI: "Cập nhật {updated} dòng đã tồn tại, thêm mới {inserted} dòng.",
+        LANG_JP: "既存{updated}行を更新、{inserted}行を新規追加しました。",
+    },
     "insert.msg.metadata_error": {
         LANG_VI: "Lỗi đọc metadata: {error}",
         LANG_JP: "メタデータ取得エラー: {error}",
@@ -271,6 +314,7 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
     "update.btn.reorder": {LANG_VI: "Thay đổi vị trí cột", LANG_JP: "列順序変更"},
     "update.btn.execute": {LANG_VI: "Thực thi", LANG_JP: "実行"},
     "update.btn.clear": {LANG_VI: "Xóa dữ liệu", LANG_JP: "クリア"},
+    "update.chk.diff_only": {LANG_VI: "Chỉ update cột thay đổi", LANG_JP: "変更された列のみ更新"},
     "update.section.sql": {LANG_VI: "Update {table}", LANG_JP: "Update {table}"},
     "update.section.condition": {
         LANG_VI: "Điều kiện UPDATE bổ sung (dạng {{COLUMN}} để lấy giá trị dòng)",
@@ -324,6 +368,9 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         LANG_VI: "Lỗi cursor: {error}",
         LANG_JP: "カーソルエラー: {error}",
     },
+    "update.progress.title": {LANG_VI: "Đang update {table}...", LANG_JP: "{table} を更新中..."},
+    "update.progress.updating": {LANG_VI: "Update", LANG_JP: "Update"},
+    "update.progress.comparing": {LANG_VI: "So sánh với dữ liệu hiện tại", LANG_JP: "現在のデータと比較中"},
     "update.msg.update_error": {
         LANG_VI: "Lỗi update: {error}",
         LANG_JP: "Updateエラー: {error}",
@@ -332,6 +379,26 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         LANG_VI: "Update thành công.",
         LANG_JP: "Updateに成功しました。",
     },
+    "update.msg.update_summary": {
+        LANG_VI: "Đã cập nhật {updated} dòng trong DB từ {rows} dòng dữ liệu.",
+        LANG_JP: "{rows}行のデータでDBの{updated}行を更新しました。",
+    },
+    "update.msg.skipped_rows": {
+        LANG_VI: "{count} dòng không có thay đổi so với DB, đã bỏ qua.",
+        LANG_JP: "DBと差分のない{count}行はスキップしました。",
+    },
+    "update.msg.zero_rows": {
+        LANG_VI: "{count} dòng không cập nhật được dòng nào (sai khóa?), đã tô vàng: {rows}",
+        LANG_JP: "{count}行は更新件数0件でした（キー誤り？）。黄色で表示: {rows}",
+    },
+    "update.msg.multi_rows": {
+        LANG_VI: "{count} dòng cập nhật nhiều hơn 1 dòng DB: {rows}",
+        LANG_JP: "{count}行で複数のDB行が更新されました: {rows}",
+    },
+    "update.msg.row_errors": {
+        LANG_VI: "{count} dòng bị lỗi (tô đỏ), toàn bộ thay đổi đã được rollback:\n{details}",
+        LANG_JP: "{count}行でエラーが発生しました（赤色表示）。全ての変更をロールバックしました:\n{details}",
+    },
     "update.msg.metadata_error": {
         LANG_VI: "Lỗi đọc metadata: {error}",
         LANG_JP: "メタデータ取得エラー: {error}",
@@ -370,6 +437,8 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         LANG_VI: "Bảng backup nguồn",
         LANG_JP: "バックアップ元テーブル",
     },
+    "backup.label.commit_interval": {LANG_VI: "Commit mỗi (dòng)", LANG_JP: "コミット間隔（行）"},
+    "backup.label.csv_file": {LANG_VI: "{path} ({count} dòng)", LANG_JP: "{path}（{count}行）"},
     "backup.label.no_file": {LANG_VI: "Chưa chọn file", LANG_JP: "ファイル未選択"},
     "backup.btn.refresh_sql": {LANG_VI: "Cập nhật SQL", LANG_JP: "SQL更新"},
     "backup.btn.execute": {LANG_VI: "Thực thi", LANG_JP: "実行"},
@@ -439,6 +508,18 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         LANG_VI: "Lỗi restore: {error}",
         LANG_JP: "復元エラー: {error}",
     },
+    "backup.msg.invalid_commit_interval": {
+        LANG_VI: "Số dòng commit phải là số nguyên >= 0.",
+        LANG_JP: "コミット間隔は0以上の整数で入力してください。",
+    },
+    "backup.msg.restore_partial": {
+        LANG_VI: "Đã restore {inserted}/{total} dòng, {failed} dòng lỗi (tô đỏ, chi tiết trong log).",
+        LANG_JP: "{total}行中{inserted}行を復元しました。エラー{failed}行（赤色表示、詳細はログ参照）。",
+    },
+    "backup.msg.scan_pending": {
+        LANG_VI: "Đang quét tệp CSV, vui lòng đợi quét xong rồi restore.",
+        LANG_JP: "CSVファイルを確認中です。完了後に復元してください。",
+    },
     "backup.msg.restore_success": {
         LANG_VI: "Restore CSV thành công.",
         LANG_JP: "CSV復元に成功しました。",
@@ -448,10 +529,30 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         LANG_VI: "(Bảng không tồn tại, bỏ qua DROP)",
         LANG_JP: "（テーブルが存在しないため DROP をスキップ）",
     },
+    "backup.log.preview_summary": {
+        LANG_VI: "Xem trước {count} dòng đầu của {path}; đang quét phần còn lại...",
+        LANG_JP: "{path} の先頭{count}行をプレビュー表示中。残りを確認しています...",
+    },
+    "backup.log.scan_issues": {
+        LANG_VI: "Có {count} dòng nghi lỗi (lệch số cột hoặc sai kiểu dữ liệu):",
+        LANG_JP: "列数または型が不正な可能性のある行: {count}行",
+    },
     "backup.log.import_summary": {
         LANG_VI: "Đã import {count} dòng từ {path}",
         LANG_JP: "CSV {path} から {count} 行を取り込みました。",
     },
+    "backup.progress.statements": {LANG_VI: "Đang thực thi {count} câu lệnh...", LANG_JP: "{count}件のSQLを実行中..."},
+    "backup.progress.restore": {LANG_VI: "Đang restore vào {table}...", LANG_JP: "{table} へ復元中..."},
+    "backup.progress.scan_csv": {LANG_VI: "Đang quét tệp CSV", LANG_JP: "CSVファイルを確認中"},
+    "backup.progress.rows": {LANG_VI: "Restore", LANG_JP: "復元"},
+    "backup.log.restore_progress": {
+        LANG_VI: "Đã ghi {done}/{total} dòng ({rate} dòng/giây)",
+        LANG_JP: "{total}行中{done}行を書き込み（{rate}行/秒）",
+    },
+    "backup.log.restore_row_error": {
+        LANG_VI: "  Dòng CSV {line}: {error}",
+        LANG_JP: "  CSV {line}行目: {error}",
+    },
     "backup.log.restore_done": {
         LANG_VI: "Restore CSV hoàn thành.",
         LANG_JP: "CSV復元が完了しました。",
@@ -460,8 +561,44 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
     # --- Widgets & DataGrid ---
     "widget.loading.title": {LANG_VI: "Đang xử lý", LANG_JP: "処理中"},
     "widget.loading.message": {LANG_VI: "Vui lòng chờ trong giây lát...", LANG_JP: "しばらくお待ちください…"},
+    "plan.summary": {
+        LANG_VI: "Đã phân tích {shapes} dạng câu lệnh, {warnings} cảnh báo.",
+        LANG_JP: "{shapes}種類のSQLを解析しました。警告{warnings}件。",
+    },
+    "plan.full_scan": {
+        LANG_VI: "FULL SCAN {table} (~{rows} dòng, cost {cost}) x {executions} lần thực thi:",
+        LANG_JP: "FULL SCAN {table}（約{rows}行、コスト{cost}）× 実行{executions}回:",
+    },
+    "plan.error": {LANG_VI: "Không EXPLAIN được: {error}", LANG_JP: "EXPLAINできません: {error}"},
+    "plan.ok": {
+        LANG_VI: "Không phát hiện full scan trên bảng lớn.",
+        LANG_JP: "大きなテーブルのフルスキャンは見つかりませんでした。",
+    },
+    "plan.progress": {LANG_VI: "Đang phân tích execution plan...", LANG_JP: "実行計画を解析中..."},
+    "plan.btn.analyze": {LANG_VI: "Phân tích", LANG_JP: "解析"},
+    "widget.progress.rows": {LANG_VI: "Đã xử lý {done} dòng", LANG_JP: "{done}行処理済み"},
+    "widget.progress.rows_total": {LANG_VI: "Đã xử lý {done}/{total} dòng", LANG_JP: "{total}行中{done}行処理済み"},
+    "widget.progress.cancelling": {
+        LANG_VI: "Đang hủy và rollback...",
+        LANG_JP: "キャンセルしてロールバックしています...",
+    },
+    "widget.progress.cancelled": {
+        LANG_VI: "Đã hủy, các thay đổi chưa commit đã được rollback.",
+        LANG_JP: "キャンセルしました。未コミットの変更はロールバックされました。",
+    },
+    "widget.progress.cancelled_partial": {
+        LANG_VI: "Đã hủy. {committed} dòng đã commit trước đó được giữ lại, phần còn lại đã rollback.",
+        LANG_JP: "キャンセルしました。コミット済みの{committed}行は保持され、残りはロールバックされました。",
+    },
     "grid.dialog.open_csv": {LANG_VI: "Chọn tệp CSV", LANG_JP: "CSVファイルを選択"},
     "grid.dialog.save_csv": {LANG_VI: "Lưu tệp CSV", LANG_JP: "CSVファイルを保存"},
+    "grid.msg.csv_truncated": {
+        LANG_VI: "Tệp CSV có {total} dòng, chỉ nạp {count} dòng đầu vào lưới; {dropped} dòng còn lại không được nạp.",
+        LANG_JP: "CSVファイルは{total}行ありますが、先頭{count}行のみ読み込みました。残りの{dropped}行は読み込まれていません。",
+    },
+    "grid.progress.import_csv": {LANG_VI: "Đang nạp CSV vào lưới...", LANG_JP: "CSVをグリッドに読み込んでいます..."},
+    "grid.progress.reading_csv": {LANG_VI: "Đọc tệp", LANG_JP: "ファイル読み込み"},
+    "grid.progress.filling": {LANG_VI: "Nạp vào lưới", LANG_JP: "グリッドへ反映"},
     "grid.msg.read_csv_error": {
         LANG_VI: "Không đọc được CSV: {error}",
         LANG_JP: "CSVを読み込めません: {error}",
@@ -697,13 +834,90 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
     "clone.btn.check_connection": {LANG_VI: "Kiểm tra kết nối", LANG_JP: "接続テスト"},
     "clone.btn.add": {LANG_VI: "Thêm", LANG_JP: "追加"},
     "clone.btn.edit_target": {LANG_VI: "Sửa bảng đích", LANG_JP: "コピー先を編集"},
+    "clone.btn.filter": {LANG_VI: "Lọc / lấy mẫu...", LANG_JP: "抽出条件..."},
+    "clone.option.fk_closure": {
+        LANG_VI: "Bảng có lọc: kèm dòng liên quan theo khóa ngoại (FK)",
+        LANG_JP: "抽出時: 外部キーで関連する行も含める",
+    },
+    "clone.column.filter": {LANG_VI: "Điều kiện", LANG_JP: "抽出条件"},
+    "clone.dialog.filter_title": {LANG_VI: "Điều kiện copy - {table}", LANG_JP: "抽出条件 - {table}"},
+    "clone.dialog.filter_where": {LANG_VI: "WHERE", LANG_JP: "WHERE"},
+    "clone.dialog.filter_sample": {LANG_VI: "SAMPLE (%)", LANG_JP: "SAMPLE (%)"},
+    "clone.dialog.filter_hint": {
+        LANG_VI: "Để trống cả hai để copy toàn bộ bảng. Ví dụ: CREATED_AT > SYSDATE - 30",
+        LANG_JP: "両方空欄でテーブル全体をコピー。例: CREATED_AT > SYSDATE - 30",
+    },
+    "clone.msg.invalid_filter": {
+        LANG_VI: "Điều kiện WHERE không được chứa dấu ';'.",
+        LANG_JP: "WHERE条件に';'は使用できません。",
+    },
+    "clone.msg.invalid_sample": {
+        LANG_VI: "SAMPLE phải là số lớn hơn 0 và nhỏ hơn 100.",
+        LANG_JP: "SAMPLEは0より大きく100未満の数値を指定してください。",
+    },
+    "clone.log.fk_closure": {LANG_VI: "FK: {note}", LANG_JP: "FK: {note}"},
+    "clone.log.fk_closure_failed": {
+        LANG_VI: "Không đi theo FK được, copy theo điều kiện đã nhập: {error}",
+        LANG_JP: "外部キーを辿れません。入力した条件のみでコピーします: {error}",
+    },
     "clone.btn.remove": {LANG_VI: "Xóa", LANG_JP: "削除"},
     "clone.btn.clear": {LANG_VI: "Xóa hết", LANG_JP: "全削除"},
+    "clone.btn.cancel": {LANG_VI: "Dừng", LANG_JP: "中止"},
     "clone.btn.export": {LANG_VI: "Export", LANG_JP: "エクスポート"},
+    "clone.btn.dump_export": {LANG_VI: "Export dump", LANG_JP: "ダンプ出力"},
+    "clone.btn.dump_import": {LANG_VI: "Import dump", LANG_JP: "ダンプ取込"},
+    "clone.dialog.dump_files": {LANG_VI: "Tệp dump clone", LANG_JP: "クローンダンプ"},
+    "clone.msg.dump_invalid": {
+        LANG_VI: "Không đọc được tệp dump: {error}",
+        LANG_JP: "ダンプファイルを読み込めません: {error}",
+    },
+    "clone.msg.dump_import_confirm": {
+        LANG_VI: "Dump tạo lúc {created} từ {source} ({count} bảng).\nImport vào schema {owner}?",
+        LANG_JP: "{created}に{source}から作成されたダンプ（{count}件）。\nスキーマ{owner}に取り込みますか？",
+    },
+    "clone.log.dump_export_start": {
+        LANG_VI: "Export {count} bảng ra {path}.",
+        LANG_JP: "{count}件のテーブルを{path}に出力します。",
+    },
+    "clone.log.dump_import_start": {
+        LANG_VI: "Import {count} bảng từ {path}.",
+        LANG_JP: "{path}から{count}件のテーブルを取り込みます。",
+    },
+    "clone.log.dump_table": {
+        LANG_VI: "{source}: {rows} dòng trong {seconds:.1f}s ({rate:.0f} dòng/s, {mb_rate:.2f} MB/s).",
+        LANG_JP: "{source}: {rows}行 / {seconds:.1f}秒（{rate:.0f}行/秒, {mb_rate:.2f} MB/秒）。",
+    },
+    "clone.log.dump_export_done": {
+        LANG_VI: "Export dump xong: {tables} bảng (lỗi {failed}), {rows} dòng, {seconds:.1f}s, "
+        "{rate:.0f} dòng/s, {mb_rate:.2f} MB/s.",
+        LANG_JP: "ダンプ出力完了: {tables}件（失敗{failed}件）, {rows}行, {seconds:.1f}秒, "
+        "{rate:.0f}行/秒, {mb_rate:.2f} MB/秒。",
+    },
+    "clone.log.dump_import_done": {
+        LANG_VI: "Import dump xong: {tables} bảng (lỗi {failed}), {rows} dòng, {seconds:.1f}s, "
+        "{rate:.0f} dòng/s, {mb_rate:.2f} MB/s.",
+        LANG_JP: "ダンプ取込完了: {tables}件（失敗{failed}件）, {rows}行, {seconds:.1f}秒, "
+        "{rate:.0f}行/秒, {mb_rate:.2f} MB/秒。",
+    },
+    "clone.log.dump_file_size": {LANG_VI: "Tệp {path}: {size:.2f} MB.", LANG_JP: "ファイル{path}: {size:.2f} MB。"},
+    "clone.log.dump_error": {LANG_VI: "Lỗi: {error}", LANG_JP: "エラー: {error}"},
     "clone.option.truncate": {
         LANG_VI: "Truncate bảng đích trước khi insert",
         LANG_JP: "コピー先をTRUNCATEしてから挿入",
     },
+    "clone.label.workers": {LANG_VI: "Số luồng", LANG_JP: "並列数"},
+    "clone.option.resumable": {
+        LANG_VI: "Commit định kỳ và lưu checkpoint để chạy tiếp khi lỗi/hủy",
+        LANG_JP: "定期的にコミットしチェックポイントを保存（中断後に再開可能）",
+    },
+    "clone.option.split_large": {
+        LANG_VI: "Chia bảng lớn theo khoảng PK/ROWID để copy song song",
+        LANG_JP: "大きいテーブルをPK/ROWID範囲に分割して並列コピー",
+    },
+    "clone.option.delta": {
+        LANG_VI: "Delta: so sánh hash theo khoảng PK, chỉ copy lại khoảng khác",
+        LANG_JP: "差分: PK範囲ごとにハッシュを比較し、異なる範囲のみ再コピー",
+    },
     "clone.column.source": {LANG_VI: "Bảng nguồn", LANG_JP: "コピー元"},
     "clone.column.target": {LANG_VI: "Bảng đích", LANG_JP: "コピー先"},
     "clone.status.disconnected": {LANG_VI: "Chưa kết nối", LANG_JP: "未接続"},
@@ -739,11 +953,61 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
         LANG_VI: "Đã sao chép {rows} dòng từ {source} sang {target}.",
         LANG_JP: "{source}→{target} に{rows}行コピーしました。",
     },
+    "clone.log.schedule": {
+        LANG_VI: "Xếp {count} bảng theo dung lượng (lớn trước), chạy {workers} luồng.",
+        LANG_JP: "{count}件のテーブルをサイズ順（大きい順）に{workers}並列で実行します。",
+    },
+    "clone.log.table_start": {LANG_VI: "Bắt đầu {source} -> {target}", LANG_JP: "{source} → {target} 開始"},
+    "clone.log.cancelled": {LANG_VI: "Đã hủy {source} (rollback).", LANG_JP: "{source}を中止しました（ロールバック）。"},
+    "clone.log.cancelling": {
+        LANG_VI: "Đang dừng, chờ các batch đang chạy rollback...",
+        LANG_JP: "中止しています。実行中のバッチのロールバックを待っています...",
+    },
+    "clone.log.checkpoint_saved": {
+        LANG_VI: "Đã lưu checkpoint tại {path}; lần Export sau có thể chạy tiếp.",
+        LANG_JP: "チェックポイントを{path}に保存しました。次回のエクスポートで再開できます。",
+    },
+    "clone.log.skipped_done": {
+        LANG_VI: "Bỏ qua {source}: đã xong ở lần trước ({rows} dòng).",
+        LANG_JP: "{source}はスキップ: 前回完了済み（{rows}行）。",
+    },
+    "clone.log.table_stats": {
+        LANG_VI: "  {source}: {seconds:.1f}s, {rate:.0f} dòng/s, {mb_rate:.2f} MB/s; fetch {fetch:.1f}s, "
+        "insert {insert:.1f}s, chờ nguồn {wait:.1f}s; {batches} batch (tối đa {batch_size} dòng).",
+        LANG_JP: "  {source}: {seconds:.1f}秒, {rate:.0f}行/秒, {mb_rate:.2f} MB/秒; フェッチ{fetch:.1f}秒, "
+        "挿入{insert:.1f}秒, 取得待ち{wait:.1f}秒; {batches}バッチ（最大{batch_size}行）。",
+    },
+    "clone.log.run_rate": {
+        LANG_VI: "{rows} dòng trong {seconds:.1f}s ({rate:.0f} dòng/s).",
+        LANG_JP: "{rows}行 / {seconds:.1f}秒（{rate:.0f}行/秒）。",
+    },
+    "clone.progress.table_rate": {
+        LANG_VI: "{source}: {rows} dòng ({rate:.0f} dòng/s)",
+        LANG_JP: "{source}: {rows}行（{rate:.0f}行/秒）",
+    },
+    "clone.log.delta_synced": {
+        LANG_VI: "{source}: đồng bộ {changed}/{ranges} khoảng khác nhau ({rows} dòng).",
+        LANG_JP: "{source}: 差分{changed}/{ranges}範囲を同期しました（{rows}行）。",
+    },
+    "clone.log.delta_summary": {
+        LANG_VI: "Delta: đồng bộ {changed}/{ranges} khoảng trên {tables} bảng.",
+        LANG_JP: "差分: {tables}件のテーブルで{changed}/{ranges}範囲を同期。",
+    },
+    "clone.log.fk_violations": {
+        LANG_VI: "{count} khóa ngoại ở đích có dòng không tìm thấy dòng cha (xem log).",
+        LANG_JP: "ターゲットの外部キー{count}件で親行のない行があります（ログ参照）。",
+    },
     "clone.log.error": {LANG_VI: "Lỗi khi xử lý {source}: {error}", LANG_JP: "{source}の処理でエラー: {error}"},
     "clone.log.summary": {
         LANG_VI: "Hoàn tất: tổng {total} bảng, lỗi {failed}.",
         LANG_JP: "完了: 全{total}件 中 {failed}件失敗。",
     },
+    "clone.msg.resume_confirm": {
+        LANG_VI: "Có lần clone dang dở ({created}, xong {done}/{total} bảng).\n"
+        "Yes: chạy tiếp phần còn lại\nNo: bỏ checkpoint và chạy lại từ đầu",
+        LANG_JP: "中断されたクローンがあります（{created}、{total}件中{done}件完了）。\n"
+        "はい: 残りを再開\nいいえ: チェックポイントを破棄して最初から実行",
+    },
     "clone.msg.open_error": {
         LANG_VI: "Không mở được màn hình Clone DB: {error}",
         LANG_JP: "Clone DB画面を開けません: {error}",
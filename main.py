@@ -49,6 +49,7 @@ ICON_PATH = os.path.join(READ_ICONS_DIR, "logo.ico")
 CONFIGS_DIR = os.path.join(PERSIST_DIR, "configs")
 CONFIG_PATH = os.path.join(CONFIGS_DIR, "config.json")
 DB_LIST_PATH = os.path.join(CONFIGS_DIR, "db_list.json")
+METADATA_CACHE_PATH = os.path.join(CONFIGS_DIR, "metadata_cache.json")
 LOG_DIR = os.path.join(PERSIST_DIR, "logs")
 os.makedirs(LOG_DIR, exist_ok=True)
 
@@ -58,6 +59,8 @@ DEFAULT_CONFIG = {
     "last_alias": None,
     "use_host_port": False,
     "ttl_files": [],
+    "session_pool": dict(db_utils.SESSION_POOL_DEFAULTS),
+    "metadata_cache": {"ttl": db_utils.METADATA_CACHE_TTL, "persist": False},
 }
 
 LOGGER = logging.getLogger("ToolVIP")
@@ -212,6 +215,8 @@ class ToolVIP(tk.Tk):
         preferred_lang = self.config.get("lang", i18n.LANG_VI)
         i18n.set_language(preferred_lang)
         self.lang = i18n.get_language()
+        db_utils.configure_session_pool(self.config.get("session_pool"))
+        self._configure_metadata_cache()
         self.current_ora_path = self.config.get("ora_path") or DEFAULT_ORA_PATH
         self._logger = logging.getLogger("ToolVIP")
         self.report_callback_exception = self._handle_callback_exception
@@ -406,9 +411,22 @@ class ToolVIP(tk.Tk):
         self.lang = lang
         self._apply_language()
 
+    def _configure_metadata_cache(self) -> None:
+        """Áp dụng TTL và tùy chọn lưu cache metadata xuống đĩa từ config."""
+        options = self.config.get("metadata_cache") or {}
+        if not isinstance(options, dict):
+            return
+        try:
+            ttl = float(options.get("ttl", db_utils.METADATA_CACHE_TTL))
+        except (TypeError, ValueError):
+            ttl = db_utils.METADATA_CACHE_TTL
+        persist_path = METADATA_CACHE_PATH if options.get("persist") else None
+        db_utils.configure_metadata_cache(ttl=ttl, persist_path=persist_path)
+
     def destroy(self):
         if hasattr(self, "_lang_listener"):
             i18n.remove_listener(self._lang_listener)
+        db_utils.close_session_pools()
         super().destroy()
 
     def _apply_language(self) -> None:
@@ -3,18 +3,19 @@ Màn hình Backup/Restore dùng sao lưu và phục hồi dữ liệu.
 """
 from __future__ import annotations
 
-import csv
+import contextlib
 import datetime as dt
 import logging
 import re
 import threading
+import time
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from tkinter.scrolledtext import ScrolledText
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from screen.DB import db_utils
-from screen.DB.widgets import DataGrid, LoadingPopup
+from screen.DB import csv_stream, db_utils, job_runner
+from screen.DB.widgets import DataGrid, LoadingPopup, format_plan_report
 from core import history, i18n
 
 APP_TITLE_KEY = "common.app_title"
@@ -55,6 +56,7 @@ class BackupRestoreBase(tk.Toplevel):
         self._metadata_cache: Dict[str, Dict[str, Any]] = {}
         self._metadata_token: int = 0
         self._metadata_loading: bool = False
+        self._job: Optional[job_runner.BackgroundJob] = None
 
         self.var_search = tk.StringVar()
         self.var_selected_table = tk.StringVar()
@@ -121,7 +123,7 @@ class BackupRestoreBase(tk.Toplevel):
         """Kết nối cơ sở dữ liệu và lấy danh sách bảng ở luồng nền."""
         def worker():
             try:
-                self.conn = db_utils.connect_oracle(
+                self.conn = db_utils.acquire_connection(
                     self.conn_info.get("user", ""),
                     self.conn_info.get("password", ""),
                     self.conn_info.get("host", ""),
@@ -130,6 +132,8 @@ class BackupRestoreBase(tk.Toplevel):
                     bool(self.conn_info.get("use_host_port")),
                 )
                 tables = db_utils.fetch_accessible_tables(self.conn)
+                db_utils.start_catalog_refresh(self.conn_info)
+                self._catalog_registered = True
             except db_utils.OracleDriverNotAvailable as exc:
                 msg = str(exc)
                 self._log_exception("Oracle driver unavailable for backup window", exc)
@@ -248,7 +252,8 @@ class BackupRestoreBase(tk.Toplevel):
 
         def worker():
             try:
-                columns = db_utils.fetch_table_columns(self.conn, table_key, self.current_owner)
+                with job_runner.connection_lock(self.conn):
+                    columns = db_utils.fetch_table_columns(self.conn, table_key, self.current_owner)
             except Exception as exc:
                 self._log_exception(f"Failed to load column metadata for {table_key}", exc)
                 self.after(0, lambda: self._handle_metadata_error(item, exc, token))
@@ -334,9 +339,17 @@ class BackupRestoreBase(tk.Toplevel):
     def _on_close(self):
         """Đóng cửa sổ và giải phóng kết nối nếu có."""
         self._hide_loading()
+        if getattr(self, "_catalog_registered", False):
+            db_utils.stop_catalog_refresh(self.conn_info)
+            self._catalog_registered = False
+        if self._job is not None and self._job.running:
+            # Job đang chạy giữ kết nối: yêu cầu hủy, trả kết nối khi job đã rollback xong
+            self._job.cancel()
+            job_runner.release_when_idle(self.conn)
+            self.conn = None
         try:
             if self.conn:
-                self.conn.close()
+                db_utils.release_connection(self.conn)
         except Exception as exc:
             self._log_exception("Failed to close backup connection", exc)
         self.destroy()
@@ -355,28 +368,24 @@ class BackupRestoreBase(tk.Toplevel):
         self._loader = None
 
     # ------------------------------------------------------------------
-    def _run_statements(self, sql_text: str) -> bool:
-        """Thuc thi lan luot cac cau SQL da chuan bi va ghi log."""
+    def _run_statements(self, sql_text: str, on_done: Optional[Callable[[str], None]] = None) -> bool:
+        """
+        Chay nen lan luot cac cau SQL da chuan bi va ghi log; tra ve True neu job da bat dau.
+        on_done(status) duoc goi tren luong UI khi job ket thuc (success/failed/cancelled).
+        """
         object_name = self._history_object_name()
         sql_trim = (sql_text or "").strip()
         if not self.conn:
             history.log_action(self._history_action_type, object_name, 0, "failed", message=self._t("backup.msg.not_connected"), sql_text=sql_trim)
             messagebox.showerror(self._t(APP_TITLE_KEY), self._t("backup.msg.not_connected"), parent=self)
             return False
-        statements = [stmt.strip() for stmt in re.split(r";\s*(?:\n|$)", sql_text) if stmt.strip()]
+        if self._job is not None and self._job.running:
+            return False
+        statements = self._split_statements(sql_text)
         if not statements:
             messagebox.showwarning(self._t(APP_TITLE_KEY), self._t("backup.msg.no_statement"), parent=self)
             return False
         row_count = len(statements)
-        try:
-            cur = self.conn.cursor()
-        except Exception as exc:
-            msg = self._t("backup.msg.cursor_error", error=str(exc))
-            self._log_exception("Failed to create cursor for backup execution", exc)
-            history.log_action(self._history_action_type, object_name, row_count, "failed", message=msg, sql_text=sql_trim)
-            messagebox.showerror(self._t(APP_TITLE_KEY), msg, parent=self)
-            return False
-
         action_id = history.log_action(self._history_action_type, object_name, row_count, "pending", message="SQL script", sql_text=sql_trim)
 
         def _finalize(status: str, message: str) -> None:
@@ -388,33 +397,102 @@ class BackupRestoreBase(tk.Toplevel):
             except Exception as exc:
                 self._log_exception("Failed to finalize backup history status", exc)
 
-        try:
-            for stmt in statements:
-                self._append_log(f"> {stmt}")
-                try:
-                    cur.execute(stmt)
-                except Exception as exc:
-                    if self._should_ignore_drop(stmt, exc):
-                        self._append_log("  " + self._t("backup.log.skip_drop"))
-                        continue
-                    self.conn.rollback()
-                    self._append_log(f"  ERROR: {exc}")
-                    msg = self._t("backup.msg.execute_error", error=str(exc))
-                    self._log_exception("Failed executing backup statement", exc)
-                    _finalize("failed", msg)
-                    messagebox.showerror(self._t(APP_TITLE_KEY), msg, parent=self)
-                    return False
-            self.conn.commit()
+        skip_text = "  " + self._t("backup.log.skip_drop")
+        state = {"cursor": False}
+
+        def work(ctx):
+            with contextlib.closing(self.conn.cursor()) as cur:
+                state["cursor"] = True
+                for idx, stmt in enumerate(statements):
+                    ctx.progress(idx, row_count)
+                    ctx.post(self._append_log, f"> {stmt}")
+                    try:
+                        cur.execute(stmt)
+                    except Exception as exc:
+                        if self._should_ignore_drop(stmt, exc):
+                            ctx.post(self._append_log, skip_text)
+                            continue
+                        raise
+                ctx.progress(row_count, row_count)
+                self.conn.commit()
+
+        def _done(status: str) -> None:
+            if on_done is not None:
+                on_done(status)
+
+        def on_success(_result) -> None:
             self._append_log(self._t("backup.log.complete"))
             _finalize("success", self._t("backup.log.complete"))
+            _done("success")
             messagebox.showinfo(self._t(APP_TITLE_KEY), self._t("backup.msg.execute_success"), parent=self)
-            return True
-        finally:
-            try:
-                cur.close()
-            except Exception as exc:
-                self._logger.debug("Backup cursor close failed: %s", exc)
 
+        def on_error(exc: Exception) -> None:
+            if not state["cursor"]:
+                msg = self._t("backup.msg.cursor_error", error=str(exc))
+                self._log_exception("Failed to create cursor for backup execution", exc)
+            else:
+                self._append_log(f"  ERROR: {exc}")
+                msg = self._t("backup.msg.execute_error", error=str(exc))
+                self._log_exception("Failed executing backup statement", exc)
+            _finalize("failed", msg)
+            _done("failed")
+            messagebox.showerror(self._t(APP_TITLE_KEY), msg, parent=self)
+
+        def on_cancel(_partial) -> None:
+            msg = self._t("widget.progress.cancelled")
+            self._append_log(msg)
+            _finalize("cancelled", msg)
+            _done("cancelled")
+            messagebox.showwarning(self._t(APP_TITLE_KEY), msg, parent=self)
+
+        self._job = job_runner.run_job(
+            self,
+            self.conn,
+            work,
+            title=self._t("backup.progress.statements", count=row_count),
+            on_success=on_success,
+            on_error=on_error,
+            on_cancel=on_cancel,
+        )
+        return True
+
+    @staticmethod
+    def _split_statements(sql_text: str) -> List[str]:
+        """Tách script thành từng câu lệnh theo dấu ';' cuối dòng."""
+        return [stmt.strip() for stmt in re.split(r";\s*(?:\n|$)", sql_text or "") if stmt.strip()]
+
+    def _analyze_statements(self, sql_text: str) -> None:
+        """EXPLAIN PLAN các câu DML/CTAS trong script, cảnh báo full scan trên bảng lớn."""
+        if not self.conn:
+            messagebox.showerror(self._t(APP_TITLE_KEY), self._t("backup.msg.not_connected"), parent=self)
+            return
+        if self._job is not None and self._job.running:
+            return
+        statements = self._split_statements(sql_text)
+        if not statements:
+            messagebox.showwarning(self._t(APP_TITLE_KEY), self._t("backup.msg.no_statement"), parent=self)
+            return
+
+        def work(ctx):
+            return db_utils.check_statement_plans(self.conn, statements, progress=lambda done: ctx.progress(done))
+
+        def on_success(payload) -> None:
+            findings, errors, explained = payload
+            report = format_plan_report(findings, errors, explained)
+            self._append_log(report)
+            if findings or errors:
+                messagebox.showwarning(self._t(APP_TITLE_KEY), report, parent=self)
+            else:
+                messagebox.showinfo(self._t(APP_TITLE_KEY), report, parent=self)
+
+        self._job = job_runner.run_job(
+            self,
+            self.conn,
+            work,
+            title=self._t("plan.progress"),
+            on_success=on_success,
+            on_error=lambda exc: messagebox.showerror(self._t(APP_TITLE_KEY), self._t("plan.error", error=str(exc)), parent=self),
+        )
 
     @staticmethod
     def _should_ignore_drop(statement: str, exc: Exception) -> bool:
@@ -493,6 +571,13 @@ class BackupWindow(BackupRestoreBase):
         self.btn_refresh_sql.grid(row=0, column=0, sticky="ew", padx=(0, 4))
         self.btn_execute = ttk.Button(self.frm_buttons, text=self._t("backup.btn.execute"), command=self._execute)
         self.btn_execute.grid(row=0, column=1, sticky="ew")
+        self.frm_buttons.columnconfigure(2, weight=1)
+        self.btn_analyze = ttk.Button(
+            self.frm_buttons,
+            text=self._t("plan.btn.analyze"),
+            command=lambda: self._analyze_statements(self.txt_sql.get("1.0", tk.END)),
+        )
+        self.btn_analyze.grid(row=0, column=2, sticky="ew", padx=(4, 0))
 
         self.frm_log = ttk.LabelFrame(parent, text=self._t("backup.section.log"), padding=6)
         self.frm_log.grid(row=6, column=0, sticky="nsew")
@@ -513,6 +598,7 @@ class BackupWindow(BackupRestoreBase):
             getattr(self, "ent_backup", None),
             getattr(self, "btn_refresh_sql", None),
             getattr(self, "btn_execute", None),
+            getattr(self, "btn_analyze", None),
         ]
         for widget in widgets:
             if widget is None:
@@ -571,6 +657,8 @@ class BackupWindow(BackupRestoreBase):
             self.btn_refresh_sql.configure(text=self._t("backup.btn.refresh_sql"))
         if hasattr(self, "btn_execute"):
             self.btn_execute.configure(text=self._t("backup.btn.execute"))
+        if hasattr(self, "btn_analyze"):
+            self.btn_analyze.configure(text=self._t("plan.btn.analyze"))
 
 
 class RestoreFromBackupWindow(BackupRestoreBase):
@@ -612,6 +700,13 @@ class RestoreFromBackupWindow(BackupRestoreBase):
         self.btn_refresh_sql.grid(row=0, column=0, sticky="ew", padx=(0, 4))
         self.btn_execute = ttk.Button(self.frm_buttons, text=self._t("backup.btn.execute"), command=self._execute)
         self.btn_execute.grid(row=0, column=1, sticky="ew")
+        self.frm_buttons.columnconfigure(2, weight=1)
+        self.btn_analyze = ttk.Button(
+            self.frm_buttons,
+            text=self._t("plan.btn.analyze"),
+            command=lambda: self._analyze_statements(self.txt_sql.get("1.0", tk.END)),
+        )
+        self.btn_analyze.grid(row=0, column=2, sticky="ew", padx=(4, 0))
 
         self.frm_log = ttk.LabelFrame(parent, text=self._t("backup.section.log"), padding=6)
         self.frm_log.grid(row=6, column=0, sticky="nsew")
@@ -632,6 +727,7 @@ class RestoreFromBackupWindow(BackupRestoreBase):
             getattr(self, "ent_backup", None),
             getattr(self, "btn_refresh_sql", None),
             getattr(self, "btn_execute", None),
+            getattr(self, "btn_analyze", None),
         ]
         for widget in widgets:
             if widget is None:
@@ -710,6 +806,8 @@ class RestoreFromBackupWindow(BackupRestoreBase):
             self.btn_refresh_sql.configure(text=self._t("backup.btn.refresh_sql"))
         if hasattr(self, "btn_execute"):
             self.btn_execute.configure(text=self._t("backup.btn.execute"))
+        if hasattr(self, "btn_analyze"):
+            self.btn_analyze.configure(text=self._t("plan.btn.analyze"))
 
     @staticmethod
     def _strip_backup_suffix(owner: str, table: str) -> tuple[str, bool]:
@@ -749,11 +847,18 @@ class RestoreFromCSVWindow(BackupRestoreBase):
     """
 
     GEOMETRY = "720x640"
+    RESTORE_CHUNK_SIZE = db_utils.DML_CHUNK_SIZE
+    RESTORE_COMMIT_INTERVAL = db_utils.INSERT_COMMIT_INTERVAL
+    RESTORE_LOG_INTERVAL = 2.0
+    RESTORE_LOG_ERRORS = 20
+    PREVIEW_ROWS = csv_stream.PREVIEW_ROWS
 
     def __init__(self, parent: tk.Widget, connection: Dict[str, str]):
+        # Chỉ giữ các dòng xem trước; restore đọc lại trực tiếp từ tệp CSV
         self.imported_rows: List[Dict[str, str]] = []
         self.csv_headers: List[str] = []
         self._last_csv_path: Optional[str] = None
+        self._csv_scan: Optional[csv_stream.CsvScan] = None
         self._history_action_type = "restore_csv"
         super().__init__(parent, connection, title_key="backup.restore_csv.title")
         try:
@@ -780,6 +885,11 @@ class RestoreFromCSVWindow(BackupRestoreBase):
         self.btn_import_csv.grid(row=0, column=0, sticky="w")
         self.lbl_file = ttk.Label(self.frm_actions, text=self._t("backup.label.no_file"))
         self.lbl_file.grid(row=0, column=1, sticky="w", padx=(12, 0))
+        self.lbl_commit_interval = ttk.Label(self.frm_actions, text=self._t("backup.label.commit_interval"))
+        self.lbl_commit_interval.grid(row=0, column=2, sticky="e", padx=(12, 4))
+        self.var_commit_interval = tk.StringVar(value=str(self.RESTORE_COMMIT_INTERVAL))
+        self.ent_commit_interval = ttk.Entry(self.frm_actions, textvariable=self.var_commit_interval, width=8)
+        self.ent_commit_interval.grid(row=0, column=3, sticky="e")
 
         self.content_pane = ttk.Panedwindow(parent, orient="vertical")
         self.content_pane.grid(row=3, column=0, sticky="nsew")
@@ -845,9 +955,7 @@ class RestoreFromCSVWindow(BackupRestoreBase):
         """Chuẩn bị lại dữ liệu xem trước khi bảng đích thay đổi."""
         if self._columns:
             self.preview_grid.configure_columns(self._columns)
-        self.imported_rows.clear()
-        self.preview_grid.clear()
-        self.lbl_file.config(text=self._t("backup.label.no_file"))
+        self._clear_preview()
 
     def _import_csv(self):
         """Đọc dữ liệu từ tệp CSV và hiển thị lên lưới xem trước."""
@@ -865,18 +973,15 @@ class RestoreFromCSVWindow(BackupRestoreBase):
         )
         if not path:
             return
-        self._last_csv_path = path
+        if self._job is not None and self._job.running:
+            return
         try:
-            with open(path, "r", encoding="utf-8-sig", newline="") as f:
-                reader = csv.DictReader(f)
-                if not reader.fieldnames:
-                    raise ValueError(self._t("backup.msg.missing_header"))
-                headers = [h.strip() for h in reader.fieldnames]
-                rows = [row for row in reader]
+            preview = csv_stream.read_preview(path, self._columns, self.PREVIEW_ROWS)
         except Exception as exc:
             self._log_exception(f"Failed to import CSV {path}", exc)
             messagebox.showerror(self._t(APP_TITLE_KEY), self._t("backup.msg.read_csv_error", error=str(exc)), parent=self)
             return
+        headers = preview.headers
 
         table_cols = [col.upper() for col in self._columns]
         csv_cols = [h.upper() for h in headers]
@@ -890,26 +995,116 @@ class RestoreFromCSVWindow(BackupRestoreBase):
         if warnings:
             messagebox.showwarning(self._t(APP_TITLE_KEY), "\n".join(warnings), parent=self)
 
+        self._last_csv_path = path
+        self._csv_scan = None
         self.lbl_file.config(text=path)
         self.preview_grid.configure_columns(self._columns)
         self.preview_grid.clear()
-
-        formatted_rows: List[Dict[str, str]] = []
-        for row in rows:
-            normalized = {(key or "").upper(): value for key, value in row.items()}
-            item = {}
-            for col in self._columns:
-                item[col] = normalized.get(col.upper(), "")
-            formatted_rows.append(item)
+        for item in preview.rows:
             self.preview_grid.append_dict(item)
-
-        self.imported_rows = formatted_rows
+        self.imported_rows = preview.rows
         self.csv_headers = headers
-        self._append_log(self._t("backup.log.import_summary", count=len(formatted_rows), path=path))
+        if not preview.truncated:
+            self._csv_scan_done(path, None)
+            return
+        self._append_log(self._t("backup.log.preview_summary", count=len(preview.rows), path=path))
+        self._start_csv_scan(path)
+
+    def _start_csv_scan(self, path: str) -> None:
+        """Quét toàn bộ tệp ở luồng nền: đếm dòng, kiểm tra số cột và kiểu dữ liệu."""
+        columns = list(self._columns)
+        column_meta = dict(self._column_meta)
+        label = self._t("backup.progress.scan_csv")
+
+        def work(ctx):
+            return csv_stream.scan_csv(path, columns, column_meta, progress=lambda done: ctx.progress(done, None, label))
+
+        def on_success(scan: csv_stream.CsvScan) -> None:
+            if self.winfo_exists():
+                self._csv_scan_done(path, scan)
+
+        def on_error(exc: Exception) -> None:
+            self._log_exception(f"Failed to scan CSV {path}", exc)
+            if not self.winfo_exists():
+                return
+            self._clear_preview()
+            messagebox.showerror(self._t(APP_TITLE_KEY), self._t("backup.msg.read_csv_error", error=str(exc)), parent=self)
+
+        def on_cancel(_partial) -> None:
+            if not self.winfo_exists():
+                return
+            self._clear_preview()
+            self._append_log(self._t("widget.progress.cancelled"))
+
+        self._job = job_runner.run_job(
+            self,
+            None,
+            work,
+            title=label,
+            on_success=on_success,
+            on_error=on_error,
+            on_cancel=on_cancel,
+        )
+
+    def _csv_scan_done(self, path: str, scan: Optional[csv_stream.CsvScan]) -> None:
+        """Ghi nhận kết quả quét; tệp nhỏ (đã đọc hết khi xem trước) chỉ cần kiểm tra kiểu."""
+        if path != self._last_csv_path:
+            return
+        if scan is None:
+            try:
+                scan = csv_stream.scan_csv(path, self._columns, self._column_meta)
+            except Exception as exc:
+                self._log_exception(f"Failed to scan CSV {path}", exc)
+                scan = csv_stream.CsvScan(path, row_count=len(self.imported_rows))
+        self._csv_scan = scan
+        self.lbl_file.config(text=self._t("backup.label.csv_file", path=path, count=scan.row_count))
+        self._append_log(self._t("backup.log.import_summary", count=scan.row_count, path=path))
+        if scan.issue_count:
+            self._append_log(self._t("backup.log.scan_issues", count=scan.issue_count))
+            for line, message in scan.issues[: self.RESTORE_LOG_ERRORS]:
+                self._append_log(self._t("backup.log.restore_row_error", line=line, error=message))
+            if scan.issue_count > self.RESTORE_LOG_ERRORS:
+                self._append_log(f"... (+{scan.issue_count - self.RESTORE_LOG_ERRORS})")
+
+    @staticmethod
+    def _bind_rows(
+        records: Iterable[Tuple[int, Dict[str, Any]]],
+        columns: List[str],
+        column_meta: Dict[str, Any],
+        lines: Optional[csv_stream.LineIndex] = None,
+    ) -> Iterator[List[Any]]:
+        """
+        Chuyển từng dòng CSV (số dòng, dict) thành danh sách giá trị bind theo thứ tự cột.
+        Ô trống của cột chuỗi vẫn ghi ' ' như khi restore bằng literal; cột số/ngày ghi NULL.
+        lines ghi lại số dòng trong tệp để báo lỗi đúng vị trí.
+        """
+        converters = db_utils.RowConverter(columns, column_meta).converters
+        blanks = [" " if conv.kind == "text" else None for conv in converters]
+        for idx, (line, record) in enumerate(records):
+            if lines is not None:
+                lines.add(idx, line)
+            values = []
+            for col, blank in zip(columns, blanks):
+                value = record.get(col)
+                values.append(blank if value is None or not str(value).strip() else value)
+            yield values
+
+    def _commit_interval(self) -> Optional[int]:
+        """Số dòng giữa hai lần commit (0 = chỉ commit khi xong); None nếu nhập sai."""
+        text = self.var_commit_interval.get().strip()
+        if not text:
+            return self.RESTORE_COMMIT_INTERVAL
+        try:
+            value = int(text)
+        except ValueError:
+            return None
+        return value if value >= 0 else None
 
     def _clear_preview(self):
         """Xóa dữ liệu CSV đang xem trước."""
-        self.imported_rows.clear()
+        self.imported_rows = []
+        self._csv_scan = None
+        self._last_csv_path = None
         self.preview_grid.clear()
         self.lbl_file.config(text=self._t("backup.label.no_file"))
 
@@ -919,35 +1114,39 @@ class RestoreFromCSVWindow(BackupRestoreBase):
         if not table:
             messagebox.showwarning(self._t(APP_TITLE_KEY), self._t("backup.msg.select_table"), parent=self)
             return
-        if not self.imported_rows:
+        if self._job is not None and self._job.running:
+            return
+        if not self.imported_rows or not self._last_csv_path:
             messagebox.showwarning(self._t(APP_TITLE_KEY), self._t("backup.msg.no_csv_data"), parent=self)
             return
-        row_count = len(self.imported_rows)
+        if self._csv_scan is None:
+            messagebox.showwarning(self._t(APP_TITLE_KEY), self._t("backup.msg.scan_pending"), parent=self)
+            return
+        csv_path = self._last_csv_path
+        row_count = self._csv_scan.row_count
+        confirm = self._t("backup.msg.restore_confirm", count=row_count, table=table)
+        if self._csv_scan.issue_count:
+            confirm += "\n\n" + self._t("backup.log.scan_issues", count=self._csv_scan.issue_count)
         sql_summary = f"CSV restore into {table}"
         log_message = f"Restore from {self._last_csv_path}" if getattr(self, "_last_csv_path", None) else "Restore from CSV"
         if not self.conn:
             history.log_action(self._history_action_type, table, row_count, "failed", message=self._t("backup.msg.not_connected"), sql_text=sql_summary)
             messagebox.showerror(self._t(APP_TITLE_KEY), self._t("backup.msg.not_connected"), parent=self)
             return
-        if not messagebox.askyesno(
-            self._t(APP_TITLE_KEY),
-            self._t("backup.msg.restore_confirm", count=row_count, table=table),
-            parent=self,
-        ):
+        if not messagebox.askyesno(self._t(APP_TITLE_KEY), confirm, parent=self):
+            return
+
+        commit_interval = self._commit_interval()
+        if commit_interval is None:
+            messagebox.showwarning(self._t(APP_TITLE_KEY), self._t("backup.msg.invalid_commit_interval"), parent=self)
             return
 
         owner, name = self._split_table(table)
         full_table = f"{owner}.{name}"
-        col_list = ", ".join(self._columns)
-
-        try:
-            cur = self.conn.cursor()
-        except Exception as exc:
-            msg = self._t("backup.msg.cursor_error", error=str(exc))
-            self._log_exception("Failed to create cursor for CSV restore", exc)
-            history.log_action(self._history_action_type, full_table, row_count, "failed", message=msg, sql_text=sql_summary)
-            messagebox.showerror(self._t(APP_TITLE_KEY), msg, parent=self)
-            return
+        columns = list(self._columns)
+        column_meta = dict(self._column_meta)
+        lines = csv_stream.LineIndex()
+        rows = self._bind_rows(csv_stream.iter_records(csv_path, columns), columns, column_meta, lines)
 
         action_id = history.log_action(self._history_action_type, full_table, row_count, "pending", message=log_message, sql_text=sql_summary)
 
@@ -960,36 +1159,89 @@ class RestoreFromCSVWindow(BackupRestoreBase):
             except Exception as exc:
                 self._log_exception("Failed to finalize CSV restore history", exc)
 
-        try:
-            for idx, row in enumerate(self.imported_rows, start=1):
-                values = []
-                for col in self._columns:
-                    meta = self._column_meta.get(col)
-                    values.append(db_utils.format_sql_literal(row.get(col), meta))
-                stmt = f"INSERT INTO {full_table} ({col_list}) VALUES ({', '.join(values)})"
-                self._append_log(f"> {stmt}")
-                cur.execute(stmt)
-                if idx % 100 == 0:
-                    self.conn.commit()
-            self.conn.commit()
-        except Exception as exc:
-            self.conn.rollback()
+        label = self._t("backup.progress.rows")
+        state = {"started": 0.0, "logged": 0.0}
+
+        def log_progress(ctx, done: int, final: bool = False) -> None:
+            now = time.monotonic()
+            if not final and now - state["logged"] < self.RESTORE_LOG_INTERVAL:
+                return
+            state["logged"] = now
+            elapsed = max(now - state["started"], 1e-6)
+            ctx.post(
+                self._append_log,
+                self._t("backup.log.restore_progress", done=done, total=row_count, rate=int(done / elapsed)),
+            )
+
+        def work(ctx):
+            state["started"] = state["logged"] = time.monotonic()
+
+            def on_chunk(done: int) -> None:
+                ctx.progress(done, row_count, label)
+                log_progress(ctx, done)
+
+            result = db_utils.insert_rows(
+                self.conn,
+                full_table,
+                self.current_owner,
+                columns,
+                rows,
+                column_meta=column_meta,
+                chunk_size=self.RESTORE_CHUNK_SIZE,
+                commit_interval=commit_interval,
+                progress=on_chunk,
+            )
+            log_progress(ctx, result.total, final=True)
+            return result
+
+        def on_success(result: db_utils.InsertResult) -> None:
+            if result.errors:
+                preview_count = len(self.imported_rows)
+                self.preview_grid.mark_rows({idx: "error" for idx in result.failed_rows if idx < preview_count})
+                for idx, message in result.errors[: self.RESTORE_LOG_ERRORS]:
+                    self._append_log(self._t("backup.log.restore_row_error", line=lines.line(idx), error=message))
+                if len(result.errors) > self.RESTORE_LOG_ERRORS:
+                    self._append_log(f"... (+{len(result.errors) - self.RESTORE_LOG_ERRORS})")
+                msg = self._t(
+                    "backup.msg.restore_partial",
+                    inserted=result.inserted,
+                    total=row_count,
+                    failed=len(result.errors),
+                )
+                self._append_log(msg)
+                _finalize("failed", msg)
+                messagebox.showwarning(self._t(APP_TITLE_KEY), msg, parent=self)
+                return
+            self._append_log(self._t("backup.log.restore_done"))
+            _finalize("success", self._t("backup.log.restore_done"))
+            messagebox.showinfo(self._t(APP_TITLE_KEY), self._t("backup.msg.restore_success"), parent=self)
+
+        def on_error(exc: Exception) -> None:
             self._append_log(f"ERROR: {exc}")
             msg = self._t("backup.msg.restore_error", error=str(exc))
             self._log_exception("Failed during CSV restore execution", exc)
             _finalize("failed", msg)
             messagebox.showerror(self._t(APP_TITLE_KEY), msg, parent=self)
-            return
-        finally:
-            try:
-                cur.close()
-            except Exception as exc:
-                self._logger.debug("CSV restore cursor close failed: %s", exc)
-
-        self._append_log(self._t("backup.log.restore_done"))
-        _finalize("success", self._t("backup.log.restore_done"))
-        messagebox.showinfo(self._t(APP_TITLE_KEY), self._t("backup.msg.restore_success"), parent=self)
 
+        def on_cancel(partial) -> None:
+            committed = getattr(partial, "committed_rows", 0) or 0
+            if committed:
+                msg = self._t("widget.progress.cancelled_partial", committed=committed)
+            else:
+                msg = self._t("widget.progress.cancelled")
+            self._append_log(msg)
+            _finalize("cancelled", msg)
+            messagebox.showwarning(self._t(APP_TITLE_KEY), msg, parent=self)
+
+        self._job = job_runner.run_job(
+            self,
+            self.conn,
+            work,
+            title=self._t("backup.progress.restore", table=full_table),
+            on_success=on_success,
+            on_error=on_error,
+            on_cancel=on_cancel,
+        )
 
     def _apply_language(self) -> None:
         """Cập nhật chuỗi dịch cho các thành phần restore CSV."""
@@ -1002,12 +1254,16 @@ class RestoreFromCSVWindow(BackupRestoreBase):
             self.frm_log.configure(text=self._t("backup.section.log"))
         if hasattr(self, "btn_import_csv"):
             self.btn_import_csv.configure(text=self._t("backup.btn.import_csv"))
+        if hasattr(self, "lbl_commit_interval"):
+            self.lbl_commit_interval.configure(text=self._t("backup.label.commit_interval"))
         if hasattr(self, "btn_clear_preview"):
             self.btn_clear_preview.configure(text=self._t("backup.btn.clear_preview"))
         if hasattr(self, "btn_execute_restore"):
             self.btn_execute_restore.configure(text=self._t("backup.btn.execute_restore"))
         if hasattr(self, "lbl_file") and not self.imported_rows:
             self.lbl_file.configure(text=self._t("backup.label.no_file"))
+        elif hasattr(self, "lbl_file") and self._csv_scan is not None:
+            self.lbl_file.configure(text=self._t("backup.label.csv_file", path=self._csv_scan.path, count=self._csv_scan.row_count))
         if hasattr(self, "preview_grid"):
             self.preview_grid.apply_language()
 
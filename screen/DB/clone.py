@@ -4,26 +4,33 @@ Màn hình Clone DB - sao chép dữ liệu giữa hai môi trường.
 from __future__ import annotations
 
 import json
+import logging
 import os
 import threading
+import time
 import tkinter as tk
-from tkinter import messagebox, simpledialog, ttk
+from tkinter import filedialog, messagebox, simpledialog, ttk
 from tkinter.scrolledtext import ScrolledText
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import re
 
-from screen.DB import db_utils
+from screen.DB import clone_dump, clone_engine, db_utils
 from screen.DB.widgets import LoadingPopup
 from core import history, i18n
 
+logger = logging.getLogger("ToolVIP.Clone")
+
 APP_TITLE_KEY = "common.app_title"
 ACTION_TYPE = "clone_db"
+DUMP_EXPORT_ACTION = "clone_dump_export"
+DUMP_IMPORT_ACTION = "clone_dump_import"
 
 APPDATA = os.environ.get("APPDATA") or os.path.expanduser("~")
 PERSIST_DIR = os.path.join(APPDATA, "ToolVIP")
 CONFIGS_DIR = os.path.join(PERSIST_DIR, "configs")
 CLONE_ENV_PATH = os.path.join(CONFIGS_DIR, "clone_envs.json")
 DB_LIST_PATH = os.path.join(CONFIGS_DIR, "db_list.json")
+CLONE_CHECKPOINT_PATH = os.path.join(CONFIGS_DIR, "clone_checkpoint.json")
 os.makedirs(CONFIGS_DIR, exist_ok=True)
 
 
@@ -89,8 +96,6 @@ def block_extract(block: str) -> Dict[str, str]:
 class CloneDbWindow(tk.Toplevel):
     """Cửa sổ clone DB."""
 
-    BATCH_SIZE = 500
-
     def __init__(
         self,
         parent: tk.Widget,
@@ -118,6 +123,9 @@ class CloneDbWindow(tk.Toplevel):
         self._target_conn = None
         self._source_conn_key = ""
         self._target_conn_key = ""
+        self._source_env: Dict[str, Any] = {}
+        self._target_env: Dict[str, Any] = {}
+        self._source_catalog_info: Optional[Dict[str, Any]] = None
         self._source_owner = ""
         self._target_owner = ""
         self._source_connected = False
@@ -127,6 +135,12 @@ class CloneDbWindow(tk.Toplevel):
         self._mapping_rows: Dict[str, Dict[str, str]] = {}
         self._export_thread: threading.Thread | None = None
         self._cancel_event = threading.Event()
+        # Tiến độ export: số bảng đã xong và tỉ lệ của các bảng đang chạy
+        self._tables_done = 0
+        self._tables_total = 0
+        self._rows_done = 0
+        self._running_tables: Dict[str, float] = {}
+        self._table_started: Dict[str, float] = {}
 
         self._build_ui()
         self.protocol("WM_DELETE_WINDOW", self._on_close)
@@ -185,12 +199,17 @@ class CloneDbWindow(tk.Toplevel):
         mapping_frame.columnconfigure(0, weight=1)
         mapping_frame.rowconfigure(0, weight=0)
 
-        self.tree_mappings = ttk.Treeview(mapping_frame, columns=("source", "target"), show="headings", height=6)
+        self.tree_mappings = ttk.Treeview(
+            mapping_frame, columns=("source", "target", "filter"), show="headings", height=6
+        )
         self.tree_mappings.heading("source", text=_t("clone.column.source"))
         self.tree_mappings.heading("target", text=_t("clone.column.target"))
+        self.tree_mappings.heading("filter", text=_t("clone.column.filter"))
         self.tree_mappings.column("source", width=200, anchor="w")
         self.tree_mappings.column("target", width=200, anchor="w")
+        self.tree_mappings.column("filter", width=220, anchor="w")
         self.tree_mappings.grid(row=0, column=0, columnspan=3, sticky="nsew")
+        self.tree_mappings.bind("<Double-Button-1>", lambda _e: self._edit_mapping_filter())
 
         map_scroll = ttk.Scrollbar(mapping_frame, orient="vertical", command=self.tree_mappings.yview)
         map_scroll.grid(row=0, column=3, sticky="ns")
@@ -205,6 +224,9 @@ class CloneDbWindow(tk.Toplevel):
         btn_clear = ttk.Button(mapping_frame, command=self._clear_mappings)
         self._register_text(btn_clear, "clone.btn.clear")
         btn_clear.grid(row=1, column=2, sticky="e", pady=(6, 0))
+        btn_filter = ttk.Button(mapping_frame, command=self._edit_mapping_filter)
+        self._register_text(btn_filter, "clone.btn.filter")
+        btn_filter.grid(row=2, column=0, sticky="w", pady=(6, 0))
 
         # Export + log
         bottom = ttk.Frame(self.main)
@@ -220,9 +242,42 @@ class CloneDbWindow(tk.Toplevel):
         chk_truncate = ttk.Checkbutton(btn_row, variable=self.var_truncate)
         self._register_text(chk_truncate, "clone.option.truncate")
         chk_truncate.grid(row=0, column=0, sticky="w")
+        self.var_split_large = tk.BooleanVar(value=True)
+        chk_split = ttk.Checkbutton(btn_row, variable=self.var_split_large)
+        self._register_text(chk_split, "clone.option.split_large")
+        chk_split.grid(row=1, column=0, sticky="w")
+        self.var_resumable = tk.BooleanVar(value=True)
+        chk_resumable = ttk.Checkbutton(btn_row, variable=self.var_resumable)
+        self._register_text(chk_resumable, "clone.option.resumable")
+        chk_resumable.grid(row=2, column=0, sticky="w")
+        self.var_delta = tk.BooleanVar(value=False)
+        chk_delta = ttk.Checkbutton(btn_row, variable=self.var_delta)
+        self._register_text(chk_delta, "clone.option.delta")
+        chk_delta.grid(row=3, column=0, sticky="w")
+        self.var_fk_closure = tk.BooleanVar(value=True)
+        chk_fk_closure = ttk.Checkbutton(btn_row, variable=self.var_fk_closure)
+        self._register_text(chk_fk_closure, "clone.option.fk_closure")
+        chk_fk_closure.grid(row=4, column=0, sticky="w")
+        lbl_workers = ttk.Label(btn_row)
+        self._register_text(lbl_workers, "clone.label.workers")
+        lbl_workers.grid(row=0, column=1, sticky="e", padx=(12, 4))
+        self.var_workers = tk.IntVar(value=clone_engine.DEFAULT_WORKERS)
+        self.spn_workers = ttk.Spinbox(
+            btn_row, from_=1, to=clone_engine.MAX_WORKERS, textvariable=self.var_workers, width=4
+        )
+        self.spn_workers.grid(row=0, column=2, sticky="e", padx=(0, 12))
         self.btn_export = ttk.Button(btn_row, command=self._start_export, state="disabled")
         self._register_text(self.btn_export, "clone.btn.export")
-        self.btn_export.grid(row=0, column=1, sticky="e")
+        self.btn_export.grid(row=0, column=3, sticky="e")
+        self.btn_cancel = ttk.Button(btn_row, command=self._cancel_export, state="disabled")
+        self._register_text(self.btn_cancel, "clone.btn.cancel")
+        self.btn_cancel.grid(row=0, column=4, sticky="e", padx=(6, 0))
+        self.btn_dump_export = ttk.Button(btn_row, command=self._start_dump_export, state="disabled")
+        self._register_text(self.btn_dump_export, "clone.btn.dump_export")
+        self.btn_dump_export.grid(row=1, column=3, sticky="e", pady=(4, 0))
+        self.btn_dump_import = ttk.Button(btn_row, command=self._start_dump_import, state="disabled")
+        self._register_text(self.btn_dump_import, "clone.btn.dump_import")
+        self.btn_dump_import.grid(row=1, column=4, sticky="e", padx=(6, 0), pady=(4, 0))
 
         progress_frame = ttk.Frame(bottom)
         progress_frame.grid(row=1, column=0, sticky="ew", pady=(8, 0), padx=12)
@@ -467,7 +522,7 @@ class CloneDbWindow(tk.Toplevel):
         status.configure(text=_t("clone.status.connecting"), foreground="#0066aa")
         self.update_idletasks()
         try:
-            conn = db_utils.connect_oracle(
+            conn = db_utils.acquire_connection(
                 data["user"],
                 data["password"],
                 data["host"],
@@ -490,15 +545,20 @@ class CloneDbWindow(tk.Toplevel):
         if kind == "source":
             if self._target_conn_key and key == self._target_conn_key:
                 status.configure(text=_t("clone.msg.same_environment"), foreground="#aa0000")
-                conn.close()
+                db_utils.release_connection(conn)
                 return
             if self._source_conn:
                 try:
-                    self._source_conn.close()
+                    db_utils.release_connection(self._source_conn)
                 except Exception:
                     pass
             self._source_conn = conn
             self._source_conn_key = key
+            self._source_env = dict(data)
+            if self._source_catalog_info:
+                db_utils.stop_catalog_refresh(self._source_catalog_info)
+            self._source_catalog_info = dict(data)
+            db_utils.start_catalog_refresh(self._source_catalog_info)
             self._source_owner = data["user"].upper()
             self._source_connected = True
             status.configure(text=_t("clone.status.connected"), foreground="#228833")
@@ -506,15 +566,16 @@ class CloneDbWindow(tk.Toplevel):
         else:
             if self._source_conn_key and key == self._source_conn_key:
                 status.configure(text=_t("clone.msg.same_environment"), foreground="#aa0000")
-                conn.close()
+                db_utils.release_connection(conn)
                 return
             if self._target_conn:
                 try:
-                    self._target_conn.close()
+                    db_utils.release_connection(self._target_conn)
                 except Exception:
                     pass
             self._target_conn = conn
             self._target_conn_key = key
+            self._target_env = dict(data)
             self._target_owner = data["user"].upper()
             self._target_connected = True
             status.configure(text=_t("clone.status.connected"), foreground="#228833")
@@ -575,8 +636,8 @@ class CloneDbWindow(tk.Toplevel):
         for existing in self._mapping_rows.values():
             if existing["source"] == source:
                 return
-        item_id = self.tree_mappings.insert("", "end", values=(source, target))
-        self._mapping_rows[item_id] = {"source": source, "target": target}
+        item_id = self.tree_mappings.insert("", "end", values=(source, target, ""))
+        self._mapping_rows[item_id] = {"source": source, "target": target, "where": "", "sample": None}
 
     def _remove_selected_mapping(self):
         selection = self.tree_mappings.selection()
@@ -610,12 +671,107 @@ class CloneDbWindow(tk.Toplevel):
         if not new_value:
             return
         mapping["target"] = new_value
-        self.tree_mappings.item(item, values=(mapping["source"], mapping["target"]))
+        self._refresh_mapping_row(item)
+
+    @staticmethod
+    def _describe_filter(mapping: Dict[str, Any]) -> str:
+        parts = []
+        if mapping.get("sample"):
+            parts.append(f"SAMPLE {mapping['sample']:g}%")
+        if mapping.get("where"):
+            parts.append(f"WHERE {mapping['where']}")
+        return "; ".join(parts)
+
+    def _refresh_mapping_row(self, item: str):
+        mapping = self._mapping_rows[item]
+        self.tree_mappings.item(
+            item, values=(mapping["source"], mapping["target"], self._describe_filter(mapping))
+        )
+
+    def _edit_mapping_filter(self):
+        """Hộp thoại điều kiện WHERE và % SAMPLE cho bảng đang chọn (để trống = copy toàn bộ)."""
+        selection = self.tree_mappings.selection()
+        if not selection:
+            messagebox.showwarning(_t(APP_TITLE_KEY), _t("clone.msg.select_mapping"), parent=self)
+            return
+        item = selection[0]
+        mapping = self._mapping_rows.get(item)
+        if not mapping:
+            return
+        dialog = tk.Toplevel(self)
+        dialog.title(_t("clone.dialog.filter_title", table=mapping["source"]))
+        dialog.transient(self)
+        dialog.resizable(True, False)
+        frame = ttk.Frame(dialog, padding=10)
+        frame.pack(fill="both", expand=True)
+        frame.columnconfigure(1, weight=1)
+        ttk.Label(frame, text=_t("clone.dialog.filter_where")).grid(row=0, column=0, sticky="w")
+        var_where = tk.StringVar(value=mapping.get("where") or "")
+        ent_where = ttk.Entry(frame, textvariable=var_where, width=60)
+        ent_where.grid(row=0, column=1, sticky="ew", padx=(6, 0))
+        ttk.Label(frame, text=_t("clone.dialog.filter_sample")).grid(row=1, column=0, sticky="w", pady=(6, 0))
+        sample = mapping.get("sample")
+        var_sample = tk.StringVar(value=f"{sample:g}" if sample else "")
+        ttk.Entry(frame, textvariable=var_sample, width=10).grid(row=1, column=1, sticky="w", padx=(6, 0), pady=(6, 0))
+        ttk.Label(frame, text=_t("clone.dialog.filter_hint"), foreground="gray").grid(
+            row=2, column=0, columnspan=2, sticky="w", pady=(6, 0)
+        )
+
+        def on_ok():
+            where = var_where.get().strip()
+            if where.upper().startswith("WHERE "):
+                where = where[6:].strip()
+            if ";" in where:
+                messagebox.showwarning(_t(APP_TITLE_KEY), _t("clone.msg.invalid_filter"), parent=dialog)
+                return
+            raw_sample = var_sample.get().strip().rstrip("%")
+            value: Optional[float] = None
+            if raw_sample:
+                try:
+                    value = float(raw_sample)
+                except ValueError:
+                    value = -1.0
+                if not 0 < value < 100:
+                    messagebox.showwarning(_t(APP_TITLE_KEY), _t("clone.msg.invalid_sample"), parent=dialog)
+                    return
+            mapping["where"] = where
+            mapping["sample"] = value
+            self._refresh_mapping_row(item)
+            dialog.destroy()
+
+        buttons = ttk.Frame(frame)
+        buttons.grid(row=3, column=0, columnspan=2, sticky="e", pady=(10, 0))
+        ttk.Button(buttons, text=_t("common.ok"), command=on_ok).pack(side="left")
+        ttk.Button(buttons, text=_t("common.cancel"), command=dialog.destroy).pack(side="left", padx=(6, 0))
+        dialog.bind("<Return>", lambda _e: on_ok())
+        dialog.bind("<Escape>", lambda _e: dialog.destroy())
+        ent_where.focus_set()
+        dialog.grab_set()
 
     # ------------------------------------------------------------------
     def _update_export_button_state(self):
+        if self._export_thread and self._export_thread.is_alive():
+            return
         enabled = self._source_connected and self._target_connected and bool(self._mapping_rows)
         self.btn_export.configure(state="normal" if enabled else "disabled")
+        dump_export = self._source_connected and bool(self._mapping_rows)
+        self.btn_dump_export.configure(state="normal" if dump_export else "disabled")
+        self.btn_dump_import.configure(state="normal" if self._target_connected else "disabled")
+
+    def _begin_run(self, total: int, log_text: str) -> None:
+        """Reset tiến độ và khóa các nút trước khi chạy export/dump trên luồng nền."""
+        self._tables_done = 0
+        self._tables_total = total
+        self._rows_done = 0
+        self._running_tables.clear()
+        self._table_started.clear()
+        self.progress.configure(maximum=max(1, total), value=0)
+        self.lbl_progress.configure(text="")
+        self._append_log(log_text)
+        for button in (self.btn_export, self.btn_dump_export, self.btn_dump_import):
+            button.configure(state="disabled")
+        self.btn_cancel.configure(state="normal")
+        self._cancel_event.clear()
 
     def _start_export(self):
         if self._export_thread and self._export_thread.is_alive():
@@ -625,91 +781,391 @@ class CloneDbWindow(tk.Toplevel):
             return
         if not self._source_conn or not self._target_conn:
             return
-        tasks = list(self._mapping_rows.values())
-        self.progress.configure(maximum=len(tasks), value=0)
-        self.lbl_progress.configure(text="")
-        self._append_log(_t("clone.log.start", count=len(tasks)))
-        self.btn_export.configure(state="disabled")
-        self._cancel_event.clear()
-        self._export_thread = threading.Thread(target=self._run_export_thread, args=(tasks,), daemon=True)
+        try:
+            workers = max(1, min(int(self.var_workers.get()), clone_engine.MAX_WORKERS))
+        except (tk.TclError, ValueError):
+            workers = clone_engine.DEFAULT_WORKERS
+        tasks = clone_engine.build_tasks(list(self._mapping_rows.values()), self._source_owner, self._target_owner)
+        options = clone_engine.CloneOptions(
+            truncate=bool(self.var_truncate.get()),
+            workers=workers,
+            split_large=bool(self.var_split_large.get()),
+            delta=bool(self.var_delta.get()),
+        )
+        checkpoint: Optional[clone_engine.CloneCheckpoint] = None
+        # Chạy tiếp từ checkpoint: điều kiện lọc đã được mở rộng theo FK ở lần trước
+        fk_closure = bool(self.var_fk_closure.get())
+        previous = clone_engine.CloneCheckpoint.load(CLONE_CHECKPOINT_PATH)
+        if previous is not None and previous.matches(self._source_conn_key, self._target_conn_key):
+            done, total = previous.progress()
+            answer = messagebox.askyesnocancel(
+                _t(APP_TITLE_KEY),
+                _t("clone.msg.resume_confirm", created=previous.data.get("created", ""), done=done, total=total),
+                parent=self,
+            )
+            if answer is None:
+                return
+            if answer:
+                checkpoint = previous
+                tasks = previous.tasks()
+                options.truncate = previous.truncate
+                options.delta = previous.delta
+                fk_closure = False
+            else:
+                previous.remove()
+        if checkpoint is None and self.var_resumable.get():
+            checkpoint = clone_engine.CloneCheckpoint.create(
+                CLONE_CHECKPOINT_PATH, self._source_conn_key, self._target_conn_key, tasks, options
+            )
+        self._begin_run(len(tasks), _t("clone.log.start", count=len(tasks)))
+        self._export_thread = threading.Thread(
+            target=self._run_export_thread, args=(tasks, options, checkpoint, fk_closure), daemon=True
+        )
         self._export_thread.start()
 
-    def _run_export_thread(self, tasks: List[Dict[str, str]]):
-        total_rows = 0
-        failures = 0
-        action_id = history.log_action(ACTION_TYPE, ",".join(t["source"] for t in tasks), 0, "pending")
-        for idx, mapping in enumerate(tasks, start=1):
-            if self._cancel_event.is_set():
-                break
-            try:
-                rows = self._copy_table(mapping)
-                total_rows += rows
-                self._append_log(_t("clone.log.copied", source=mapping["source"], target=mapping["target"], rows=rows))
-            except Exception as exc:
-                failures += 1
-                self._append_log(_t("clone.log.error", source=mapping["source"], error=exc))
-            finally:
-                self.after(0, self._update_progress, idx, len(tasks))
-        status = "success" if failures == 0 else "failed"
+    def _start_dump_export(self):
+        if self._export_thread and self._export_thread.is_alive():
+            return
+        if not self._mapping_rows or not self._source_conn:
+            return
+        path = filedialog.asksaveasfilename(
+            parent=self,
+            defaultextension=clone_dump.DUMP_EXTENSION,
+            initialfile=f"{self._source_owner or 'clone'}{clone_dump.DUMP_EXTENSION}",
+            filetypes=[(_t("clone.dialog.dump_files"), "*.gz"), (_t("backup.dialog.all_files"), "*.*")],
+        )
+        if not path:
+            return
+        tasks = clone_engine.build_tasks(list(self._mapping_rows.values()), self._source_owner, self._target_owner)
+        self._begin_run(len(tasks), _t("clone.log.dump_export_start", count=len(tasks), path=path))
+        self._export_thread = threading.Thread(
+            target=self._run_dump_export_thread, args=(tasks, path, bool(self.var_fk_closure.get())), daemon=True
+        )
+        self._export_thread.start()
+
+    def _run_dump_export_thread(self, tasks: List[clone_engine.CloneTask], path: str, fk_closure: bool = False):
+        action_id = history.log_action(DUMP_EXPORT_ACTION, os.path.basename(path), 0, "pending")
+        started = time.monotonic()
+        results: List[clone_dump.DumpTableStats] = []
+        status, error = "success", ""
+        try:
+            if fk_closure:
+                tasks = self._apply_fk_closure(tasks)
+            # Ước lượng số dòng/độ rộng dòng để chọn batch ban đầu
+            tasks = clone_engine.schedule_largest_first(self._source_conn, tasks)
+            results = clone_dump.export_dump(
+                self._source_conn,
+                tasks,
+                path,
+                source_key=self._source_conn_key,
+                cancel_event=self._cancel_event,
+                progress=lambda task, rows: self._post(self._on_table_progress, task, rows),
+                on_table_done=lambda stats: self._post(self._on_dump_table_done, stats),
+            )
+        except clone_engine.CloneCancelled:
+            status = "cancelled"
+        except Exception as exc:
+            logger.exception("Clone dump export failed")
+            status, error = "failed", str(exc)
+        failures = sum(1 for r in results if r.error)
+        if status == "success" and failures:
+            status = "failed"
+        message = self._dump_summary("clone.log.dump_export_done", results, time.monotonic() - started, error)
+        if status == "success":
+            message += " " + _t("clone.log.dump_file_size", path=path, size=os.path.getsize(path) / 1_048_576)
+        if action_id:
+            history.mark_action_status(
+                action_id, status, message, row_count=sum(r.rows for r in results), sql_text=path
+            )
+        self._post(self._finish_export, message)
+
+    def _start_dump_import(self):
+        if self._export_thread and self._export_thread.is_alive():
+            return
+        if not self._target_conn:
+            return
+        path = filedialog.askopenfilename(
+            parent=self,
+            filetypes=[(_t("clone.dialog.dump_files"), "*.gz"), (_t("backup.dialog.all_files"), "*.*")],
+        )
+        if not path:
+            return
+        try:
+            info = clone_dump.read_dump_info(path)
+        except Exception as exc:
+            messagebox.showerror(_t(APP_TITLE_KEY), _t("clone.msg.dump_invalid", error=exc), parent=self)
+            return
+        if not messagebox.askyesno(
+            _t(APP_TITLE_KEY),
+            _t(
+                "clone.msg.dump_import_confirm",
+                created=info.created,
+                source=info.source,
+                count=len(info.tasks),
+                owner=self._target_owner,
+            ),
+            parent=self,
+        ):
+            return
+        self._begin_run(len(info.tasks), _t("clone.log.dump_import_start", count=len(info.tasks), path=path))
+        self._export_thread = threading.Thread(
+            target=self._run_dump_import_thread, args=(path, bool(self.var_truncate.get())), daemon=True
+        )
+        self._export_thread.start()
+
+    def _run_dump_import_thread(self, path: str, truncate: bool):
+        action_id = history.log_action(DUMP_IMPORT_ACTION, os.path.basename(path), 0, "pending")
+        started = time.monotonic()
+        results: List[clone_dump.DumpTableStats] = []
+        status, error = "success", ""
+        try:
+            results = clone_dump.import_dump(
+                self._target_conn,
+                path,
+                self._target_owner,
+                truncate=truncate,
+                cancel_event=self._cancel_event,
+                progress=lambda task, rows: self._post(self._on_table_progress, task, rows),
+                on_table_done=lambda stats: self._post(self._on_dump_table_done, stats),
+            )
+        except clone_engine.CloneCancelled:
+            status = "cancelled"
+        except Exception as exc:
+            logger.exception("Clone dump import failed")
+            status, error = "failed", str(exc)
+        if status == "success" and any(r.error for r in results):
+            status = "failed"
+        message = self._dump_summary("clone.log.dump_import_done", results, time.monotonic() - started, error)
+        if action_id:
+            history.mark_action_status(
+                action_id,
+                status,
+                message,
+                row_count=sum(r.rows for r in results if not r.error),
+                sql_text=path,
+            )
+        self._post(self._finish_export, message)
+
+    @staticmethod
+    def _dump_summary(key: str, results: List[clone_dump.DumpTableStats], elapsed: float, error: str) -> str:
+        rows = sum(r.rows for r in results)
+        raw_mb = sum(r.raw_bytes for r in results) / 1_048_576
+        message = _t(
+            key,
+            tables=len(results),
+            failed=sum(1 for r in results if r.error),
+            rows=rows,
+            seconds=elapsed,
+            rate=rows / elapsed if elapsed > 0 else 0.0,
+            mb_rate=raw_mb / elapsed if elapsed > 0 else 0.0,
+        )
+        if error:
+            message += " " + _t("clone.log.dump_error", error=error)
+        return message
+
+    def _apply_fk_closure(self, tasks: List[clone_engine.CloneTask]) -> List[clone_engine.CloneTask]:
+        """Chạy trên luồng nền: mở rộng điều kiện lọc theo FK, ghi log và cập nhật tổng số bảng."""
+        try:
+            tasks, notes = clone_engine.apply_fk_closure(self._source_conn, tasks, self._target_owner)
+        except Exception as exc:
+            logger.warning("FK closure failed: %s", exc)
+            self._log_async(_t("clone.log.fk_closure_failed", error=exc))
+            return tasks
+        for note in notes:
+            self._log_async(_t("clone.log.fk_closure", note=note))
+        self._post(self._set_tables_total, len(tasks))
+        return tasks
+
+    def _set_tables_total(self, total: int):
+        self._tables_total = total
+        self._refresh_progress()
+
+    def _on_dump_table_done(self, stats: clone_dump.DumpTableStats):
+        task = stats.task
+        self._running_tables.pop(task.source, None)
+        self._tables_done += 1
+        if stats.error:
+            self._append_log(_t("clone.log.error", source=task.source, error=stats.error))
+        else:
+            self._rows_done += stats.rows
+            self._append_log(
+                _t(
+                    "clone.log.dump_table",
+                    source=task.source,
+                    rows=stats.rows,
+                    seconds=stats.elapsed,
+                    rate=stats.rows_per_sec,
+                    mb_rate=stats.mb_per_sec,
+                )
+            )
+        self._refresh_progress()
+
+    def _cancel_export(self):
+        if not (self._export_thread and self._export_thread.is_alive()):
+            return
+        self._cancel_event.set()
+        self.btn_cancel.configure(state="disabled")
+        self._append_log(_t("clone.log.cancelling"))
+
+    def _post(self, callback: Callable[..., Any], *args: Any) -> None:
+        """Đẩy cập nhật từ luồng worker về luồng Tk; bỏ qua nếu cửa sổ đã đóng."""
+        try:
+            self.after(0, lambda: callback(*args))
+        except (tk.TclError, RuntimeError):
+            pass
+
+    def _log_async(self, text: str) -> None:
+        self._post(self._append_log, text)
+
+    def _run_export_thread(
+        self,
+        tasks: List[clone_engine.CloneTask],
+        options: clone_engine.CloneOptions,
+        checkpoint: Optional[clone_engine.CloneCheckpoint] = None,
+        fk_closure: bool = False,
+    ):
+        action_id = history.log_action(ACTION_TYPE, ",".join(t.source for t in tasks), 0, "pending")
+        started = time.monotonic()
+        if fk_closure:
+            tasks = self._apply_fk_closure(tasks)
+            if checkpoint is not None:
+                checkpoint.set_tasks(tasks)
+        # Phiên nguồn của cửa sổ đang rảnh trong lúc export -> dùng để đọc thống kê xếp lịch
+        tasks = clone_engine.schedule_largest_first(self._source_conn, tasks)
+        self._log_async(_t("clone.log.schedule", count=len(tasks), workers=options.workers))
+        runner = clone_engine.CloneRunner(
+            self._source_env,
+            self._target_env,
+            tasks,
+            options,
+            checkpoint=checkpoint,
+            cancel_event=self._cancel_event,
+            on_table_start=lambda task: self._post(self._on_table_start, task),
+            on_table_progress=lambda task, rows: self._post(self._on_table_progress, task, rows),
+            on_table_done=lambda result: self._post(self._on_table_done, result),
+            on_log=self._log_async,
+        )
+        results = runner.run()
+        total_rows = sum(r.rows for r in results if not r.error and not r.cancelled)
+        failures = sum(1 for r in results if r.error)
+        cancelled = any(r.cancelled for r in results)
+        if checkpoint is not None:
+            if failures or cancelled:
+                self._log_async(_t("clone.log.checkpoint_saved", path=checkpoint.path))
+            else:
+                checkpoint.remove()
+        status = "cancelled" if cancelled else ("success" if failures == 0 else "failed")
+        elapsed = time.monotonic() - started
         message = _t("clone.log.summary", total=len(tasks), failed=failures)
+        message += " " + _t(
+            "clone.log.run_rate",
+            rows=total_rows,
+            seconds=elapsed,
+            rate=total_rows / elapsed if elapsed > 0 else 0.0,
+        )
+        delta_results = [r for r in results if r.delta is not None]
+        if delta_results:
+            message += " " + _t(
+                "clone.log.delta_summary",
+                changed=sum(r.delta["changed"] for r in delta_results),
+                ranges=sum(r.delta["ranges"] for r in delta_results),
+                tables=len(delta_results),
+            )
+        if runner.constraint_violations:
+            message += " " + _t("clone.log.fk_violations", count=len(runner.constraint_violations))
+        # Báo cáo chi tiết (JSON) để tra lại trong History khi chỉnh số luồng/batch
+        report = clone_engine.build_run_report(
+            results,
+            options,
+            elapsed,
+            source=self._source_conn_key,
+            target=self._target_conn_key,
+            status=status,
+            fk_violations=runner.constraint_violations,
+        )
         if action_id:
-            history.mark_action_status(action_id, status, message, row_count=total_rows)
-        self.after(0, lambda: self._finish_export(message))
+            history.mark_action_status(
+                action_id,
+                status,
+                message,
+                row_count=total_rows,
+                sql_text=json.dumps(report, ensure_ascii=False, indent=1),
+            )
+        self._post(self._finish_export, message)
+
+    def _on_table_start(self, task: clone_engine.CloneTask):
+        self._running_tables[task.source] = 0.0
+        self._table_started[task.source] = time.monotonic()
+        self._append_log(_t("clone.log.table_start", source=task.source, target=task.target))
+        self._refresh_progress()
+
+    def _on_table_progress(self, task: clone_engine.CloneTask, rows: int):
+        if task.est_rows:
+            self._running_tables[task.source] = min(0.99, rows / task.est_rows)
+        elapsed = time.monotonic() - self._table_started.get(task.source, time.monotonic())
+        rate = rows / elapsed if elapsed > 0 else 0.0
+        self._refresh_progress(current=_t("clone.progress.table_rate", source=task.source, rows=rows, rate=rate))
+
+    def _on_table_done(self, result: clone_engine.TableResult):
+        task = result.task
+        self._running_tables.pop(task.source, None)
+        self._tables_done += 1
+        if result.skipped:
+            self._append_log(_t("clone.log.skipped_done", source=task.source, rows=result.resumed_rows))
+        elif result.error:
+            self._append_log(_t("clone.log.error", source=task.source, error=result.error))
+        elif result.cancelled:
+            self._append_log(_t("clone.log.cancelled", source=task.source))
+        elif result.delta is not None:
+            self._rows_done += result.rows
+            self._append_log(
+                _t(
+                    "clone.log.delta_synced",
+                    source=task.source,
+                    changed=result.delta["changed"],
+                    ranges=result.delta["ranges"],
+                    rows=result.rows,
+                )
+            )
+        else:
+            self._rows_done += result.rows
+            self._append_log(_t("clone.log.copied", source=task.source, target=task.target, rows=result.rows))
+        self._table_started.pop(task.source, None)
+        if not result.skipped and result.stats.batches:
+            stats = result.stats
+            self._append_log(
+                _t(
+                    "clone.log.table_stats",
+                    source=task.source,
+                    seconds=result.elapsed,
+                    rate=result.rows_per_sec,
+                    mb_rate=result.bytes_per_sec / 1_048_576,
+                    fetch=stats.fetch_seconds,
+                    insert=stats.insert_seconds,
+                    wait=stats.wait_seconds,
+                    batches=stats.batches,
+                    batch_size=stats.batch_size,
+                )
+            )
+        self._refresh_progress()
 
-    def _update_progress(self, value: int, total: int):
+    def _refresh_progress(self, current: str = ""):
+        total = max(1, self._tables_total)
+        value = self._tables_done + sum(self._running_tables.values())
         self.progress.configure(value=value, maximum=total)
-        self.lbl_progress.configure(text=f"{value}/{total}")
+        text = f"{self._tables_done}/{self._tables_total}"
+        if current:
+            text = f"{text} - {current}"
+        self.lbl_progress.configure(text=text)
 
     def _finish_export(self, message: str):
         self.progress.configure(value=self.progress["maximum"])
         self.lbl_progress.configure(text=message)
-        self.btn_export.configure(state="normal")
+        self.btn_cancel.configure(state="disabled")
+        self._export_thread = None
+        self._update_export_button_state()
         messagebox.showinfo(_t(APP_TITLE_KEY), message, parent=self)
 
-    def _copy_table(self, mapping: Dict[str, str]) -> int:
-        if not self._source_conn or not self._target_conn:
-            return 0
-        source_owner, source_table = db_utils.split_owner_table(mapping["source"], self._source_owner)
-        target_owner, target_table = db_utils.split_owner_table(mapping["target"], self._target_owner)
-        columns = db_utils.fetch_table_columns(self._source_conn, mapping["source"], self._source_owner)
-        column_names = [c["column_name"] for c in columns]
-        if not column_names:
-            raise RuntimeError(_t("clone.msg.no_columns", table=mapping["source"]))
-        col_expr = ", ".join(column_names)
-        select_sql = f"SELECT {col_expr} FROM {source_owner}.{source_table}"
-        placeholders = ", ".join(f":{idx+1}" for idx in range(len(column_names)))
-        insert_sql = f"INSERT INTO {target_owner}.{target_table} ({col_expr}) VALUES ({placeholders})"
-        row_count = 0
-        src_cur = self._source_conn.cursor()
-        dst_cur = self._target_conn.cursor()
-        try:
-            if self.var_truncate.get():
-                try:
-                    dst_cur.execute(f"TRUNCATE TABLE {target_owner}.{target_table}")
-                except Exception:
-                    dst_cur.execute(f"DELETE FROM {target_owner}.{target_table}")
-            src_cur.execute(select_sql)
-            while True:
-                rows = src_cur.fetchmany(self.BATCH_SIZE)
-                if not rows:
-                    break
-                dst_cur.executemany(insert_sql, rows)
-                row_count += len(rows)
-            self._target_conn.commit()
-        except Exception:
-            self._target_conn.rollback()
-            raise
-        finally:
-            try:
-                src_cur.close()
-            except Exception:
-                pass
-            try:
-                dst_cur.close()
-            except Exception:
-                pass
-        return row_count
-
     # ------------------------------------------------------------------
     def _append_log(self, text: str):
         self.txt_log.insert(tk.END, text.strip() + "\n")
@@ -732,17 +1188,21 @@ class CloneDbWindow(tk.Toplevel):
                 frame.configure(text=_t(title_key))
         self.tree_mappings.heading("source", text=_t("clone.column.source"))
         self.tree_mappings.heading("target", text=_t("clone.column.target"))
+        self.tree_mappings.heading("filter", text=_t("clone.column.filter"))
 
     def _on_close(self):
         self._cancel_event.set()
+        if self._source_catalog_info:
+            db_utils.stop_catalog_refresh(self._source_catalog_info)
+            self._source_catalog_info = None
         if self._source_conn:
             try:
-                self._source_conn.close()
+                db_utils.release_connection(self._source_conn)
             except Exception:
                 pass
         if self._target_conn:
             try:
-                self._target_conn.close()
+                db_utils.release_connection(self._target_conn)
             except Exception:
                 pass
         i18n.remove_listener(self._lang_listener)
@@ -0,0 +1,353 @@
+"""
+Dump nén cho Clone DB khi nguồn và đích không kết nối được từ cùng một máy/phiên:
+export các bảng đã chọn ra một tệp gzip JSON Lines, mang tệp sang phía đích rồi import.
+
+Cấu trúc tệp (mỗi dòng một bản ghi JSON):
+    {"type": "header", "format": ..., "version": ..., "created": ..., "source": ..., "tables": [...]}
+    {"type": "table", "task": {...CloneTask}, "columns": [...], "codecs": [...]}
+    {"type": "rows", "rows": [[...], ...]}          # một batch, kích thước do BatchSizer chọn
+    {"type": "end", "rows": n, "error": null}
+    ...
+    {"type": "footer", "tables": n, "rows": n}
+Giá trị được mã hóa theo kiểu cột (codecs) để import lại đúng kiểu: NUMBER dạng Decimal
+ghi thành chuỗi, DATE/TIMESTAMP dạng ISO, RAW/BLOB dạng base64.
+Cả hai chiều chỉ giữ một batch trong bộ nhớ.
+"""
+from __future__ import annotations
+
+import base64
+import contextlib
+import datetime as _dt
+import decimal
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from screen.DB import clone_engine, db_utils
+from screen.DB.clone_engine import CloneCancelled, CloneTask
+
+logger = logging.getLogger("ToolVIP.CloneDump")
+
+DUMP_FORMAT = "toolvip-clone-dump"
+DUMP_VERSION = 1
+DUMP_EXTENSION = ".tvdump.gz"
+DUMP_COMPRESS_LEVEL = 6
+PROGRESS_INTERVAL = clone_engine.PROGRESS_INTERVAL
+
+TableCallback = Callable[["DumpTableStats"], None]
+ProgressCallback = Callable[[CloneTask, int], None]
+
+
+@dataclass
+class DumpTableStats:
+    """Kết quả export/import một bảng; raw_bytes là dung lượng JSON trước khi nén."""
+
+    task: CloneTask
+    rows: int = 0
+    raw_bytes: int = 0
+    elapsed: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def mb_per_sec(self) -> float:
+        return self.raw_bytes / 1_048_576 / self.elapsed if self.elapsed > 0 else 0.0
+
+
+@dataclass
+class DumpInfo:
+    path: str
+    created: str
+    source: str
+    tasks: List[CloneTask] = field(default_factory=list)
+
+
+def _codec_kind(data_type: str) -> str:
+    data_type = str(data_type or "").upper()
+    if data_type in ("NUMBER", "FLOAT", "INTEGER", "BINARY_FLOAT", "BINARY_DOUBLE"):
+        return "number"
+    if data_type == "DATE" or data_type.startswith("TIMESTAMP"):
+        return "datetime"
+    if data_type in ("RAW", "LONG RAW", "BLOB"):
+        return "binary"
+    if data_type.startswith("INTERVAL DAY"):
+        return "interval"
+    return "text"
+
+
+def _encode_value(kind: str, value: Any) -> Any:
+    if value is None:
+        return None
+    if hasattr(value, "read"):
+        value = value.read()
+    if kind == "number":
+        return str(value) if isinstance(value, decimal.Decimal) else value
+    if kind == "datetime":
+        return value.isoformat() if isinstance(value, (_dt.date, _dt.datetime)) else str(value)
+    if kind == "binary":
+        return base64.b64encode(bytes(value)).decode("ascii")
+    if kind == "interval":
+        return value.total_seconds() if isinstance(value, _dt.timedelta) else str(value)
+    return value if isinstance(value, str) else str(value)
+
+
+def _decode_value(kind: str, value: Any) -> Any:
+    if value is None:
+        return None
+    if kind == "number":
+        return decimal.Decimal(value) if isinstance(value, str) else value
+    if kind == "datetime":
+        return _dt.datetime.fromisoformat(value)
+    if kind == "binary":
+        return base64.b64decode(value)
+    if kind == "interval":
+        return _dt.timedelta(seconds=value) if isinstance(value, (int, float)) else value
+    return value
+
+
+def _write_record(out, record: Dict[str, Any]) -> int:
+    data = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+    out.write(data)
+    return len(data)
+
+
+def _check_cancel(cancel_event: Optional[threading.Event]) -> None:
+    if cancel_event is not None and cancel_event.is_set():
+        raise CloneCancelled()
+
+
+def _export_table(
+    conn,
+    out,
+    task: CloneTask,
+    options: clone_engine.CloneOptions,
+    cancel_event: Optional[threading.Event],
+    progress: Optional[ProgressCallback],
+) -> DumpTableStats:
+    stats = DumpTableStats(task)
+    started = time.monotonic()
+    columns = db_utils.fetch_table_columns(conn, task.source, task.source_owner)
+    kinds = [_codec_kind(c["data_type"]) for c in columns]
+    stats.raw_bytes += _write_record(
+        out, {"type": "table", "task": asdict(task), "columns": columns, "codecs": kinds}
+    )
+    sizer = clone_engine.BatchSizer(
+        columns,
+        avg_row_len=task.avg_row_len,
+        target_bytes=options.target_batch_bytes,
+        max_bytes=options.max_batch_bytes,
+        fixed_size=options.batch_size,
+    )
+    error: Optional[str] = None
+    last_report = 0.0
+    try:
+        if not columns:
+            raise RuntimeError(f"{task.source}: no columns")
+        with contextlib.closing(conn.cursor()) as cur:
+            cur.arraysize = sizer.batch_size
+            with contextlib.suppress(Exception):
+                cur.prefetchrows = sizer.prefetch_rows
+            col_expr = ", ".join(c["column_name"] for c in columns)
+            select_sql = f"SELECT {col_expr} FROM {task.from_clause}"
+            if task.where:
+                select_sql += f" WHERE {task.where}"
+            cur.execute(select_sql)
+            while True:
+                _check_cancel(cancel_event)
+                rows = cur.fetchmany(sizer.batch_size)
+                if not rows:
+                    break
+                encoded = [[_encode_value(k, v) for k, v in zip(kinds, row)] for row in rows]
+                size = _write_record(out, {"type": "rows", "rows": encoded})
+                stats.raw_bytes += size
+                stats.rows += len(rows)
+                cur.arraysize = sizer.observe(len(rows), size)
+                now = time.monotonic()
+                if progress is not None and now - last_report >= PROGRESS_INTERVAL:
+                    last_report = now
+                    progress(task, stats.rows)
+    except CloneCancelled:
+        raise
+    except Exception as exc:
+        # Ghi lại lỗi vào dump để phía import bỏ qua bảng dở dang
+        logger.exception("Dump export of %s failed", task.source)
+        error = str(exc)
+    stats.raw_bytes += _write_record(out, {"type": "end", "rows": stats.rows, "error": error})
+    stats.error = error
+    stats.elapsed = time.monotonic() - started
+    return stats
+
+
+def export_dump(
+    conn,
+    tasks: Sequence[CloneTask],
+    path: str,
+    *,
+    source_key: str = "",
+    options: Optional[clone_engine.CloneOptions] = None,
+    cancel_event: Optional[threading.Event] = None,
+    progress: Optional[ProgressCallback] = None,
+    on_table_done: Optional[TableCallback] = None,
+) -> List[DumpTableStats]:
+    """
+    Ghi các bảng nguồn ra tệp dump (ghi vào path.part rồi đổi tên khi xong).
+    Bảng lỗi vẫn được ghi bản ghi end kèm lỗi; hủy thì xóa tệp dở và raise CloneCancelled.
+    """
+    options = options or clone_engine.CloneOptions()
+    results: List[DumpTableStats] = []
+    part_path = path + ".part"
+    try:
+        with open(part_path, "wb") as raw, gzip.GzipFile(
+            fileobj=raw, mode="wb", compresslevel=DUMP_COMPRESS_LEVEL
+        ) as out:
+            _write_record(
+                out,
+                {
+                    "type": "header",
+                    "format": DUMP_FORMAT,
+                    "version": DUMP_VERSION,
+                    "created": _dt.datetime.now().isoformat(timespec="seconds"),
+                    "source": source_key,
+                    "tables": [asdict(task) for task in tasks],
+                },
+            )
+            for task in tasks:
+                _check_cancel(cancel_event)
+                stats = _export_table(conn, out, task, options, cancel_event, progress)
+                results.append(stats)
+                if on_table_done is not None:
+                    on_table_done(stats)
+            _write_record(
+                out,
+                {"type": "footer", "tables": len(results), "rows": sum(s.rows for s in results)},
+            )
+        os.replace(part_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(part_path)
+        raise
+    return results
+
+
+def _iter_records(path: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """(số byte chưa nén, bản ghi) từng dòng của dump."""
+    with gzip.open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                yield len(line), json.loads(line)
+
+
+def read_dump_info(path: str) -> DumpInfo:
+    """Chỉ đọc bản ghi header (không giải nén phần dữ liệu)."""
+    _, header = next(_iter_records(path), (0, None))
+    if not header or header.get("type") != "header" or header.get("format") != DUMP_FORMAT:
+        raise ValueError(f"{os.path.basename(path)} is not a clone dump")
+    if header.get("version") != DUMP_VERSION:
+        raise ValueError(f"Unsupported dump version: {header.get('version')}")
+    tasks = [CloneTask(**item) for item in header.get("tables", [])]
+    return DumpInfo(path, str(header.get("created", "")), str(header.get("source", "")), tasks)
+
+
+def import_dump(
+    conn,
+    path: str,
+    target_owner: str,
+    *,
+    truncate: bool = True,
+    cancel_event: Optional[threading.Event] = None,
+    progress: Optional[ProgressCallback] = None,
+    on_table_done: Optional[TableCallback] = None,
+) -> List[DumpTableStats]:
+    """
+    Đọc dump theo luồng và insert từng batch bằng array bind (executemany) vào bảng
+    cùng tên thuộc target_owner. Mỗi bảng commit khi xong, rollback khi lỗi; bảng
+    export lỗi (end có error) cũng bị rollback. Hủy thì rollback bảng đang chạy và
+    raise CloneCancelled.
+    """
+    read_dump_info(path)
+    results: List[DumpTableStats] = []
+    stats: Optional[DumpTableStats] = None
+    kinds: List[str] = []
+    insert_sql = ""
+    started = 0.0
+    last_report = 0.0
+    failed = False
+    with contextlib.closing(conn.cursor()) as cur:
+        try:
+            for size, record in _iter_records(path):
+                _check_cancel(cancel_event)
+                kind = record.get("type")
+                if stats is not None:
+                    stats.raw_bytes += size
+                if kind == "table":
+                    source = CloneTask(**record["task"])
+                    task = CloneTask(
+                        source.source_owner,
+                        source.source_table,
+                        target_owner,
+                        source.target_table,
+                        source.est_rows,
+                        source.est_bytes,
+                    )
+                    stats = DumpTableStats(task, raw_bytes=size)
+                    started = time.monotonic()
+                    kinds = list(record.get("codecs", []))
+                    names = [c["column_name"] for c in record.get("columns", [])]
+                    placeholders = ", ".join(f":{idx + 1}" for idx in range(len(names)))
+                    insert_sql = f"INSERT INTO {task.target} ({', '.join(names)}) VALUES ({placeholders})"
+                    failed = False
+                    try:
+                        if truncate:
+                            clone_engine.truncate_target(conn, task.target)
+                    except Exception as exc:
+                        stats.error, failed = str(exc), True
+                elif kind == "rows" and stats is not None and not failed:
+                    rows = [[_decode_value(k, v) for k, v in zip(kinds, row)] for row in record["rows"]]
+                    try:
+                        cur.executemany(insert_sql, rows)
+                    except Exception as exc:
+                        logger.warning("Dump import into %s failed: %s", stats.task.target, exc)
+                        stats.error, failed = str(exc), True
+                        with contextlib.suppress(Exception):
+                            conn.rollback()
+                        continue
+                    stats.rows += len(rows)
+                    now = time.monotonic()
+                    if progress is not None and now - last_report >= PROGRESS_INTERVAL:
+                        last_report = now
+                        progress(stats.task, stats.rows)
+                elif kind == "end" and stats is not None:
+                    if record.get("error") and not stats.error:
+                        stats.error = f"export: {record['error']}"
+                    if stats.error:
+                        with contextlib.suppress(Exception):
+                            conn.rollback()
+                    else:
+                        conn.commit()
+                    stats.elapsed = time.monotonic() - started
+                    results.append(stats)
+                    if on_table_done is not None:
+                        on_table_done(stats)
+                    stats = None
+        except BaseException:
+            with contextlib.suppress(Exception):
+                conn.rollback()
+            raise
+    if stats is not None:
+        # Tệp bị cắt giữa chừng (không có bản ghi end)
+        with contextlib.suppress(Exception):
+            conn.rollback()
+        stats.error = stats.error or "dump is truncated"
+        stats.elapsed = time.monotonic() - started
+        results.append(stats)
+        if on_table_done is not None:
+            on_table_done(stats)
+    return results
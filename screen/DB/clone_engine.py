@@ -0,0 +1,1789 @@
+"""
+Engine clone dữ liệu giữa hai môi trường Oracle cho màn hình Clone DB.
+
+Không phụ thuộc Tk: các callback được gọi từ luồng worker, màn hình tự đẩy
+về luồng giao diện.
+"""
+from __future__ import annotations
+
+import contextlib
+import datetime as _dt
+import decimal
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from screen.DB import db_utils
+
+logger = logging.getLogger("ToolVIP.Clone")
+
+BATCH_SIZE = 500
+MIN_BATCH_SIZE = 50
+MAX_BATCH_SIZE = 50000
+# Dung lượng mong muốn cho mỗi round trip và giới hạn cứng của một batch
+TARGET_BATCH_BYTES = 2 * 1024 * 1024
+MAX_BATCH_BYTES = 16 * 1024 * 1024
+DEFAULT_WORKERS = 3
+MAX_WORKERS = 16
+# Session dư trong pool ngoài phần worker giữ, để màn hình khác vẫn mượn được
+POOL_SPARE_SESSIONS = 2
+PROGRESS_INTERVAL = 0.2
+# Bảng có ít nhất số dòng này (theo thống kê) được chia range để nhiều worker cùng copy
+SPLIT_MIN_ROWS = 1_000_000
+# Delta: mỗi khoảng so sánh hash khoảng bấy nhiêu dòng (số khoảng tối đa DELTA_MAX_RANGES)
+DELTA_RANGE_ROWS = 50_000
+DELTA_MAX_RANGES = 500
+DELTA_LOB_PREFIX = 900
+# Số cột nối vào một ORA_HASH (mỗi hash cột tối đa 11 ký tự + dấu phân cách)
+ROW_HASH_GROUP = 250
+# Khi có checkpoint: commit sau mỗi bấy nhiêu batch và ghi lại vị trí khóa đã copy
+CHECKPOINT_COMMIT_BATCHES = 20
+CHECKPOINT_VERSION = 1
+# SAMPLE dùng SEED cố định để câu SELECT copy và các subquery theo FK chọn cùng một tập dòng
+SAMPLE_SEED = 1
+# Số lần tối đa điều kiện của một bảng được mở rộng khi đi theo FK (chặn vòng tham chiếu)
+FK_CLOSURE_MAX_UPDATES = 8
+# Tổng dung lượng ước lượng của các batch đã fetch nhưng chưa insert (mỗi bảng)
+QUEUE_MAX_BYTES = 32 * 1024 * 1024
+# CLOB/NCLOB/BLOB không quá LOB_INLINE_LIMIT ký tự/byte được fetch thẳng thành str/bytes;
+# lớn hơn thì đọc từng đoạn LOB_STREAM_CHUNK và ghi vào LOB tạm của phiên đích
+LOB_INLINE_LIMIT = 64 * 1024
+LOB_STREAM_CHUNK = 1024 * 1024
+
+CloneCancelled = db_utils.OperationCancelled
+
+
+@dataclass
+class CloneTask:
+    """
+    Một cặp bảng nguồn -> đích (owner đã được tách sẵn).
+    where: điều kiện lọc dòng nguồn (SQL, không có từ khóa WHERE); sample: % dòng lấy mẫu.
+    """
+
+    source_owner: str
+    source_table: str
+    target_owner: str
+    target_table: str
+    est_rows: Optional[int] = None
+    est_bytes: Optional[int] = None
+    where: Optional[str] = None
+    sample: Optional[float] = None
+
+    @property
+    def avg_row_len(self) -> Optional[int]:
+        if not self.est_rows or not self.est_bytes:
+            return None
+        return max(1, self.est_bytes // self.est_rows)
+
+    @property
+    def source(self) -> str:
+        return f"{self.source_owner}.{self.source_table}"
+
+    @property
+    def target(self) -> str:
+        return f"{self.target_owner}.{self.target_table}"
+
+    @property
+    def filtered(self) -> bool:
+        return bool(self.where or self.sample)
+
+    @property
+    def from_clause(self) -> str:
+        if self.sample:
+            return f"{self.source} SAMPLE ({self.sample:g}) SEED ({SAMPLE_SEED})"
+        return self.source
+
+
+@dataclass
+class CopyStats:
+    """
+    Số đo của một lần copy (một bảng hoặc một khoảng) để tinh chỉnh số luồng/batch.
+    fetch_seconds: execute + fetch ở nguồn (luồng producer); insert_seconds: executemany
+    + commit ở đích; wait_seconds: luồng insert chờ batch (lớn -> nguồn là nút cổ chai).
+    data_bytes là dung lượng ước lượng (estimate_rows_bytes). Bảng chia khoảng cộng dồn
+    số giây của các khoảng chạy song song.
+    """
+
+    rows: int = 0
+    data_bytes: int = 0
+    batches: int = 0
+    fetch_seconds: float = 0.0
+    insert_seconds: float = 0.0
+    wait_seconds: float = 0.0
+    batch_size: int = 0
+    queue_peak_bytes: int = 0
+
+    def merge(self, other: "CopyStats") -> None:
+        self.rows += other.rows
+        self.data_bytes += other.data_bytes
+        self.batches += other.batches
+        self.fetch_seconds += other.fetch_seconds
+        self.insert_seconds += other.insert_seconds
+        self.wait_seconds += other.wait_seconds
+        self.batch_size = max(self.batch_size, other.batch_size)
+        self.queue_peak_bytes = max(self.queue_peak_bytes, other.queue_peak_bytes)
+
+
+@dataclass
+class TableResult:
+    task: CloneTask
+    rows: int = 0
+    elapsed: float = 0.0
+    error: Optional[str] = None
+    cancelled: bool = False
+    # Chạy tiếp từ checkpoint: số dòng đã copy ở lần trước / bảng đã xong từ trước
+    resumed_rows: int = 0
+    skipped: bool = False
+    # Chế độ delta: {"ranges": tổng số khoảng, "changed": số khoảng khác và đã đồng bộ lại}
+    delta: Optional[Dict[str, int]] = None
+    stats: CopyStats = field(default_factory=CopyStats)
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def bytes_per_sec(self) -> float:
+        return self.stats.data_bytes / self.elapsed if self.elapsed > 0 else 0.0
+
+    def report(self) -> Dict[str, Any]:
+        """Một dòng của báo cáo chạy (build_run_report)."""
+        stats = self.stats
+        return {
+            "source": self.task.source,
+            "target": self.task.target,
+            "status": "skipped" if self.skipped else ("error" if self.error else ("cancelled" if self.cancelled else "ok")),
+            "rows": self.rows,
+            "resumed_rows": self.resumed_rows,
+            "elapsed": round(self.elapsed, 3),
+            "rows_per_sec": round(self.rows_per_sec, 1),
+            "bytes": stats.data_bytes,
+            "bytes_per_sec": round(self.bytes_per_sec, 1),
+            "fetch_seconds": round(stats.fetch_seconds, 3),
+            "insert_seconds": round(stats.insert_seconds, 3),
+            "wait_seconds": round(stats.wait_seconds, 3),
+            "batches": stats.batches,
+            "batch_size": stats.batch_size,
+            "queue_peak_bytes": stats.queue_peak_bytes,
+            "delta": self.delta,
+            "error": self.error,
+        }
+
+
+@dataclass
+class CloneOptions:
+    truncate: bool = True
+    workers: int = DEFAULT_WORKERS
+    # None = tự tính theo độ rộng dòng (BatchSizer); đặt số cụ thể để cố định
+    batch_size: Optional[int] = None
+    target_batch_bytes: int = TARGET_BATCH_BYTES
+    max_batch_bytes: int = MAX_BATCH_BYTES
+    queue_bytes: int = QUEUE_MAX_BYTES
+    split_large: bool = True
+    split_min_rows: int = SPLIT_MIN_ROWS
+    # None = bằng số worker
+    split_parts: Optional[int] = None
+    commit_batches: int = CHECKPOINT_COMMIT_BATCHES
+    # So sánh hash theo khoảng PK và chỉ copy lại khoảng khác (bỏ qua truncate)
+    delta: bool = False
+
+
+def build_tasks(mappings: Sequence[Dict[str, Any]], source_owner: str, target_owner: str) -> List[CloneTask]:
+    tasks = []
+    for mapping in mappings:
+        s_owner, s_table = db_utils.split_owner_table(mapping["source"], source_owner)
+        t_owner, t_table = db_utils.split_owner_table(mapping["target"], target_owner)
+        where = str(mapping.get("where") or "").strip() or None
+        tasks.append(CloneTask(s_owner, s_table, t_owner, t_table, where=where, sample=mapping.get("sample") or None))
+    return tasks
+
+
+def _fk_child_condition(fk: db_utils.ForeignKey, parent: CloneTask) -> str:
+    """Dòng con có FK rỗng hoặc trỏ tới dòng cha được chọn."""
+    cols = ", ".join(fk.columns)
+    subquery = f"SELECT {', '.join(fk.ref_columns)} FROM {parent.from_clause}"
+    if parent.where:
+        subquery += f" WHERE {parent.where}"
+    nulls = " OR ".join(f"{col} IS NULL" for col in fk.columns)
+    return f"{nulls} OR ({cols}) IN ({subquery})"
+
+
+def _fk_parent_condition(fk: db_utils.ForeignKey, child: CloneTask) -> str:
+    """Dòng cha được ít nhất một dòng con đã chọn tham chiếu tới."""
+    not_null = " AND ".join(f"{col} IS NOT NULL" for col in fk.columns)
+    subquery = f"SELECT {', '.join(fk.columns)} FROM {child.from_clause} WHERE {not_null}"
+    if child.where:
+        subquery += f" AND ({child.where})"
+    return f"({', '.join(fk.ref_columns)}) IN ({subquery})"
+
+
+def _sample_as_where(task: CloneTask) -> Optional[str]:
+    """Đưa SAMPLE vào điều kiện (ROWID IN ...) để có thể OR/mở rộng thêm dòng."""
+    where = task.where
+    if task.sample:
+        where = f"ROWID IN (SELECT ROWID FROM {task.from_clause}" + (f" WHERE {where})" if where else ")")
+        task.sample = None
+    return where
+
+
+def _with_ancestors(task: CloneTask, where: Optional[str], self_keys: Sequence[db_utils.ForeignKey]) -> Optional[str]:
+    """Thêm các dòng tổ tiên theo FK tự tham chiếu, để dòng đã chọn không trỏ tới dòng cha bị bỏ."""
+    if not where or not self_keys:
+        return where
+    prior = " OR ".join(
+        "(" + " AND ".join(f"{ref} = PRIOR {col}" for col, ref in zip(fk.columns, fk.ref_columns)) + ")"
+        for fk in self_keys
+    )
+    return f"ROWID IN (SELECT ROWID FROM {task.source} START WITH ({where}) CONNECT BY NOCYCLE {prior})"
+
+
+def apply_fk_closure(conn, tasks: Sequence[CloneTask], target_owner: str) -> Tuple[List[CloneTask], List[str]]:
+    """
+    Mở rộng tập con theo khóa ngoại khi có bảng lọc WHERE/SAMPLE:
+    - bảng con trong danh sách (không lọc) chỉ lấy dòng trỏ tới dòng cha đã chọn;
+    - bảng cha lấy thêm các dòng mà dòng con đã chọn tham chiếu tới (bảng cha chưa có
+      trong danh sách được thêm vào, đích cùng tên trong target_owner), lặp tới khi ổn định;
+    - bảng có FK tự tham chiếu lấy thêm các dòng tổ tiên (CONNECT BY).
+    Trả về (danh sách bảng, ghi chú để log).
+    """
+    tasks = list(tasks)
+    if not any(t.filtered for t in tasks):
+        return tasks, []
+    by_source = {t.source: t for t in tasks}
+    notes: List[str] = []
+    fk_cache: Dict[str, List[db_utils.ForeignKey]] = {}
+
+    def all_keys(task: CloneTask) -> List[db_utils.ForeignKey]:
+        if task.source not in fk_cache:
+            fk_cache[task.source] = db_utils.fetch_foreign_keys(conn, task.source, task.source_owner)
+        return fk_cache[task.source]
+
+    def foreign_keys(task: CloneTask) -> List[db_utils.ForeignKey]:
+        return [fk for fk in all_keys(task) if fk.ref_source != task.source]
+
+    def self_keys(task: CloneTask) -> List[db_utils.ForeignKey]:
+        return [fk for fk in all_keys(task) if fk.ref_source == task.source]
+
+    def restrict(task: CloneTask, where: Optional[str]) -> None:
+        task.where = _with_ancestors(task, where, self_keys(task))
+
+    restricted = {t.source for t in tasks if t.filtered}
+    for task in tasks:
+        if task.filtered and self_keys(task):
+            restrict(task, _sample_as_where(task))
+            notes.append(f"{task.source}: ancestor rows via {', '.join(fk.name for fk in self_keys(task))}")
+    # 1. Bảng con trong danh sách đi theo bảng cha đã lọc
+    children: Dict[str, List[Tuple[CloneTask, db_utils.ForeignKey]]] = {}
+    for task in tasks:
+        for fk in foreign_keys(task):
+            children.setdefault(fk.ref_source, []).append((task, fk))
+    # FK đã dùng để lọc bảng con: dòng con chỉ trỏ tới dòng cha đã chọn, không cần mở rộng ngược
+    followed: set = set()
+    pending = deque(t.source for t in tasks if t.filtered)
+    while pending:
+        parent = by_source[pending.popleft()]
+        for child, fk in children.get(parent.source, []):
+            if child.source in restricted:
+                continue
+            restrict(child, _fk_child_condition(fk, parent))
+            if not self_keys(child):
+                # Tổ tiên thêm theo FK tự tham chiếu có thể trỏ tới dòng cha khác -> vẫn phải mở rộng ngược
+                followed.add((child.source, fk.name))
+            restricted.add(child.source)
+            notes.append(f"{child.source}: rows referencing {parent.source} ({fk.name})")
+            pending.append(child.source)
+
+    # 2. Bảng cha lấy đủ dòng được tham chiếu (điểm bất động, có giới hạn số lần mở rộng)
+    base_where: Dict[str, Optional[str]] = {}
+    contributions: Dict[str, Dict[Tuple[str, str], str]] = {}
+    updates: Dict[str, int] = {}
+    pending = deque(sorted(restricted))
+    while pending:
+        child = by_source[pending.popleft()]
+        for fk in foreign_keys(child):
+            if (child.source, fk.name) in followed:
+                continue
+            parent = by_source.get(fk.ref_source)
+            if parent is None:
+                parent = CloneTask(fk.ref_owner, fk.ref_table, target_owner, fk.ref_table)
+                by_source[parent.source] = parent
+                tasks.append(parent)
+                restricted.add(parent.source)
+                base_where[parent.source] = None
+                notes.append(f"{parent.source}: added as parent of {child.source} ({fk.name})")
+            elif parent.source not in restricted:
+                continue
+            condition = _fk_parent_condition(fk, child)
+            parts = contributions.setdefault(parent.source, {})
+            if parts.get((child.source, fk.name)) == condition:
+                continue
+            if updates.get(parent.source, 0) >= FK_CLOSURE_MAX_UPDATES:
+                notes.append(f"{parent.source}: FK closure stopped after {FK_CLOSURE_MAX_UPDATES} expansions")
+                continue
+            updates[parent.source] = updates.get(parent.source, 0) + 1
+            if parent.source not in base_where:
+                base_where[parent.source] = _sample_as_where(parent)
+            parts[(child.source, fk.name)] = condition
+            restrict(parent, " OR ".join(f"({c})" for c in [base_where[parent.source], *parts.values()] if c))
+            pending.append(parent.source)
+    return tasks, notes
+
+
+def schedule_largest_first(conn, tasks: List[CloneTask]) -> List[CloneTask]:
+    """
+    Gắn ước lượng dung lượng từ thống kê optimizer và xếp bảng lớn chạy trước,
+    để bảng lớn nhất không bị dồn về cuối khi các worker khác đã rảnh.
+    Bảng chưa có thống kê xếp sau cùng.
+    """
+    try:
+        stats = db_utils.fetch_table_stats(conn, [(t.source_owner, t.source_table) for t in tasks])
+    except Exception as exc:
+        logger.warning("Cannot read table statistics for clone scheduling: %s", exc)
+        return list(tasks)
+    for task in tasks:
+        info = stats.get((task.source_owner.upper(), task.source_table.upper()))
+        if info is not None:
+            task.est_rows = info.num_rows
+            task.est_bytes = info.est_bytes
+            if task.sample and info.num_rows is not None:
+                task.est_rows = int(info.num_rows * task.sample / 100)
+                task.est_bytes = int((info.est_bytes or 0) * task.sample / 100)
+    return sorted(tasks, key=lambda t: (t.est_bytes is None, -(t.est_bytes or 0)))
+
+
+LOB_TYPES = {"CLOB", "NCLOB", "BLOB", "BFILE", "LONG", "LONG RAW"}
+LOB_WIDTH = 4000
+STREAM_LOB_TYPES = {"CLOB", "NCLOB", "BLOB"}
+_FIXED_WIDTHS = {"NUMBER": 22, "FLOAT": 22, "BINARY_FLOAT": 4, "BINARY_DOUBLE": 8, "DATE": 7, "ROWID": 10}
+
+
+def column_width(meta: Dict[str, Any]) -> int:
+    """
+    Số byte tối đa của một giá trị theo khai báo cột. CLOB/NCLOB/BLOB tính theo
+    LOB_INLINE_LIMIT (phần lớn hơn không nằm trong batch), LONG/BFILE theo LOB_WIDTH.
+    """
+    data_type = str(meta.get("data_type") or "").upper()
+    if data_type.startswith("TIMESTAMP"):
+        return 11
+    if data_type in STREAM_LOB_TYPES:
+        return LOB_INLINE_LIMIT
+    if data_type in LOB_TYPES:
+        return LOB_WIDTH
+    if data_type in _FIXED_WIDTHS:
+        return _FIXED_WIDTHS[data_type]
+    try:
+        return max(1, int(meta.get("data_length") or 0)) or 32
+    except (TypeError, ValueError):
+        return 32
+
+
+class BatchSizer:
+    """
+    Chọn số dòng mỗi lần fetch/insert để mỗi round trip mang khoảng target_bytes.
+    Ước lượng ban đầu lấy AVG_ROW_LEN (thống kê) hoặc độ rộng khai báo; sau mỗi
+    batch điều chỉnh theo dung lượng đo được. Độ rộng khai báo tối đa đặt giới hạn
+    cứng để một batch không vượt max_bytes kể cả khi dữ liệu phía sau rộng hơn.
+    """
+
+    def __init__(
+        self,
+        columns: Sequence[Dict[str, Any]],
+        *,
+        avg_row_len: Optional[int] = None,
+        target_bytes: int = TARGET_BATCH_BYTES,
+        max_bytes: int = MAX_BATCH_BYTES,
+        fixed_size: Optional[int] = None,
+    ) -> None:
+        self.max_row_width = max(1, sum(column_width(c) for c in columns))
+        self.target_bytes = max(1, int(target_bytes))
+        # Dòng rất rộng (nhiều cột LOB/VARCHAR2 lớn) có thể kéo giới hạn xuống dưới MIN_BATCH_SIZE
+        self.hard_limit = max(1, min(MAX_BATCH_SIZE, int(max_bytes) // self.max_row_width))
+        self.fixed = fixed_size is not None
+        if self.fixed:
+            self.batch_size = max(1, int(fixed_size))
+        else:
+            self.batch_size = self._clamp(self.target_bytes // max(1, avg_row_len or self.max_row_width))
+
+    def _clamp(self, size: int) -> int:
+        return max(min(MIN_BATCH_SIZE, self.hard_limit), min(self.hard_limit, int(size)))
+
+    @property
+    def prefetch_rows(self) -> int:
+        # Round trip của execute() trả luôn batch đầu tiên
+        return self.batch_size + 1
+
+    def observe(self, row_count: int, size_bytes: int) -> int:
+        """Cập nhật kích thước batch kế tiếp từ batch vừa fetch (trung bình với giá trị cũ)."""
+        if self.fixed or row_count <= 0:
+            return self.batch_size
+        per_row = max(1.0, size_bytes / row_count)
+        wanted = self._clamp(self.target_bytes / per_row)
+        self.batch_size = self._clamp((self.batch_size + wanted) // 2)
+        return self.batch_size
+
+
+def _value_bytes(value: Any) -> int:
+    if value is None:
+        return 1
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value) or 1
+    return 8
+
+
+def estimate_rows_bytes(rows: Sequence[Sequence[Any]]) -> int:
+    """Ước lượng dung lượng một batch từ dòng đầu, giữa và cuối."""
+    if not rows:
+        return 0
+    samples = {0, len(rows) // 2, len(rows) - 1}
+    per_row = sum(sum(_value_bytes(v) for v in rows[idx]) for idx in samples) / len(samples)
+    return int(per_row * len(rows))
+
+
+_END = object()
+
+
+class _Failure:
+    def __init__(self, exc: BaseException) -> None:
+        self.exc = exc
+
+
+class BatchQueue:
+    """
+    Hàng đợi batch giữa luồng fetch và luồng insert, giới hạn theo tổng byte ước lượng.
+    put() chặn luồng fetch khi hàng đợi đầy (luôn nhận ít nhất một batch để không kẹt
+    với batch lớn hơn giới hạn); close() đánh thức mọi bên khi một phía dừng sớm.
+    """
+
+    def __init__(self, max_bytes: int = QUEUE_MAX_BYTES) -> None:
+        self.max_bytes = max(1, int(max_bytes))
+        self._items: "deque[Tuple[Any, int]]" = deque()
+        self._bytes = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self.peak_bytes = 0
+
+    def put(self, item: Any, size: int = 0) -> bool:
+        with self._cond:
+            while not self._closed and self._items and self._bytes + size > self.max_bytes:
+                self._cond.wait()
+            if self._closed:
+                return False
+            self._items.append((item, size))
+            self._bytes += size
+            self.peak_bytes = max(self.peak_bytes, self._bytes)
+            self._cond.notify_all()
+            return True
+
+    def get(self) -> Any:
+        with self._cond:
+            while not self._items and not self._closed:
+                self._cond.wait()
+            if not self._items:
+                return _END
+            item, size = self._items.popleft()
+            self._bytes -= size
+            self._cond.notify_all()
+            return item
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._items.clear()
+            self._bytes = 0
+            self._cond.notify_all()
+
+
+def _fetch_batches(
+    src_cur,
+    sizer: BatchSizer,
+    out: BatchQueue,
+    key_index: Optional[int] = None,
+    strip_key: bool = False,
+    stats: Optional[CopyStats] = None,
+) -> None:
+    """
+    Luồng producer: fetch liên tục từ nguồn, dừng khi hết dữ liệu hoặc hàng đợi bị đóng.
+    Mỗi phần tử là (rows, khóa của dòng cuối); strip_key bỏ cột khóa phụ (ROWID) khỏi dòng.
+    """
+    try:
+        while True:
+            started = time.perf_counter()
+            rows = src_cur.fetchmany(sizer.batch_size)
+            if stats is not None:
+                stats.fetch_seconds += time.perf_counter() - started
+            if not rows:
+                break
+            last_key = rows[-1][key_index] if key_index is not None else None
+            if strip_key:
+                rows = [row[:-1] for row in rows]
+            size = estimate_rows_bytes(rows)
+            if stats is not None:
+                stats.data_bytes += size
+            src_cur.arraysize = sizer.observe(len(rows), size)
+            if not out.put((rows, last_key), size):
+                return
+        out.put(_END)
+    except BaseException as exc:
+        out.put(_Failure(exc))
+
+
+_LOB_LOCATOR_PREFIX = "LOB$"
+_INLINE_LOB_TYPES = {"CLOB": "DB_TYPE_LONG", "NCLOB": "DB_TYPE_LONG_NVARCHAR", "BLOB": "DB_TYPE_LONG_RAW"}
+
+
+class LobPlan:
+    """
+    Cách copy các cột CLOB/NCLOB/BLOB của một bảng mà không chuyển locator giữa hai
+    kết nối. Mỗi cột LOB được SELECT hai lần: giá trị không quá inline_limit (fetch
+    thành str/bytes nhờ outputtypehandler) và locator của giá trị lớn hơn (cột phụ
+    LOB$n ở cuối danh sách). Dòng có LOB lớn được đọc từng đoạn sang LOB tạm của phiên
+    đích và insert riêng, nên một batch chỉ giữ tối đa inline_limit mỗi ô LOB.
+    """
+
+    def __init__(
+        self,
+        columns: Sequence[Dict[str, Any]],
+        *,
+        inline_limit: int = LOB_INLINE_LIMIT,
+        chunk_size: int = LOB_STREAM_CHUNK,
+    ) -> None:
+        self.width = len(columns)
+        self.positions: List[int] = []
+        self.types: List[str] = []
+        for idx, meta in enumerate(columns):
+            data_type = str(meta.get("data_type") or "").upper()
+            if data_type in STREAM_LOB_TYPES:
+                self.positions.append(idx)
+                self.types.append(data_type)
+        self.inline_limit = max(1, int(inline_limit))
+        self.chunk_size = max(1, int(chunk_size))
+        self.streamed = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.positions)
+
+    def select_list(self, column_names: Sequence[str]) -> List[str]:
+        """Danh sách SELECT: cột LOB chỉ trả giá trị nhỏ, thêm các cột locator LOB$n phía sau."""
+        exprs = list(column_names)
+        for pos in self.positions:
+            name = column_names[pos]
+            exprs[pos] = f"CASE WHEN DBMS_LOB.GETLENGTH({name}) <= {self.inline_limit} THEN {name} END {name}"
+        for num, pos in enumerate(self.positions):
+            name = column_names[pos]
+            exprs.append(
+                f"CASE WHEN DBMS_LOB.GETLENGTH({name}) > {self.inline_limit} THEN {name} END {_LOB_LOCATOR_PREFIX}{num}"
+            )
+        return exprs
+
+    def output_type_handler(self) -> Optional[Callable[..., Any]]:
+        """
+        Handler fetch cột LOB thường thành LONG (str/bytes), giữ locator cho cột LOB$n.
+        Nhận cả dạng (cursor, metadata) lẫn (cursor, name, default_type, size, precision, scale).
+        """
+        try:
+            driver = db_utils.load_driver()
+        except db_utils.OracleDriverNotAvailable:
+            return None
+        inline = {}
+        for lob_type, long_type in _INLINE_LOB_TYPES.items():
+            src, dst = getattr(driver, f"DB_TYPE_{lob_type}", None), getattr(driver, long_type, None)
+            if src is not None and dst is not None:
+                inline[src] = dst
+        if not inline:
+            return None
+
+        def handler(cursor, name_or_meta, default_type=None, size=None, precision=None, scale=None):
+            if default_type is None:
+                name, default_type = name_or_meta.name, name_or_meta.type_code
+            else:
+                name = name_or_meta
+            if default_type in inline and not str(name).upper().startswith(_LOB_LOCATOR_PREFIX):
+                return cursor.var(inline[default_type], arraysize=cursor.arraysize)
+            return None
+
+        return handler
+
+    def _input_sizes(self, streamed: bool) -> List[Any]:
+        try:
+            driver = db_utils.load_driver()
+        except db_utils.OracleDriverNotAvailable:
+            return []
+        sizes: List[Any] = [None] * self.width
+        for pos, lob_type in zip(self.positions, self.types):
+            attr = f"DB_TYPE_{lob_type}" if streamed else _INLINE_LOB_TYPES[lob_type]
+            sizes[pos] = getattr(driver, attr, None)
+        return sizes if any(size is not None for size in sizes) else []
+
+    def _to_temp_lob(self, dst_conn, lob_type: str, value: Any):
+        """Chép một giá trị (locator nguồn hoặc str/bytes) sang LOB tạm của phiên đích."""
+        driver = db_utils.load_driver()
+        temp = dst_conn.createlob(getattr(driver, f"DB_TYPE_{lob_type}"))
+        if not hasattr(value, "read"):
+            if value:
+                temp.write(value, 1)
+            return temp
+        offset = 1
+        while True:
+            data = value.read(offset, self.chunk_size)
+            if not data:
+                break
+            temp.write(data, offset)
+            offset += len(data)
+        self.streamed += 1
+        return temp
+
+    def split(self, rows: Sequence[Sequence[Any]], dst_conn) -> Tuple[List[List[Any]], List[List[Any]]]:
+        """
+        Tách batch thành (dòng chỉ có LOB nhỏ, dòng có LOB lớn). Dòng có LOB lớn mang
+        LOB tạm cho mọi cột LOB để mỗi lần executemany chỉ có một kiểu bind mỗi cột.
+        """
+        plain: List[List[Any]] = []
+        streamed: List[List[Any]] = []
+        for row in rows:
+            values = list(row[: self.width])
+            locators = row[self.width : self.width + len(self.positions)]
+            for pos in self.positions:
+                if hasattr(values[pos], "read"):
+                    # Driver không hỗ trợ outputtypehandler: đọc locator ngay trên phiên nguồn
+                    values[pos] = values[pos].read()
+            if not any(loc is not None for loc in locators):
+                plain.append(values)
+                continue
+            for pos, lob_type, locator in zip(self.positions, self.types, locators):
+                value = locator if locator is not None else values[pos]
+                values[pos] = None if value is None else self._to_temp_lob(dst_conn, lob_type, value)
+            streamed.append(values)
+        return plain, streamed
+
+    def insert(self, dst_conn, dst_cur, insert_sql: str, rows: Sequence[Sequence[Any]]) -> None:
+        plain, streamed = self.split(rows, dst_conn)
+        for batch, is_streamed in ((plain, False), (streamed, True)):
+            if not batch:
+                continue
+            sizes = self._input_sizes(is_streamed)
+            if sizes:
+                dst_cur.setinputsizes(*sizes)
+            dst_cur.executemany(insert_sql, batch)
+
+
+@dataclass
+class CopyRange:
+    """
+    Một khoảng khóa nửa mở [lower, upper) theo PK một cột hoặc ROWID; None = không chặn.
+    after/done_rows: vị trí khóa và số dòng đã commit khi chạy tiếp từ checkpoint.
+    replace: xóa dòng đích trong khoảng trước khi copy (delta, chạy tiếp); resumable=False khi khóa
+    không duy nhất (cột đầu của PK nhiều cột) nên không thể chạy tiếp giữa khoảng.
+    """
+
+    key: str
+    lower: Any = None
+    upper: Any = None
+    index: int = 0
+    count: int = 1
+    after: Any = None
+    done_rows: int = 0
+    replace: bool = False
+    resumable: bool = True
+
+    def predicate(self) -> Tuple[str, Dict[str, Any]]:
+        """Điều kiện WHERE và bind cho khoảng này."""
+        wrap = (lambda b: f"CHARTOROWID(:{b})") if self.key == "ROWID" else (lambda b: f":{b}")
+        parts: List[str] = []
+        binds: Dict[str, Any] = {}
+        if self.lower is not None:
+            parts.append(f"{self.key} >= {wrap('range_lo')}")
+            binds["range_lo"] = self.lower
+        if self.upper is not None:
+            parts.append(f"{self.key} < {wrap('range_hi')}")
+            binds["range_hi"] = self.upper
+        if self.after is not None:
+            parts.append(f"{self.key} > {wrap('range_after')}")
+            binds["range_after"] = self.after
+        return " AND ".join(parts) or "1 = 1", binds
+
+
+def resolve_copy_key(conn, task: CloneTask) -> str:
+    """Khóa dùng để chia khoảng và đánh dấu vị trí: PK nếu chỉ có một cột, ngược lại ROWID."""
+    pk_columns = db_utils.fetch_primary_keys(conn, task.source, task.source_owner)
+    return pk_columns[0] if len(pk_columns) == 1 else "ROWID"
+
+
+def plan_ranges(conn, task: CloneTask, parts: int, key: Optional[str] = None) -> List[CopyRange]:
+    """
+    Chia bảng nguồn thành tối đa parts khoảng có số dòng gần bằng nhau bằng NTILE
+    theo key (mặc định resolve_copy_key). Khoảng đầu và cuối để hở để dòng phát sinh
+    sau khi chia vẫn được copy.
+    """
+    key = key or resolve_copy_key(conn, task)
+    select_key = "ROWIDTOCHAR(MIN(k))" if key == "ROWID" else "MIN(k)"
+    sql = (
+        f"SELECT {select_key} FROM (SELECT {key} AS k, NTILE(:parts) OVER (ORDER BY {key}) grp "
+        f"FROM {task.source}) GROUP BY grp ORDER BY grp"
+    )
+    with contextlib.closing(conn.cursor()) as cur:
+        cur.execute(sql, {"parts": max(1, int(parts))})
+        bounds = [row[0] for row in cur.fetchall() if row[0] is not None]
+    if len(bounds) <= 1:
+        return [CopyRange(key)]
+    edges = [None] + bounds[1:] + [None]
+    count = len(edges) - 1
+    return [CopyRange(key, edges[i], edges[i + 1], i, count) for i in range(count)]
+
+
+def _hash_column_expr(meta: Dict[str, Any]) -> Optional[str]:
+    """
+    Biểu thức chuỗi/RAW ổn định cho một cột (không phụ thuộc NLS của phiên).
+    LOB chỉ so độ dài và DELTA_LOB_PREFIX ký tự/byte đầu; LONG, BFILE... bị bỏ qua.
+    """
+    name = meta["column_name"]
+    data_type = str(meta.get("data_type") or "").upper()
+    if data_type in ("NUMBER", "FLOAT", "BINARY_FLOAT", "BINARY_DOUBLE"):
+        return f"TO_CHAR({name}, 'TM9', 'NLS_NUMERIC_CHARACTERS=''.,''')"
+    if data_type == "DATE":
+        return f"TO_CHAR({name}, 'YYYYMMDDHH24MISS')"
+    if data_type.startswith("TIMESTAMP"):
+        return f"TO_CHAR({name}, 'YYYYMMDDHH24MISSFF9')"
+    if data_type in ("CLOB", "NCLOB"):
+        return f"DBMS_LOB.GETLENGTH({name}) || ':' || DBMS_LOB.SUBSTR({name}, {DELTA_LOB_PREFIX}, 1)"
+    if data_type == "BLOB":
+        return f"DBMS_LOB.GETLENGTH({name}) || ':' || RAWTOHEX(DBMS_LOB.SUBSTR({name}, {DELTA_LOB_PREFIX}, 1))"
+    if data_type in ("VARCHAR2", "NVARCHAR2", "CHAR", "NCHAR", "RAW"):
+        return name
+    return None
+
+
+def row_hash_expr(columns: Sequence[Dict[str, Any]]) -> str:
+    """
+    Hash của một dòng = ORA_HASH của chuỗi nối các ORA_HASH từng cột theo thứ tự cột,
+    nên giá trị một cột đổi chỗ giữa hai dòng vẫn làm đổi hash của cả hai dòng.
+    Nối theo nhóm ROW_HASH_GROUP cột để không vượt giới hạn 4000 byte của chuỗi.
+    NULL được thay bằng giá trị nằm ngoài miền của ORA_HASH.
+    """
+    parts = []
+    for meta in columns:
+        expr = _hash_column_expr(meta)
+        if expr is not None:
+            parts.append(f"NVL(ORA_HASH({expr}, 4294967295), 4294967296)")
+    if not parts:
+        return "0"
+    groups = [
+        "ORA_HASH(" + " || ':' || ".join(parts[start:start + ROW_HASH_GROUP]) + ", 4294967295)"
+        for start in range(0, len(parts), ROW_HASH_GROUP)
+    ]
+    if len(groups) == 1:
+        return groups[0]
+    return "ORA_HASH(" + " || ':' || ".join(groups) + ", 4294967295)"
+
+
+def range_hashes(conn, table: str, key: str, bounds: Sequence[Any], hash_expr: str) -> Dict[int, Tuple[int, int]]:
+    """
+    (số dòng, tổng hash) cho từng khoảng [bounds[i-1], bounds[i]) trong một lần quét bảng.
+    """
+    binds = {f"b{idx}": value for idx, value in enumerate(bounds)}
+    if bounds:
+        whens = " ".join(f"WHEN {key} < :b{idx} THEN {idx}" for idx in range(len(bounds)))
+        group_expr = f"CASE {whens} ELSE {len(bounds)} END"
+    else:
+        group_expr = "0"
+    sql = (
+        f"SELECT grp, COUNT(*), SUM(h) FROM (SELECT {group_expr} grp, {hash_expr} h FROM {table}) "
+        "GROUP BY grp"
+    )
+    with contextlib.closing(conn.cursor()) as cur:
+        cur.execute(sql, binds)
+        return {int(grp): (int(count), int(total or 0)) for grp, count, total in cur.fetchall()}
+
+
+def truncate_target(dst_conn, table: str) -> None:
+    """TRUNCATE bảng đích; không đủ quyền thì DELETE và commit."""
+    with contextlib.closing(dst_conn.cursor()) as cur:
+        try:
+            cur.execute(f"TRUNCATE TABLE {table}")
+        except Exception:
+            cur.execute(f"DELETE FROM {table}")
+            dst_conn.commit()
+
+
+@dataclass
+class TargetConstraint:
+    """FK giữa hai bảng đích của lần clone (kể cả tự tham chiếu)."""
+
+    owner: str
+    table: str
+    fk: db_utils.ForeignKey
+
+    @property
+    def target(self) -> str:
+        return f"{self.owner}.{self.table}"
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TargetConstraint":
+        return cls(data["owner"], data["table"], db_utils.ForeignKey(**data["fk"]))
+
+
+def find_target_constraints(dst_conn, tasks: Sequence[CloneTask]) -> List[TargetConstraint]:
+    """FK đang bật trên các bảng đích mà bảng cha cũng là một bảng đích của lần clone."""
+    targets = {t.target.upper() for t in tasks}
+    found: List[TargetConstraint] = []
+    for task in tasks:
+        for fk in db_utils.fetch_foreign_keys(dst_conn, task.target, task.target_owner):
+            if fk.ref_source.upper() in targets:
+                found.append(TargetConstraint(task.target_owner.upper(), task.target_table.upper(), fk))
+    return found
+
+
+def disable_constraints(dst_conn, constraints: Sequence[TargetConstraint]) -> None:
+    """
+    Tắt FK giữa các bảng đích trong lúc copy: các bảng chạy song song, commit độc lập
+    (bảng con có thể xong trước bảng cha) và bảng cha phải TRUNCATE được.
+    """
+    with contextlib.closing(dst_conn.cursor()) as cur:
+        for item in constraints:
+            cur.execute(f"ALTER TABLE {item.target} DISABLE CONSTRAINT {item.fk.name}")
+
+
+def _orphan_count(cur, item: TargetConstraint) -> Optional[int]:
+    fk = item.fk
+    not_null = " AND ".join(f"c.{col} IS NOT NULL" for col in fk.columns)
+    match = " AND ".join(f"p.{ref} = c.{col}" for col, ref in zip(fk.columns, fk.ref_columns))
+    sql = (
+        f"SELECT COUNT(*) FROM {item.target} c WHERE {not_null} "
+        f"AND NOT EXISTS (SELECT 1 FROM {fk.ref_source} p WHERE {match})"
+    )
+    try:
+        cur.execute(sql)
+        row = cur.fetchone()
+    except Exception as exc:
+        logger.debug("Cannot count orphan rows for %s: %s", fk.name, exc)
+        return None
+    return int(row[0]) if row else None
+
+
+def enable_constraints(dst_conn, constraints: Sequence[TargetConstraint]) -> List[Dict[str, Any]]:
+    """
+    Bật lại FK có kiểm tra dữ liệu (VALIDATE). FK có dòng con mồ côi được bật NOVALIDATE
+    (vẫn chặn DML mới) và trả về kèm số dòng vi phạm để báo cáo.
+    """
+    violations: List[Dict[str, Any]] = []
+    with contextlib.closing(dst_conn.cursor()) as cur:
+        for item in constraints:
+            try:
+                cur.execute(f"ALTER TABLE {item.target} ENABLE VALIDATE CONSTRAINT {item.fk.name}")
+                continue
+            except Exception as exc:
+                error = str(exc)
+            rows = _orphan_count(cur, item)
+            try:
+                cur.execute(f"ALTER TABLE {item.target} ENABLE NOVALIDATE CONSTRAINT {item.fk.name}")
+                enabled = True
+            except Exception as exc:
+                logger.warning("Cannot re-enable %s on %s: %s", item.fk.name, item.target, exc)
+                enabled = False
+            violations.append(
+                {"table": item.target, "constraint": item.fk.name, "rows": rows, "enabled": enabled, "error": error}
+            )
+    return violations
+
+
+def copy_table(
+    src_conn,
+    dst_conn,
+    task: CloneTask,
+    *,
+    truncate: bool = True,
+    options: Optional[CloneOptions] = None,
+    copy_range: Optional[CopyRange] = None,
+    cancel_event: Optional[threading.Event] = None,
+    progress: Optional[Callable[[int], None]] = None,
+    on_commit: Optional[Callable[[int, Any], None]] = None,
+    stats: Optional[CopyStats] = None,
+) -> int:
+    """
+    Sao chép toàn bộ dữ liệu một bảng theo kiểu pipeline: một luồng fetch từ nguồn
+    trong khi luồng hiện tại insert vào đích, nên độ trễ mạng hai phía chồng lên nhau.
+    Kích thước batch/arraysize/prefetchrows do BatchSizer quyết định theo options.
+    copy_range giới hạn câu SELECT trong một khoảng khóa (copy song song trong bảng).
+    Có on_commit (cần copy_range): đọc theo thứ tự khóa, commit mỗi options.commit_batches
+    batch và báo on_commit(số dòng đã commit, khóa cuối) để ghi checkpoint.
+    Cột CLOB/NCLOB/BLOB được đọc/ghi qua LobPlan. stats (nếu có) nhận số đo thời gian
+    fetch/insert/chờ và số batch, kể cả khi lỗi giữa chừng. Commit khi xong, rollback phần chưa commit khi lỗi hoặc bị hủy.
+    """
+    options = options or CloneOptions()
+    columns = db_utils.fetch_table_columns(src_conn, task.source, task.source_owner)
+    column_names = [c["column_name"] for c in columns]
+    if not column_names:
+        raise RuntimeError(f"{task.source}: no columns")
+    col_expr = ", ".join(column_names)
+    ordered = on_commit is not None and copy_range is not None
+    key_index: Optional[int] = None
+    strip_key = False
+    lobs = LobPlan(columns)
+    select_list = ", ".join(lobs.select_list(column_names)) if lobs else col_expr
+    if ordered:
+        if copy_range.key == "ROWID":
+            select_list += ", ROWIDTOCHAR(ROWID)"
+            key_index, strip_key = len(column_names) + len(lobs.positions), True
+        else:
+            key_index = [c.upper() for c in column_names].index(copy_range.key.upper())
+    select_sql = f"SELECT {select_list} FROM {task.from_clause}"
+    select_binds: Dict[str, Any] = {}
+    conditions = [f"({task.where})"] if task.where else []
+    if copy_range is not None:
+        where, select_binds = copy_range.predicate()
+        conditions.append(where)
+    if conditions:
+        select_sql += " WHERE " + " AND ".join(conditions)
+    if ordered:
+        select_sql += f" ORDER BY {copy_range.key}"
+    commit_every = max(0, int(options.commit_batches or 0)) if ordered else 0
+    placeholders = ", ".join(f":{idx + 1}" for idx in range(len(column_names)))
+    insert_sql = f"INSERT INTO {task.target} ({col_expr}) VALUES ({placeholders})"
+    sizer = BatchSizer(
+        columns,
+        avg_row_len=task.avg_row_len,
+        target_bytes=options.target_batch_bytes,
+        max_bytes=options.max_batch_bytes,
+        fixed_size=options.batch_size,
+    )
+    logger.debug(
+        "Clone %s: max row width %s bytes, initial batch %s", task.source, sizer.max_row_width, sizer.batch_size
+    )
+    stats = stats if stats is not None else CopyStats()
+    row_count = 0
+    try:
+        with contextlib.closing(src_conn.cursor()) as src_cur, contextlib.closing(dst_conn.cursor()) as dst_cur:
+            if truncate:
+                truncate_target(dst_conn, task.target)
+            if copy_range is not None and copy_range.replace:
+                # Cùng giao dịch với phần insert: lỗi thì rollback cả hai
+                dst_cur.execute(f"DELETE FROM {task.target} WHERE {where}", select_binds)
+            src_cur.arraysize = sizer.batch_size
+            with contextlib.suppress(Exception):
+                src_cur.prefetchrows = sizer.prefetch_rows
+            handler = lobs.output_type_handler() if lobs else None
+            if handler is not None:
+                src_cur.outputtypehandler = handler
+            started = time.perf_counter()
+            src_cur.execute(select_sql, select_binds)
+            stats.fetch_seconds += time.perf_counter() - started
+            batches = BatchQueue(options.queue_bytes)
+            producer = threading.Thread(
+                target=_fetch_batches,
+                args=(src_cur, sizer, batches, key_index, strip_key, stats),
+                name=f"clone-fetch-{task.source}",
+                daemon=True,
+            )
+            producer.start()
+            last_key: Any = None
+            since_commit = 0
+            try:
+                while True:
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise CloneCancelled()
+                    started = time.perf_counter()
+                    item = batches.get()
+                    stats.wait_seconds += time.perf_counter() - started
+                    if item is _END:
+                        break
+                    if isinstance(item, _Failure):
+                        raise item.exc
+                    rows, last_key = item
+                    started = time.perf_counter()
+                    if lobs:
+                        lobs.insert(dst_conn, dst_cur, insert_sql, rows)
+                    else:
+                        dst_cur.executemany(insert_sql, rows)
+                    row_count += len(rows)
+                    since_commit += 1
+                    if commit_every and since_commit >= commit_every:
+                        dst_conn.commit()
+                        since_commit = 0
+                        on_commit(row_count, last_key)
+                    stats.insert_seconds += time.perf_counter() - started
+                    stats.rows += len(rows)
+                    stats.batches += 1
+                    if progress is not None:
+                        progress(row_count)
+            finally:
+                # Phải chờ producer dừng trước khi đóng cursor nguồn
+                batches.close()
+                producer.join()
+                stats.batch_size = max(stats.batch_size, sizer.batch_size)
+                stats.queue_peak_bytes = max(stats.queue_peak_bytes, batches.peak_bytes)
+        started = time.perf_counter()
+        dst_conn.commit()
+        stats.insert_seconds += time.perf_counter() - started
+        if on_commit is not None and row_count:
+            on_commit(row_count, last_key)
+        if lobs.streamed:
+            logger.debug("Clone %s: streamed %s large LOB values", task.source, lobs.streamed)
+    except BaseException:
+        with contextlib.suppress(Exception):
+            dst_conn.rollback()
+        raise
+    return row_count
+
+
+def _encode_key(value: Any) -> Any:
+    """Giá trị khóa -> dạng ghi được vào JSON (giữ kiểu để bind lại đúng)."""
+    if isinstance(value, decimal.Decimal):
+        return {"decimal": str(value)}
+    if isinstance(value, _dt.datetime):
+        return {"datetime": value.isoformat()}
+    if isinstance(value, _dt.date):
+        return {"date": value.isoformat()}
+    if isinstance(value, bytes):
+        return {"hex": value.hex()}
+    return value
+
+
+def _decode_key(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "decimal" in value:
+            return decimal.Decimal(value["decimal"])
+        if "datetime" in value:
+            return _dt.datetime.fromisoformat(value["datetime"])
+        if "date" in value:
+            return _dt.date.fromisoformat(value["date"])
+        if "hex" in value:
+            return bytes.fromhex(value["hex"])
+    return value
+
+
+class CloneCheckpoint:
+    """
+    Tiến độ một lần clone lưu ra JSON: danh sách bảng, các khoảng khóa của từng bảng
+    và khóa cuối đã commit của mỗi khoảng. Ghi đè nguyên tử sau mỗi lần commit để
+    lần chạy sau bỏ qua phần đã xong.
+    """
+
+    def __init__(self, path: str, data: Dict[str, Any]) -> None:
+        self.path = path
+        self.data = data
+        self._lock = threading.Lock()
+        # Giữ suốt serialize + ghi + replace để bản cũ không đè bản mới hơn
+        self._write_lock = threading.Lock()
+
+    @classmethod
+    def create(
+        cls, path: str, source_key: str, target_key: str, tasks: Sequence[CloneTask], options: CloneOptions
+    ) -> "CloneCheckpoint":
+        data = {
+            "version": CHECKPOINT_VERSION,
+            "source": source_key,
+            "target": target_key,
+            "created": _dt.datetime.now().isoformat(timespec="seconds"),
+            "truncate": options.truncate,
+            "delta": options.delta,
+            "tasks": [asdict(task) for task in tasks],
+            "tables": {},
+        }
+        checkpoint = cls(path, data)
+        checkpoint.save()
+        return checkpoint
+
+    @classmethod
+    def load(cls, path: str) -> Optional["CloneCheckpoint"]:
+        if not os.path.isfile(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as exc:
+            logger.warning("Cannot read clone checkpoint %s: %s", path, exc)
+            return None
+        if not isinstance(data, dict) or data.get("version") != CHECKPOINT_VERSION:
+            return None
+        return cls(path, data)
+
+    def matches(self, source_key: str, target_key: str) -> bool:
+        return self.data.get("source") == source_key and self.data.get("target") == target_key
+
+    def tasks(self) -> List[CloneTask]:
+        return [CloneTask(**item) for item in self.data.get("tasks", [])]
+
+    def set_tasks(self, tasks: Sequence[CloneTask]) -> None:
+        """Thay danh sách bảng (sau khi mở rộng theo FK) trước khi bắt đầu copy."""
+        with self._lock:
+            self.data["tasks"] = [asdict(task) for task in tasks]
+        self.save()
+
+    def constraints(self) -> List[TargetConstraint]:
+        """FK đã tắt ở lần chạy trước (chưa bật lại nếu lần đó bị dừng đột ngột)."""
+        with self._lock:
+            items = list(self.data.get("constraints", []))
+        return [TargetConstraint.from_dict(item) for item in items]
+
+    def set_constraints(self, constraints: Sequence[TargetConstraint]) -> None:
+        with self._lock:
+            self.data["constraints"] = [asdict(item) for item in constraints]
+        self.save()
+
+    @property
+    def truncate(self) -> bool:
+        return bool(self.data.get("truncate", True))
+
+    @property
+    def delta(self) -> bool:
+        return bool(self.data.get("delta", False))
+
+    def progress(self) -> Tuple[int, int]:
+        """(số bảng đã xong, tổng số bảng)."""
+        with self._lock:
+            tables = self.data.get("tables", {})
+            done = sum(1 for state in tables.values() if state.get("done"))
+            return done, len(self.data.get("tasks", []))
+
+    def table(self, source: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            state = self.data.get("tables", {}).get(source)
+            return json.loads(json.dumps(state)) if state is not None else None
+
+    def pending_ranges(self, source: str, restart: bool = False) -> List[CopyRange]:
+        """
+        Các khoảng chưa xong của bảng, kèm vị trí khóa để chạy tiếp.
+        restart=True: mọi khoảng, bỏ vị trí đã commit (copy lại cả bảng).
+        """
+        state = self.table(source) or {}
+        ranges = state.get("ranges", [])
+        result = []
+        for idx, item in enumerate(ranges):
+            if item.get("done") and not restart:
+                continue
+            result.append(
+                CopyRange(
+                    state["key"],
+                    _decode_key(item.get("lower")),
+                    _decode_key(item.get("upper")),
+                    idx,
+                    len(ranges),
+                    None if restart else _decode_key(item.get("after")),
+                    0 if restart else int(item.get("rows", 0)),
+                    bool(item.get("replace", False)),
+                    bool(item.get("resumable", True)),
+                )
+            )
+        return result
+
+    def committed_rows(self, source: str) -> int:
+        state = self.table(source) or {}
+        if state.get("done"):
+            return int(state.get("rows", 0))
+        return sum(int(item.get("rows", 0)) for item in state.get("ranges", []))
+
+    def set_ranges(self, source: str, ranges: Sequence[CopyRange]) -> None:
+        with self._lock:
+            self.data.setdefault("tables", {})[source] = {
+                "key": ranges[0].key,
+                "ranges": [
+                    {
+                        "lower": _encode_key(r.lower),
+                        "upper": _encode_key(r.upper),
+                        "after": None,
+                        "rows": 0,
+                        "done": False,
+                        "replace": r.replace,
+                        "resumable": r.resumable,
+                    }
+                    for r in ranges
+                ],
+            }
+        self.save()
+
+    def update_range(self, source: str, index: int, last_key: Any, rows: int, done: bool = False) -> None:
+        with self._lock:
+            item = self.data["tables"][source]["ranges"][index]
+            if last_key is not None:
+                item["after"] = _encode_key(last_key)
+            item["rows"] = rows
+            item["done"] = done
+        self.save()
+
+    def finish_table(self, source: str, rows: int) -> None:
+        with self._lock:
+            self.data.setdefault("tables", {})[source] = {"done": True, "rows": rows}
+        self.save()
+
+    def save(self) -> None:
+        with self._write_lock:
+            with self._lock:
+                payload = json.dumps(self.data, ensure_ascii=False, indent=2)
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(payload)
+                os.replace(tmp_path, self.path)
+            except OSError as exc:
+                logger.warning("Cannot save clone checkpoint %s: %s", self.path, exc)
+
+    def remove(self) -> None:
+        with contextlib.suppress(OSError):
+            os.remove(self.path)
+
+
+@dataclass
+class _CopyUnit:
+    """Một đơn vị việc trong hàng đợi: cả bảng (part=None) hoặc một khoảng của bảng."""
+
+    task: CloneTask
+    part: Optional[CopyRange] = None
+
+
+class _TableRun:
+    """Gom kết quả các khoảng của một bảng đang copy (song song hoặc theo checkpoint)."""
+
+    def __init__(self, task: CloneTask, parts: int, resumed_rows: int = 0) -> None:
+        self.result = TableResult(task, resumed_rows=resumed_rows)
+        self.parts = parts
+        self.parts_left = parts
+        self.parts_done = 0
+        # Bảng đích đã được truncate trước khi copy các khoảng
+        self.truncated = False
+        self.part_rows: Dict[int, int] = {}
+        self.started = time.monotonic()
+        self.last_report = 0.0
+
+
+class CloneRunner:
+    """
+    Chạy danh sách CloneTask trên nhiều worker; mỗi worker lấy một cặp session
+    nguồn/đích riêng từ pool (db_utils.acquire_connection) và nhận việc kế tiếp
+    từ hàng đợi chung. Bảng lớn (split_min_rows) được worker nhận nó chia thành
+    các khoảng khóa và đẩy lên đầu hàng đợi, để mọi worker cùng copy bảng đó;
+    mỗi khoảng commit riêng. Có checkpoint thì mọi bảng đều copy theo khoảng,
+    commit định kỳ và bảng/khoảng đã xong ở lần trước được bỏ qua.
+    Trước khi chạy, pool nguồn/đích được nới đủ cho số worker (+ dự phòng cho màn hình
+    khác); worker vẫn không lấy được session thì dừng, các worker còn lại xử lý hết hàng đợi.
+    FK giữa các bảng đích được tắt trong lúc chạy và bật lại (VALIDATE) khi xong; dòng
+    vi phạm được ghi vào constraint_violations.
+    """
+
+    def __init__(
+        self,
+        source_env: Dict[str, Any],
+        target_env: Dict[str, Any],
+        tasks: Sequence[CloneTask],
+        options: CloneOptions,
+        *,
+        checkpoint: Optional[CloneCheckpoint] = None,
+        cancel_event: Optional[threading.Event] = None,
+        on_table_start: Optional[Callable[[CloneTask], None]] = None,
+        on_table_progress: Optional[Callable[[CloneTask, int], None]] = None,
+        on_table_done: Optional[Callable[[TableResult], None]] = None,
+        on_log: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        self.source_env = source_env
+        self.target_env = target_env
+        self.tasks = list(tasks)
+        self.options = options
+        self.checkpoint = checkpoint
+        self.cancel_event = cancel_event or threading.Event()
+        self.on_table_start = on_table_start
+        self.on_table_progress = on_table_progress
+        self.on_table_done = on_table_done
+        self.on_log = on_log
+        self._units: "deque[_CopyUnit]" = deque()
+        self._runs: Dict[str, _TableRun] = {}
+        self._lock = threading.Lock()
+        self._results: List[TableResult] = []
+        self.workers_started = 0
+        self.constraint_violations: List[Dict[str, Any]] = []
+
+    @staticmethod
+    def _acquire(env: Dict[str, Any]):
+        return db_utils.acquire_connection(
+            env["user"],
+            env["password"],
+            env["host"],
+            env["port"],
+            env["alias"],
+            env["use_host_port"],
+        )
+
+    def _emit(self, callback: Optional[Callable[..., None]], *args: Any) -> None:
+        if callback is None:
+            return
+        try:
+            callback(*args)
+        except Exception as exc:
+            logger.debug("Clone callback failed: %s", exc)
+
+    @property
+    def worker_count(self) -> int:
+        return max(1, min(int(self.options.workers or 1), MAX_WORKERS))
+
+    @staticmethod
+    def _pool_key(env: Dict[str, Any]) -> Tuple[str, str]:
+        dsn = db_utils.build_dsn(env["host"], env["port"], env["alias"], env["use_host_port"])
+        return str(env["user"] or "").upper(), dsn
+
+    def _reserve_sessions(self) -> None:
+        """Mỗi worker giữ một session nguồn + một session đích suốt lần chạy."""
+        same_pool = self._pool_key(self.source_env) == self._pool_key(self.target_env)
+        per_pool = self.worker_count * (2 if same_pool else 1) + POOL_SPARE_SESSIONS
+        for env in ((self.source_env,) if same_pool else (self.source_env, self.target_env)):
+            try:
+                db_utils.ensure_session_capacity(
+                    env["user"], env["host"], env["port"], env["alias"], env["use_host_port"], per_pool
+                )
+            except Exception as exc:
+                logger.debug("Cannot grow session pool: %s", exc)
+
+    def run(self) -> List[TableResult]:
+        """Chạy đồng bộ (gọi từ luồng nền) và trả kết quả theo thứ tự hoàn thành."""
+        self._reserve_sessions()
+        constraints = self._defer_constraints()
+        try:
+            self._units.extend(_CopyUnit(task) for task in self.tasks)
+            threads = [
+                threading.Thread(target=self._worker, args=(idx,), name=f"clone-worker-{idx}", daemon=True)
+                for idx in range(self.worker_count)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            # Việc còn sót (bị hủy hoặc không worker nào mở được session) vẫn phải có kết quả
+            reason = None if self.cancel_event.is_set() else "no session available"
+            while True:
+                unit = self._next_unit()
+                if unit is None:
+                    break
+                self._finish_part(unit, 0, error=reason, cancelled=reason is None)
+        finally:
+            self._restore_constraints(constraints)
+        return self._results
+
+    def _defer_constraints(self) -> List[TargetConstraint]:
+        """
+        Tắt FK giữa các bảng đích trước khi copy. Danh sách được lưu vào checkpoint để lần
+        chạy tiếp vẫn bật lại được nếu lần này dừng đột ngột.
+        """
+        previous = self.checkpoint.constraints() if self.checkpoint is not None else []
+        conn = None
+        try:
+            conn = self._acquire(self.target_env)
+            found = find_target_constraints(conn, self.tasks)
+            disable_constraints(conn, found)
+        except Exception as exc:
+            logger.warning("Cannot disable target foreign keys: %s", exc)
+            self._emit(self.on_log, f"foreign keys not disabled: {exc}")
+            found = []
+        finally:
+            if conn is not None:
+                with contextlib.suppress(Exception):
+                    db_utils.release_connection(conn)
+        names = {(c.target, c.fk.name) for c in found}
+        constraints = found + [c for c in previous if (c.target, c.fk.name) not in names]
+        if found:
+            self._emit(self.on_log, f"{len(found)} foreign keys between target tables disabled during copy")
+        if self.checkpoint is not None and constraints:
+            self.checkpoint.set_constraints(constraints)
+        return constraints
+
+    def _restore_constraints(self, constraints: List[TargetConstraint]) -> None:
+        if not constraints:
+            return
+        conn = None
+        try:
+            conn = self._acquire(self.target_env)
+            self.constraint_violations = enable_constraints(conn, constraints)
+        except Exception as exc:
+            logger.warning("Cannot re-enable target foreign keys: %s", exc)
+            self.constraint_violations = [
+                {"table": c.target, "constraint": c.fk.name, "rows": None, "enabled": False, "error": str(exc)}
+                for c in constraints
+            ]
+        finally:
+            if conn is not None:
+                with contextlib.suppress(Exception):
+                    db_utils.release_connection(conn)
+        for item in self.constraint_violations:
+            state = "ENABLE NOVALIDATE" if item["enabled"] else "DISABLED"
+            self._emit(
+                self.on_log,
+                f"{item['table']}: {item['constraint']} has {item['rows'] if item['rows'] is not None else '?'} "
+                f"rows without parent -> {state}",
+            )
+        if self.checkpoint is not None:
+            # FK còn tắt (không bật lại được) giữ trong checkpoint để lần sau thử lại
+            keep = {(v["table"], v["constraint"]) for v in self.constraint_violations if not v["enabled"]}
+            self.checkpoint.set_constraints([c for c in constraints if (c.target, c.fk.name) in keep])
+
+    def _next_unit(self) -> Optional[_CopyUnit]:
+        with self._lock:
+            return self._units.popleft() if self._units else None
+
+    def _worker(self, index: int) -> None:
+        src_conn = dst_conn = None
+        try:
+            try:
+                src_conn = self._acquire(self.source_env)
+                dst_conn = self._acquire(self.target_env)
+            except Exception as exc:
+                logger.warning("Clone worker %s cannot get sessions: %s", index, exc)
+                self._emit(self.on_log, f"[worker {index + 1}] {exc}")
+                return
+            with self._lock:
+                self.workers_started += 1
+            while not self.cancel_event.is_set():
+                unit = self._next_unit()
+                if unit is None:
+                    break
+                if unit.part is None:
+                    self._start_table(src_conn, dst_conn, unit.task)
+                else:
+                    self._run_unit(src_conn, dst_conn, unit)
+        finally:
+            for conn in (src_conn, dst_conn):
+                if conn is not None:
+                    with contextlib.suppress(Exception):
+                        db_utils.release_connection(conn)
+
+    def _should_split(self, task: CloneTask) -> bool:
+        opts = self.options
+        return (
+            opts.split_large
+            and self.worker_count > 1
+            and task.est_rows is not None
+            and task.est_rows >= opts.split_min_rows
+            # SAMPLE kèm điều kiện khoảng không đảm bảo ra cùng tập dòng
+            and not task.sample
+        )
+
+    def _start_table(self, src_conn, dst_conn, task: CloneTask) -> None:
+        """
+        Quyết định cách copy một bảng: bỏ qua (đã xong theo checkpoint), chạy tiếp các
+        khoảng dang dở, chia khoảng mới, hoặc copy một luồng như bình thường.
+        """
+        checkpoint = self.checkpoint
+        state = checkpoint.table(task.source) if checkpoint is not None else None
+        if state and state.get("done"):
+            result = TableResult(task, rows=0, resumed_rows=int(state.get("rows", 0)), skipped=True)
+            with self._lock:
+                self._results.append(result)
+            self._emit(self.on_table_done, result)
+            return
+        if state and state.get("ranges"):
+            self._resume_table(dst_conn, task, state)
+            return
+
+        truncate = self.options.truncate
+        if self.options.delta and task.filtered:
+            self._emit(self.on_log, f"{task.source}: filtered mapping, delta skipped -> truncate + full copy")
+            truncate = True
+        elif self.options.delta:
+            if self._start_delta(src_conn, dst_conn, task):
+                return
+            # Đích đã có dữ liệu lần trước: copy đầy đủ mà không truncate sẽ nhân đôi dòng
+            truncate = True
+
+        ranges: Optional[List[CopyRange]] = None
+        try:
+            if self._should_split(task):
+                planned = plan_ranges(src_conn, task, self.options.split_parts or self.worker_count)
+                if len(planned) > 1:
+                    ranges = planned
+            if ranges is None and checkpoint is not None:
+                ranges = [CopyRange(resolve_copy_key(src_conn, task))]
+        except Exception as exc:
+            logger.warning("Cannot split %s into ranges, copying as one stream: %s", task.source, exc)
+            ranges = None
+        if ranges is None:
+            self._run_unit(src_conn, dst_conn, _CopyUnit(task), truncate=truncate)
+            return
+
+        self._emit(self.on_table_start, task)
+        try:
+            if truncate:
+                truncate_target(dst_conn, task.target)
+        except Exception as exc:
+            with self._lock:
+                self._runs[task.source] = _TableRun(task, 1)
+            self._finish_part(_CopyUnit(task), 0, error=str(exc))
+            return
+        if checkpoint is not None:
+            checkpoint.set_ranges(task.source, ranges)
+        if len(ranges) > 1:
+            self._emit(self.on_log, f"{task.source}: {len(ranges)} ranges by {ranges[0].key}")
+        self._enqueue_ranges(task, ranges, 0, truncated=truncate)
+
+    def _resume_table(self, dst_conn, task: CloneTask, state: Dict[str, Any]) -> None:
+        """
+        Chạy tiếp các khoảng dang dở theo checkpoint. Lần trước có thể đã commit thêm dòng
+        sau vị trí ghi trong checkpoint (commit rồi mới lưu checkpoint), nên mỗi khoảng xóa
+        phần đích từ vị trí đó trước khi copy lại; việc xóa này chỉ được phép khi lần trước
+        đã truncate đích (hoặc khoảng delta đã thay toàn bộ), nếu không bảng bị báo lỗi.
+        Khóa ROWID của nguồn không lọc được phía đích -> truncate và copy lại cả bảng.
+        """
+        checkpoint = self.checkpoint
+        self._emit(self.on_table_start, task)
+        ranges = checkpoint.pending_ranges(task.source)
+        resumed_rows = checkpoint.committed_rows(task.source)
+        if ranges and state.get("key") == "ROWID":
+            if not checkpoint.truncate:
+                with self._lock:
+                    self._runs[task.source] = _TableRun(task, 1)
+                self._finish_part(
+                    _CopyUnit(task), 0, error="cannot resume safely without truncate (no single-column primary key)"
+                )
+                return
+            try:
+                truncate_target(dst_conn, task.target)
+            except Exception as exc:
+                with self._lock:
+                    self._runs[task.source] = _TableRun(task, 1)
+                self._finish_part(_CopyUnit(task), 0, error=str(exc))
+                return
+            ranges = checkpoint.pending_ranges(task.source, restart=True)
+            checkpoint.set_ranges(task.source, ranges)
+            resumed_rows = 0
+            self._emit(self.on_log, f"{task.source}: keyed by ROWID, restarting {len(ranges)} ranges")
+        else:
+            # Xóa đích từ vị trí đã ghi chỉ an toàn khi lần trước đã làm trống phần đó
+            # (truncate cả bảng, hoặc khoảng delta đã được thay toàn bộ); không thì có thể
+            # xóa nhầm dòng vốn có trên đích -> không chạy tiếp bảng này.
+            if not checkpoint.truncate and not all(part.replace for part in ranges):
+                with self._lock:
+                    self._runs[task.source] = _TableRun(task, 1)
+                self._finish_part(
+                    _CopyUnit(task), 0, error="cannot resume safely: the previous run did not truncate the target"
+                )
+                return
+            for part in ranges:
+                part.replace = True
+            self._emit(self.on_log, f"{task.source}: resume {len(ranges)}/{len(state['ranges'])} ranges")
+        self._enqueue_ranges(task, ranges, resumed_rows)
+
+    def _start_delta(self, src_conn, dst_conn, task: CloneTask) -> bool:
+        """
+        Chia bảng theo cột đầu của PK, so sánh (số dòng, tổng hash) từng khoảng ở hai phía
+        (phía đích tính song song trên session đích) và chỉ copy lại các khoảng khác nhau.
+        False nếu bảng không có PK hoặc không so sánh được -> truncate rồi copy đầy đủ.
+        """
+        try:
+            pk_columns = db_utils.fetch_primary_keys(src_conn, task.source, task.source_owner)
+            if not pk_columns:
+                self._emit(self.on_log, f"{task.source}: no primary key, delta skipped -> truncate + full copy")
+                return False
+            key = pk_columns[0]
+            parts = max(self.worker_count, min(DELTA_MAX_RANGES, (task.est_rows or 0) // DELTA_RANGE_ROWS + 1))
+            ranges = plan_ranges(src_conn, task, parts, key=key)
+            columns = db_utils.fetch_table_columns(src_conn, task.source, task.source_owner)
+            hash_expr = row_hash_expr(columns)
+            bounds = [r.upper for r in ranges[:-1]]
+            target_hashes: Dict[str, Any] = {}
+
+            def hash_target() -> None:
+                try:
+                    target_hashes["value"] = range_hashes(dst_conn, task.target, key, bounds, hash_expr)
+                except Exception as exc:
+                    target_hashes["error"] = exc
+
+            helper = threading.Thread(target=hash_target, name=f"clone-hash-{task.target}", daemon=True)
+            helper.start()
+            try:
+                source_hashes = range_hashes(src_conn, task.source, key, bounds, hash_expr)
+            finally:
+                helper.join()
+            if "error" in target_hashes:
+                raise target_hashes["error"]
+        except Exception as exc:
+            logger.warning("Delta comparison of %s failed, copying in full: %s", task.source, exc)
+            self._emit(self.on_log, f"{task.source}: delta compare failed ({exc}) -> truncate + full copy")
+            return False
+
+        changed = [r for r in ranges if source_hashes.get(r.index) != target_hashes["value"].get(r.index)]
+        for idx, part in enumerate(changed):
+            part.index, part.count = idx, len(changed)
+            part.replace = True
+            part.resumable = len(pk_columns) == 1
+        self._emit(self.on_table_start, task)
+        self._emit(self.on_log, f"{task.source}: delta {len(changed)}/{len(ranges)} ranges differ")
+        if self.checkpoint is not None and changed:
+            self.checkpoint.set_ranges(task.source, changed)
+        self._enqueue_ranges(task, changed, 0, delta={"ranges": len(ranges), "changed": len(changed)})
+        return True
+
+    def _enqueue_ranges(
+        self,
+        task: CloneTask,
+        ranges: List[CopyRange],
+        resumed_rows: int,
+        delta: Optional[Dict[str, int]] = None,
+        truncated: bool = False,
+    ) -> None:
+        """Đưa các khoảng lên đầu hàng đợi để các worker cùng xử lý bảng này trước."""
+        with self._lock:
+            run = _TableRun(task, max(1, len(ranges)), resumed_rows)
+            run.result.delta = delta
+            run.truncated = truncated
+            self._runs[task.source] = run
+            self._units.extendleft(_CopyUnit(task, part) for part in reversed(ranges))
+        if not ranges:
+            # Mọi khoảng đã xong ở lần trước nhưng bảng chưa được đánh dấu xong
+            self._finish_part(_CopyUnit(task), 0)
+
+    def _run_unit(self, src_conn, dst_conn, unit: _CopyUnit, truncate: Optional[bool] = None) -> None:
+        task = unit.task
+        if truncate is None:
+            truncate = self.options.truncate
+        part = unit.part
+        if part is None:
+            with self._lock:
+                self._runs[task.source] = _TableRun(task, 1)
+            self._emit(self.on_table_start, task)
+        part_index = part.index if part is not None else 0
+        on_commit = None
+        tracked = self.checkpoint is not None and part is not None
+        if tracked and part.resumable:
+            checkpoint = self.checkpoint
+
+            def on_commit(rows: int, last_key: Any) -> None:
+                checkpoint.update_range(task.source, part.index, last_key, part.done_rows + rows)
+
+        error: Optional[str] = None
+        cancelled = False
+        rows = 0
+        stats = CopyStats()
+        try:
+            rows = copy_table(
+                src_conn,
+                dst_conn,
+                task,
+                truncate=truncate and part is None,
+                options=self.options,
+                copy_range=part,
+                cancel_event=self.cancel_event,
+                progress=lambda done: self._part_progress(task, part_index, done),
+                on_commit=on_commit,
+                stats=stats,
+            )
+        except CloneCancelled:
+            cancelled = True
+        except Exception as exc:
+            logger.warning("Clone of %s failed: %s", task.source, exc)
+            error = str(exc)
+        if tracked and error is None and not cancelled:
+            self.checkpoint.update_range(task.source, part.index, None, part.done_rows + rows, done=True)
+        self._finish_part(unit, rows, error=error, cancelled=cancelled, stats=stats, dst_conn=dst_conn)
+
+    def _part_progress(self, task: CloneTask, part_index: int, rows: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            run = self._runs.get(task.source)
+            if run is None:
+                return
+            run.part_rows[part_index] = rows
+            if now - run.last_report < PROGRESS_INTERVAL:
+                return
+            run.last_report = now
+            total = run.result.resumed_rows + sum(run.part_rows.values())
+        self._emit(self.on_table_progress, task, total)
+
+    def _finish_part(
+        self,
+        unit: _CopyUnit,
+        rows: int,
+        *,
+        error: Optional[str] = None,
+        cancelled: bool = False,
+        stats: Optional[CopyStats] = None,
+        dst_conn=None,
+    ) -> None:
+        task = unit.task
+        with self._lock:
+            run = self._runs.get(task.source)
+            if run is None:
+                run = self._runs[task.source] = _TableRun(task, 1)
+            result = run.result
+            result.rows += rows
+            if not error and not cancelled:
+                run.parts_done += 1
+            if stats is not None:
+                result.stats.merge(stats)
+            if error and not result.error:
+                prefix = f"[{unit.part.index + 1}/{unit.part.count}] " if unit.part is not None and unit.part.count > 1 else ""
+                result.error = prefix + error
+            result.cancelled = result.cancelled or cancelled
+            run.parts_left -= 1
+            if run.parts_left > 0:
+                return
+            result.elapsed = time.monotonic() - run.started
+            self._runs.pop(task.source, None)
+            self._results.append(result)
+        failed = bool(result.error or result.cancelled)
+        if failed and self.checkpoint is None and run.parts > 1 and result.delta is None and result.rows:
+            self._discard_partial(run, dst_conn)
+        if self.checkpoint is not None and not failed:
+            self.checkpoint.finish_table(task.source, result.resumed_rows + result.rows)
+        self._emit(self.on_table_done, result)
+
+    def _discard_partial(self, run: _TableRun, dst_conn=None) -> None:
+        """
+        Bảng chia khoảng, không có checkpoint, có khoảng lỗi/bị hủy trong khi các khoảng khác
+        đã commit. Bảng đã truncate trước đó -> truncate lại để không để dữ liệu dở dang;
+        chế độ không truncate thì không xóa được an toàn -> ghi rõ bảng còn dở.
+        """
+        result = run.result
+        task = result.task
+        if run.truncated:
+            conn = dst_conn
+            try:
+                if conn is None:
+                    conn = self._acquire(self.target_env)
+                truncate_target(conn, task.target)
+                note = f"table emptied again, {result.rows} rows of {run.parts_done}/{run.parts} completed ranges removed"
+                result.rows = 0
+            except Exception as exc:
+                note = f"table left partial: {result.rows} rows from {run.parts_done}/{run.parts} ranges ({exc})"
+            finally:
+                if dst_conn is None and conn is not None:
+                    with contextlib.suppress(Exception):
+                        db_utils.release_connection(conn)
+        else:
+            note = f"table left partial: {result.rows} rows from {run.parts_done}/{run.parts} ranges committed"
+        logger.warning("Clone of %s incomplete: %s", task.source, note)
+        self._emit(self.on_log, f"{task.source}: {note}")
+        if result.error:
+            result.error = f"{result.error} ({note})"
+
+
+def build_run_report(
+    results: Sequence[TableResult], options: CloneOptions, elapsed: float, **extra: Any
+) -> Dict[str, Any]:
+    """
+    Báo cáo một lần clone (lưu dạng JSON vào history): cấu hình đã dùng, tổng và số đo
+    từng bảng, để so sánh khi chỉnh số luồng / kích thước batch.
+    """
+    rows = sum(r.rows for r in results)
+    data_bytes = sum(r.stats.data_bytes for r in results)
+    report: Dict[str, Any] = {
+        "report": "clone_run",
+        "version": 1,
+        "options": {
+            "workers": options.workers,
+            "batch_size": options.batch_size,
+            "target_batch_bytes": options.target_batch_bytes,
+            "max_batch_bytes": options.max_batch_bytes,
+            "queue_bytes": options.queue_bytes,
+            "split_large": options.split_large,
+            "commit_batches": options.commit_batches,
+            "delta": options.delta,
+            "truncate": options.truncate,
+        },
+        "elapsed": round(elapsed, 3),
+        "rows": rows,
+        "bytes": data_bytes,
+        "rows_per_sec": round(rows / elapsed, 1) if elapsed > 0 else 0.0,
+        "bytes_per_sec": round(data_bytes / elapsed, 1) if elapsed > 0 else 0.0,
+        "tables": [r.report() for r in results],
+    }
+    report.update(extra)
+    return report
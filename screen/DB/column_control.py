@@ -20,6 +20,11 @@ from screen.DB.backup import BackupRestoreBase
 from core import i18n
 
 APP_TITLE_KEY = "common.app_title"
+DDL_TARGET_RE = re.compile(
+    r"\b(?:ALTER|CREATE|DROP|TRUNCATE)\s+TABLE\s+([\w$#\".]+)|\bRENAME\s+([\w$#\"]+)\s+TO\s+([\w$#\"]+)",
+    re.IGNORECASE,
+)
+DDL_CATALOG_RE = re.compile(r"\b(?:CREATE|DROP)\s+TABLE\b|\bRENAME\s+[\w$#\"]+\s+TO\b", re.IGNORECASE)
 
 
 def _t(key: str, **kwargs) -> str:
@@ -742,8 +747,34 @@ class ColumnControlWindow(BackupRestoreBase):
             messagebox.showwarning(_t(APP_TITLE_KEY), _t("column_ctrl.msg.empty_sql"), parent=self)
             return
         self._append_log(_t("column_ctrl.log.execute"))
-        if self._run_statements(text):
-            self._append_log(_t("column_ctrl.log.execute_done"))
+
+        def on_done(status: str):
+            if status == "success":
+                self._append_log(_t("column_ctrl.log.execute_done"))
+            # DDL đã chạy (kể cả chạy dở) -> metadata cũ không còn đúng
+            self._invalidate_metadata(text)
+
+        if not self._run_statements(text, on_done=on_done):
+            self._invalidate_metadata(text)
+
+    def _invalidate_metadata(self, sql_text: str):
+        """Xóa cache cột/PK của các bảng bị DDL tác động và nạp lại catalog của owner."""
+        tables = set()
+        if self._active_table:
+            tables.add(self._active_table["full"])
+        for match in DDL_TARGET_RE.finditer(sql_text or ""):
+            for name in match.groups():
+                if name:
+                    tables.add(name.replace('"', ""))
+        owners = set()
+        for name in tables:
+            owner, table = db_utils.split_owner_table(name, self.current_owner)
+            db_utils.invalidate_table_metadata(self.conn, f"{owner}.{table}", self.current_owner)
+            self._metadata_cache.pop(f"{owner}.{table}", None)
+            owners.add(owner)
+        if owners and DDL_CATALOG_RE.search(sql_text or ""):
+            # CREATE/DROP/RENAME đổi danh sách bảng -> nạp lại catalog ngầm, không chặn UI
+            db_utils.refresh_schema_catalog(self.conn_info, owners)
 
     # endregion SQL generation & execution
 
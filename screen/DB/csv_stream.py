@@ -0,0 +1,208 @@
+"""
+Đọc CSV theo luồng cho màn hình Restore/Insert: xem trước N dòng đầu, quét phần còn lại
+(đếm dòng, kiểm tra số cột và kiểu dữ liệu) mà không nạp toàn bộ tệp vào bộ nhớ.
+"""
+from __future__ import annotations
+
+import bisect
+import csv
+import itertools
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from screen.DB import db_utils
+
+CSV_ENCODING = "utf-8-sig"
+PREVIEW_ROWS = 1000
+SCAN_PROGRESS_ROWS = 5000
+SCAN_MAX_ISSUES = 200
+
+
+@dataclass
+class CsvPreview:
+    """Header và các dòng đầu của tệp; truncated=True nếu tệp còn dữ liệu phía sau."""
+
+    path: str
+    headers: List[str]
+    rows: List[Dict[str, str]]
+    truncated: bool
+
+
+@dataclass
+class CsvScan:
+    """Kết quả quét toàn tệp; issues là (dòng CSV, mô tả) tối đa SCAN_MAX_ISSUES mục."""
+
+    path: str
+    row_count: int = 0
+    issue_count: int = 0
+    issues: List[Tuple[int, str]] = field(default_factory=list)
+
+    def add_issue(self, line: int, message: str) -> None:
+        self.issue_count += 1
+        if len(self.issues) < SCAN_MAX_ISSUES:
+            self.issues.append((line, message))
+
+
+class LineIndex:
+    """
+    Số dòng trong tệp CSV của bản ghi thứ i (đếm từ 0). Chỉ lưu các điểm bị lệch
+    (dòng trống, ô nhiều dòng) nên không tăng bộ nhớ theo số dòng của tệp.
+    """
+
+    def __init__(self) -> None:
+        self._indexes: List[int] = []
+        self._offsets: List[int] = []
+
+    def add(self, index: int, line: int) -> None:
+        offset = line - index
+        if not self._offsets or self._offsets[-1] != offset:
+            self._indexes.append(index)
+            self._offsets.append(offset)
+
+    def line(self, index: int) -> int:
+        pos = bisect.bisect_right(self._indexes, index) - 1
+        # Chưa ghi nhận: dòng header + đánh số từ 1
+        return index + (self._offsets[pos] if pos >= 0 else 2)
+
+
+def _open(path: str):
+    return open(path, "r", encoding=CSV_ENCODING, newline="")
+
+
+def _header_index(headers: Sequence[str], columns: Sequence[str]) -> List[Optional[int]]:
+    """Vị trí cột CSV ứng với từng cột bảng (so khớp không phân biệt hoa thường)."""
+    positions: Dict[str, int] = {}
+    for idx, head in enumerate(headers):
+        positions.setdefault(str(head or "").strip().upper(), idx)
+    return [positions.get(col.upper()) for col in columns]
+
+
+def read_headers(path: str) -> List[str]:
+    with _open(path) as f:
+        header = next(csv.reader(f), None)
+    if not header:
+        raise ValueError("CSV header is missing")
+    return [h.strip() for h in header]
+
+
+def iter_records(path: str, columns: Sequence[str]) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """
+    Duyệt (số dòng CSV, dict theo cột bảng) từng dòng một; cột thiếu trong tệp nhận "".
+    """
+    with _open(path) as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            return
+        index = _header_index(header, columns)
+        for raw in reader:
+            if not raw:
+                continue
+            record = {
+                col: (raw[pos] if pos is not None and pos < len(raw) else "") for col, pos in zip(columns, index)
+            }
+            yield reader.line_num, record
+
+
+def read_preview(path: str, columns: Sequence[str], limit: int = PREVIEW_ROWS) -> CsvPreview:
+    """Chỉ đọc header và tối đa limit dòng đầu."""
+    headers = read_headers(path)
+    rows: List[Dict[str, str]] = []
+    truncated = False
+    for _, record in iter_records(path, columns):
+        if len(rows) >= limit:
+            truncated = True
+            break
+        rows.append(record)
+    return CsvPreview(path, headers, rows, truncated)
+
+
+def scan_csv(
+    path: str,
+    columns: Sequence[str],
+    column_meta: Optional[Dict[str, Dict[str, Any]]] = None,
+    *,
+    progress: Optional[Callable[[int], None]] = None,
+) -> CsvScan:
+    """
+    Quét toàn bộ tệp: đếm dòng, phát hiện dòng lệch số cột và giá trị không chuyển được
+    sang kiểu của cột (khi có column_meta). progress(số dòng) được gọi định kỳ và có thể
+    raise db_utils.OperationCancelled để dừng.
+    """
+    result = CsvScan(path)
+    converters = db_utils.RowConverter(columns, column_meta).converters if column_meta else []
+    with _open(path) as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            return result
+        width = len(header)
+        index = _header_index(header, columns)
+        for raw in reader:
+            if not raw:
+                continue
+            result.row_count += 1
+            line = reader.line_num
+            if len(raw) != width:
+                result.add_issue(line, f"{len(raw)}/{width} fields")
+            for conv, pos in zip(converters, index):
+                if pos is None or pos >= len(raw):
+                    continue
+                try:
+                    conv(raw[pos])
+                except ValueError as exc:
+                    result.add_issue(line, str(exc))
+                    break
+            if progress is not None and result.row_count % SCAN_PROGRESS_ROWS == 0:
+                progress(result.row_count)
+    if progress is not None:
+        progress(result.row_count)
+    return result
+
+
+@dataclass
+class CsvGridLoad:
+    """Dòng dữ liệu (theo vị trí cột) để nạp vào lưới; total là tổng số dòng của cả tệp."""
+
+    headers: List[str]
+    rows: List[List[str]]
+    total: int = 0
+
+    @property
+    def dropped(self) -> int:
+        return self.total - len(self.rows)
+
+
+def read_grid_rows(
+    path: str,
+    limit: Optional[int] = None,
+    *,
+    has_header: bool = True,
+    progress: Optional[Callable[[int], None]] = None,
+) -> CsvGridLoad:
+    """
+    Giữ tối đa limit dòng đầu (theo vị trí cột) và vẫn đọc hết tệp để đếm tổng số dòng.
+    progress(số dòng) được gọi định kỳ và có thể raise db_utils.OperationCancelled để dừng.
+    """
+    result = CsvGridLoad([], [])
+    with _open(path) as f:
+        reader = csv.reader(f)
+        first = next(reader, None)
+        if first is None:
+            return result
+        if has_header:
+            result.headers = [h.strip() for h in first]
+            pending: List[List[str]] = []
+        else:
+            pending = [first]
+        for raw in itertools.chain(pending, reader):
+            if not raw:
+                continue
+            result.total += 1
+            if limit is None or len(result.rows) < limit:
+                result.rows.append(raw)
+            if progress is not None and result.total % SCAN_PROGRESS_ROWS == 0:
+                progress(result.total)
+    if progress is not None:
+        progress(result.total)
+    return result
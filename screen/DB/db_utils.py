@@ -4,14 +4,21 @@ Helper utilities for Oracle database access used by Insert/Update screens.
 """
 from __future__ import annotations
 
+import atexit
 import contextlib
+import copy
 import datetime as _dt
+import decimal
 import inspect
+import itertools
+import json
 import os
 import re
 import threading
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 
 try:
     import cryptography  # type: ignore  # noqa: F401  # ensure thin mode dependency is bundled
@@ -23,6 +30,7 @@ except Exception:
 from screen.DB import cmd_sql_plus
 
 _Driver = Any
+ProgressCallback = Callable[[int], None]
 
 SYSTEM_SCHEMAS: set[str] = {
     "SYS",
@@ -78,6 +86,14 @@ class OracleDriverNotAvailable(RuntimeError):
     """Raised when oracledb / cx_Oracle driver cannot be imported."""
 
 
+class OperationCancelled(Exception):
+    """Raised from a progress callback to stop a long DML; result holds the partial outcome."""
+
+    def __init__(self, message: str = "cancelled", result: Any = None) -> None:
+        super().__init__(message)
+        self.result = result
+
+
 _THICK_INIT_LOCK = threading.Lock()
 _THICK_INIT_DONE = False
 _THICK_INIT_ERROR: Optional[str] = None
@@ -229,6 +245,28 @@ def _should_retry_with_thick(exc: Exception) -> bool:
     return "DPY-3015" in message or "password verifier type" in message
 
 
+# Lỗi cho thấy thông tin kết nối/đăng nhập của pool không còn dùng được
+# (sai mật khẩu, tài khoản khóa, sai DSN/listener). Hết chờ session khi pool đầy thì không thuộc nhóm này.
+_POOL_FATAL_ERRORS = (
+    "ORA-01017",
+    "ORA-28000",
+    "ORA-28001",
+    "ORA-12154",
+    "ORA-12505",
+    "ORA-12514",
+    "ORA-12541",
+    "DPY-4011",
+    "DPY-4027",
+    "DPY-6005",
+    "DPI-1047",
+)
+
+
+def _is_pool_fatal_error(exc: Exception) -> bool:
+    message = str(exc)
+    return _should_retry_with_thick(exc) or any(code in message for code in _POOL_FATAL_ERRORS)
+
+
 def connect_oracle(
     user: str,
     password: str,
@@ -268,6 +306,312 @@ def connect_oracle(
         raise
 
 
+SESSION_POOL_DEFAULTS: Dict[str, int] = {
+    "min": 1,
+    "max": 4,
+    "increment": 1,
+    # Giây: session rảnh lâu hơn mức này (ngoài số min) sẽ bị đóng.
+    "idle_timeout": 300,
+    # Giây: session rảnh lâu hơn mức này sẽ được ping trước khi giao lại.
+    "ping_interval": 60,
+    # Mili giây chờ khi pool đã đạt max.
+    "wait_timeout": 30000,
+}
+# Mỗi cửa sổ giữ session suốt thời gian mở -> pool tự nới max theo số session đang mượn
+# cộng thêm bấy nhiêu session dự phòng (vd. cho luồng làm mới catalog).
+SESSION_POOL_HEADROOM = 1
+
+
+def _filter_kwargs(func: Any, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Drop keyword arguments that the driver callable does not accept.
+    """
+    try:
+        params = inspect.signature(func).parameters
+    except (TypeError, ValueError):
+        return kwargs
+    if any(p.kind == inspect.Parameter.VAR_KEYWORD for p in params.values()):
+        return kwargs
+    return {k: v for k, v in kwargs.items() if k in params}
+
+
+class SessionManager:
+    """
+    Process-wide registry of driver session pools keyed by (USER, DSN).
+    Screens acquire a warm session instead of opening a new connection; max grows with
+    the number of sessions held, so "max" is a starting size rather than a hard limit.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pools: Dict[Tuple[str, str], Any] = {}
+        self._passwords: Dict[Tuple[str, str], str] = {}
+        self._pooled: Dict[int, Any] = {}
+        # Pool đã bị thay (đổi mật khẩu/lỗi đăng nhập) nhưng còn session đang mượn:
+        # chỉ đóng khi session cuối cùng được trả về.
+        self._retired: List[Any] = []
+        self._capacity: Dict[Tuple[str, str], int] = {}
+        self._options: Dict[str, int] = dict(SESSION_POOL_DEFAULTS)
+
+    def configure(self, options: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Update pool sizing options; applies to pools created afterwards.
+        """
+        if not options:
+            return
+        with self._lock:
+            for key, value in options.items():
+                if key not in SESSION_POOL_DEFAULTS:
+                    continue
+                try:
+                    self._options[key] = max(0, int(value))
+                except (TypeError, ValueError):
+                    continue
+            self._options["max"] = max(1, self._options["max"], self._options["min"])
+
+    def _create_pool(
+        self, driver: _Driver, key: Tuple[str, str], user: str, password: str, encoding: str
+    ) -> Any:
+        opts = self._options
+        kwargs: Dict[str, Any] = {
+            "user": user,
+            "password": password,
+            "dsn": key[1],
+            "min": opts["min"],
+            "max": max(opts["max"], self._capacity.get(key, 0)),
+            "increment": max(1, opts["increment"]),
+            "timeout": opts["idle_timeout"],
+            "ping_interval": opts["ping_interval"],
+            "wait_timeout": opts["wait_timeout"],
+            "encoding": encoding,
+        }
+        if getattr(driver, "__name__", "") == "oracledb":
+            factory = driver.create_pool
+            kwargs["getmode"] = driver.POOL_GETMODE_TIMEDWAIT
+            kwargs.pop("encoding")
+        else:
+            factory = driver.SessionPool
+            kwargs["getmode"] = getattr(driver, "SPOOL_ATTRVAL_TIMEDWAIT", None)
+            kwargs["threaded"] = True
+            if kwargs["getmode"] is None:
+                kwargs.pop("getmode")
+        return factory(**_filter_kwargs(factory, kwargs))
+
+    def _get_pool(self, driver: _Driver, key: Tuple[str, str], user: str, password: str, encoding: str) -> Any:
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is not None and self._passwords.get(key) != password:
+                # Mật khẩu đổi -> pool mới cho các lần mượn sau, pool cũ đóng khi hết session đang dùng
+                self._pools.pop(key, None)
+                self._retire_pool_locked(pool)
+                pool = None
+            if pool is None:
+                pool = self._create_pool(driver, key, user, password, encoding)
+                self._pools[key] = pool
+                self._passwords[key] = password
+            return pool
+
+    def _busy_locked(self, pool: Any) -> bool:
+        return any(owner is pool for owner in self._pooled.values())
+
+    def _retire_pool_locked(self, pool: Any) -> None:
+        """
+        Đóng pool nếu không còn session nào đang được mượn, ngược lại hoãn tới lần release cuối.
+        """
+        if self._busy_locked(pool):
+            self._retired.append(pool)
+        else:
+            self._close_pool(pool)
+
+    def _discard_pool(self, key: Tuple[str, str]) -> None:
+        with self._lock:
+            pool = self._pools.pop(key, None)
+            self._passwords.pop(key, None)
+            if pool is not None:
+                self._retire_pool_locked(pool)
+
+    @staticmethod
+    def _close_pool(pool: Any, force: bool = False) -> None:
+        try:
+            pool.close(force=force)
+        except TypeError:
+            with contextlib.suppress(Exception):
+                pool.close()
+        except Exception:
+            pass
+
+    def ensure_capacity(
+        self,
+        user: str,
+        host: str,
+        port: str,
+        alias_or_service: str,
+        use_host_port: bool,
+        sessions: int,
+    ) -> None:
+        """
+        Make sure the pool for user/DSN can hand out at least `sessions` sessions at once.
+        An existing pool is reconfigured when the driver supports it.
+        """
+        dsn = build_dsn(host, port, alias_or_service, use_host_port)
+        key = (str(user or "").upper(), dsn)
+        with self._lock:
+            self._grow_locked(key, max(1, int(sessions)))
+
+    def _grow_locked(self, key: Tuple[str, str], sessions: int) -> None:
+        if sessions <= max(self._capacity.get(key, 0), self._options["max"]):
+            return
+        self._capacity[key] = sessions
+        pool = self._pools.get(key)
+        if pool is None or int(getattr(pool, "max", sessions) or 0) >= sessions:
+            return
+        reconfigure = getattr(pool, "reconfigure", None)
+        if reconfigure is not None:
+            try:
+                reconfigure(max=sessions)
+                return
+            except Exception:
+                pass
+        # Driver không đổi được max -> tạo pool mới lớn hơn ở lần mượn kế tiếp
+        self._pools.pop(key, None)
+        self._passwords.pop(key, None)
+        self._retire_pool_locked(pool)
+
+    def _reserve_locked(self, key: Tuple[str, str]) -> None:
+        """
+        Grow the pool before a borrow so open screens never wait for each other's sessions.
+        """
+        pool = self._pools.get(key)
+        in_use = sum(1 for owner in self._pooled.values() if owner is pool) if pool is not None else 0
+        self._grow_locked(key, in_use + 1 + SESSION_POOL_HEADROOM)
+
+    def acquire(
+        self,
+        user: str,
+        password: str,
+        host: str,
+        port: str,
+        alias_or_service: str,
+        use_host_port: bool,
+        encoding: str = "UTF-8",
+    ) -> Any:
+        """
+        Return a pooled session for the credentials, creating the pool on first use.
+        Falls back to a standalone connection when the driver has no pooling.
+        """
+        driver = load_driver()
+        if not (hasattr(driver, "create_pool") or hasattr(driver, "SessionPool")):
+            return connect_oracle(user, password, host, port, alias_or_service, use_host_port, encoding)
+        dsn = build_dsn(host, port, alias_or_service, use_host_port)
+        key = (str(user or "").upper(), dsn)
+        with self._lock:
+            self._reserve_locked(key)
+        try:
+            conn = self._get_pool(driver, key, user, password, encoding).acquire()
+        except Exception as exc:
+            # Hết chờ khi pool đầy không làm hỏng pool; chỉ bỏ pool khi lỗi kết nối/đăng nhập
+            if _is_pool_fatal_error(exc):
+                self._discard_pool(key)
+            if getattr(driver, "__name__", "") != "oracledb" or not _should_retry_with_thick(exc):
+                raise
+            try:
+                _ensure_thick_mode(driver)
+            except Exception as thick_exc:
+                raise RuntimeError(f"{exc}\n{thick_exc}") from exc
+            conn = self._get_pool(driver, key, user, password, encoding).acquire()
+        with self._lock:
+            self._pooled[id(conn)] = self._pools.get(key)
+        return conn
+
+    def release(self, conn: Any) -> None:
+        """
+        Return a session to its pool (rolling back open work) or close it.
+        """
+        if conn is None:
+            return
+        with self._lock:
+            pool = self._pooled.pop(id(conn), None)
+        if pool is None:
+            conn.close()
+            return
+        try:
+            pool.release(conn)
+        except Exception:
+            # Pool đã đóng hoặc session hỏng -> đóng hẳn session
+            with contextlib.suppress(Exception):
+                conn.close()
+            raise
+        finally:
+            with self._lock:
+                if pool in self._retired and not self._busy_locked(pool):
+                    self._retired.remove(pool)
+                    self._close_pool(pool)
+
+    def close_all(self) -> None:
+        """
+        Close every pool; used when the application exits.
+        """
+        with self._lock:
+            pools = list(self._pools.values()) + self._retired
+            self._pools.clear()
+            self._passwords.clear()
+            self._pooled.clear()
+            self._retired = []
+            self._capacity.clear()
+        for pool in pools:
+            self._close_pool(pool, force=True)
+
+
+_SESSION_MANAGER = SessionManager()
+atexit.register(_SESSION_MANAGER.close_all)
+
+
+def configure_session_pool(options: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Apply pool options (min, max, increment, idle_timeout, ping_interval, wait_timeout).
+    """
+    _SESSION_MANAGER.configure(options)
+
+
+def acquire_connection(
+    user: str,
+    password: str,
+    host: str,
+    port: str,
+    alias_or_service: str,
+    use_host_port: bool,
+    encoding: str = "UTF-8",
+):
+    """
+    Get a session from the shared pool for user/DSN (same arguments as connect_oracle).
+    """
+    return _SESSION_MANAGER.acquire(user, password, host, port, alias_or_service, use_host_port, encoding)
+
+
+def ensure_session_capacity(
+    user: str,
+    host: str,
+    port: str,
+    alias_or_service: str,
+    use_host_port: bool,
+    sessions: int,
+) -> None:
+    """
+    Grow the shared pool for user/DSN so that `sessions` sessions can be held at once.
+    """
+    _SESSION_MANAGER.ensure_capacity(user, host, port, alias_or_service, use_host_port, sessions)
+
+
+def release_connection(conn) -> None:
+    """
+    Give a session obtained via acquire_connection back to its pool.
+    """
+    _SESSION_MANAGER.release(conn)
+
+
+def close_session_pools() -> None:
+    _SESSION_MANAGER.close_all()
+
 def _split_owner_table(raw_name: str, default_owner: str) -> tuple[str, str]:
     if "." in raw_name:
         owner, table = raw_name.split(".", 1)
@@ -282,21 +626,194 @@ def split_owner_table(raw_name: str, default_owner: str) -> tuple[str, str]:
     return _split_owner_table(raw_name, default_owner)
 
 
-def fetch_accessible_tables(
-    conn,
-    *,
-    include_owner: bool = True,
-    exclude_system: bool = True,
-    limit: int | None = None,
-) -> List[str]:
+METADATA_CACHE_TTL = 600.0
+METADATA_SAVE_INTERVAL = 5.0
+
+
+def connection_dsn(conn) -> str:
     """
-    Return list of accessible tables for the current user.
-    Format: OWNER.TABLE when include_owner=True, else just table name.
+    Return the DSN string a connection was opened with (used as cache key).
     """
+    return str(getattr(conn, "dsn", "") or "")
+
+
+class MetadataCache:
+    """
+    Thread-safe TTL cache of column / primary-key metadata keyed by (DSN, OWNER, TABLE).
+    Optionally mirrored to a JSON file so it survives restarts.
+    """
+
+    def __init__(self, ttl: float = METADATA_CACHE_TTL) -> None:
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._entries: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self._path: Optional[Path] = None
+        self._dirty = False
+        self._last_save = 0.0
+
+    @staticmethod
+    def _file_key(key: Tuple[str, str, str]) -> str:
+        return "|".join(key)
+
+    def is_fresh(self, stamp: float) -> bool:
+        """
+        True when a value stored at `stamp` (epoch seconds) has not expired yet.
+        """
+        return self.ttl <= 0 or (time.time() - stamp) < self.ttl
+
+    def get(self, key: Tuple[str, str, str], kind: str) -> Optional[Any]:
+        """
+        Return a cached value ("columns" / "pk") or None when missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry or kind not in entry:
+                return None
+            value, stamp = entry[kind]
+            if not self.is_fresh(stamp):
+                entry.pop(kind, None)
+                return None
+            return copy.deepcopy(value)
+
+    def put(self, key: Tuple[str, str, str], kind: str, value: Any) -> None:
+        with self._lock:
+            self._entries.setdefault(key, {})[kind] = (copy.deepcopy(value), time.time())
+            self._dirty = True
+            if self._path and time.time() - self._last_save >= METADATA_SAVE_INTERVAL:
+                self.save()
+
+    def replace_owner(self, dsn: str, owner: str, tables: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Store {TABLE: {kind: value}} for one owner and drop that owner's tables not listed
+        (dropped or renamed since the last load).
+        """
+        owner = owner.upper()
+        now = time.time()
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == dsn and k[1] == owner and k[2] not in tables]:
+                self._entries.pop(key, None)
+            for table, kinds in tables.items():
+                entry = self._entries.setdefault((dsn, owner, table), {})
+                for kind, value in kinds.items():
+                    entry[kind] = (copy.deepcopy(value), now)
+            self._dirty = True
+            if self._path and now - self._last_save >= METADATA_SAVE_INTERVAL:
+                self.save()
+
+    def invalidate(self, dsn: Optional[str] = None, owner: Optional[str] = None, table: Optional[str] = None) -> int:
+        """
+        Drop entries matching the given DSN / owner / table (None matches all).
+        """
+        owner = owner.upper() if owner else None
+        table = table.upper() if table else None
+        with self._lock:
+            doomed = [
+                key
+                for key in self._entries
+                if (dsn is None or key[0] == dsn) and (owner is None or key[1] == owner) and (table is None or key[2] == table)
+            ]
+            for key in doomed:
+                self._entries.pop(key, None)
+            if doomed:
+                self._dirty = True
+                if self._path:
+                    self.save()
+            return len(doomed)
+
+    def enable_persistence(self, path: os.PathLike | str) -> None:
+        """
+        Load previously saved metadata from path and keep it in sync afterwards.
+        """
+        with self._lock:
+            self._path = Path(path)
+            try:
+                data = json.loads(self._path.read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                return
+            except Exception:
+                return
+            for raw_key, kinds in (data.get("entries") or {}).items():
+                parts = tuple(raw_key.split("|", 2))
+                if len(parts) != 3 or not isinstance(kinds, dict):
+                    continue
+                for kind, payload in kinds.items():
+                    try:
+                        value, stamp = payload["value"], float(payload["ts"])
+                    except (KeyError, TypeError, ValueError):
+                        continue
+                    if self.is_fresh(stamp):
+                        self._entries.setdefault(parts, {})[kind] = (value, stamp)
+
+    def save(self) -> None:
+        """
+        Write the cache to disk (no-op when persistence is disabled or nothing changed).
+        """
+        with self._lock:
+            if not self._path or not self._dirty:
+                return
+            payload = {
+                "entries": {
+                    self._file_key(key): {kind: {"value": value, "ts": stamp} for kind, (value, stamp) in kinds.items()}
+                    for key, kinds in self._entries.items()
+                }
+            }
+            try:
+                self._path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self._path.with_suffix(self._path.suffix + ".tmp")
+                tmp_path.write_text(json.dumps(payload, ensure_ascii=False, default=str), encoding="utf-8")
+                os.replace(tmp_path, self._path)
+            except Exception:
+                return
+            self._dirty = False
+            self._last_save = time.time()
+
+
+_METADATA_CACHE = MetadataCache()
+atexit.register(_METADATA_CACHE.save)
+
+
+def configure_metadata_cache(ttl: Optional[float] = None, persist_path: Optional[os.PathLike | str] = None) -> None:
+    """
+    Set the metadata TTL (seconds, <= 0 disables expiry) and optional on-disk file.
+    """
+    if ttl is not None:
+        _METADATA_CACHE.ttl = float(ttl)
+    if persist_path:
+        _METADATA_CACHE.enable_persistence(persist_path)
+
+
+def invalidate_table_metadata(conn=None, table_name: Optional[str] = None, default_owner: str = "") -> int:
+    """
+    Forget cached metadata for one table (or everything on the connection's DSN when table_name is None).
+    """
+    dsn = connection_dsn(conn) if conn is not None else None
+    if not table_name:
+        return _METADATA_CACHE.invalidate(dsn=dsn)
+    owner, table = _split_owner_table(table_name, default_owner)
+    return _METADATA_CACHE.invalidate(dsn=dsn, owner=owner, table=table)
+
+CATALOG_ARRAYSIZE = 5000
+# Làm mới catalog trước khi hết TTL của metadata cache (tỉ lệ so với TTL)
+CATALOG_REFRESH_RATIO = 0.8
+CATALOG_REFRESH_MIN_INTERVAL = 60.0
+
+_CATALOG_LOCK = threading.Lock()
+# (DSN, USER) -> ([(OWNER, TABLE), ...], loaded_at)
+_CATALOG_TABLES: Dict[Tuple[str, str], Tuple[List[Tuple[str, str]], float]] = {}
+
+
+def _tune_catalog_cursor(cur) -> None:
+    """
+    Stream dictionary queries in large round trips.
+    """
+    cur.arraysize = CATALOG_ARRAYSIZE
+    with contextlib.suppress(Exception):
+        cur.prefetchrows = CATALOG_ARRAYSIZE + 1
+
+
+def _query_accessible_tables(conn, cur) -> List[Tuple[str, str]]:
     user = getattr(conn, "username", None)
     owner = str(user or "").upper()
-    tables: List[str] = []
-
     queries = [
         ("SELECT table_name FROM user_tables ORDER BY table_name", ()),
         (
@@ -309,46 +826,304 @@ def fetch_accessible_tables(
             {},
         ),
     ]
-
-    seen: set[str] = set()
-    with contextlib.closing(conn.cursor()) as cur:
-        for sql, params in queries:
-            try:
-                cur.execute(sql, params)
-            except Exception:
+    pairs: List[Tuple[str, str]] = []
+    seen: set[Tuple[str, str]] = set()
+    for sql, params in queries:
+        try:
+            cur.execute(sql, params)
+        except Exception:
+            continue
+        for row in cur:
+            if len(row) == 1:
+                tbl_owner = owner
+                tbl_name = row[0]
+            else:
+                tbl_owner, tbl_name = row[0], row[1]
+            if not tbl_name:
                 continue
-            for row in cur:
-                if len(row) == 1:
-                    tbl_owner = owner
-                    tbl_name = row[0]
-                else:
-                    tbl_owner, tbl_name = row[0], row[1]
-                if not tbl_name:
-                    continue
-                ow = str(tbl_owner or owner).upper()
-                tb = str(tbl_name).upper()
-                if exclude_system and ow in SYSTEM_SCHEMAS:
-                    continue
-                key = f"{ow}.{tb}"
-                if key in seen:
-                    continue
-                seen.add(key)
-                tables.append(key if include_owner else tb)
-                if limit and len(tables) >= limit:
-                    return tables
+            pair = (str(tbl_owner or owner).upper(), str(tbl_name).upper())
+            if pair in seen:
+                continue
+            seen.add(pair)
+            pairs.append(pair)
+    return pairs
+
+
+def _catalog_key(conn) -> Tuple[str, str]:
+    return connection_dsn(conn), str(getattr(conn, "username", "") or "").upper()
+
+
+def fetch_accessible_tables(
+    conn,
+    *,
+    include_owner: bool = True,
+    exclude_system: bool = True,
+    limit: int | None = None,
+    use_cache: bool = True,
+) -> List[str]:
+    """
+    Return list of accessible tables for the current user.
+    Format: OWNER.TABLE when include_owner=True, else just table name.
+    Served from the prefetched schema catalog while it is fresh.
+    """
+    key = _catalog_key(conn)
+    pairs: Optional[List[Tuple[str, str]]] = None
+    if use_cache:
+        with _CATALOG_LOCK:
+            cached = _CATALOG_TABLES.get(key)
+        if cached and _METADATA_CACHE.is_fresh(cached[1]):
+            pairs = cached[0]
+    if pairs is None:
+        with contextlib.closing(conn.cursor()) as cur:
+            pairs = _query_accessible_tables(conn, cur)
+        with _CATALOG_LOCK:
+            _CATALOG_TABLES[key] = (pairs, time.time())
+
+    tables: List[str] = []
+    for ow, tb in pairs:
+        if exclude_system and ow in SYSTEM_SCHEMAS:
+            continue
+        tables.append(f"{ow}.{tb}" if include_owner else tb)
+        if limit and len(tables) >= limit:
+            return tables
     tables.sort()
     return tables
 
 
-def fetch_table_columns(conn, table_name: str, default_owner: str) -> List[Dict[str, Any]]:
+def load_schema_catalog(conn, owners: Optional[Iterable[str]] = None) -> Dict[str, int]:
+    """
+    Prefetch table list, columns and primary keys for whole owners in a few set-based queries.
+    Results feed the metadata cache used by fetch_table_columns / fetch_primary_keys /
+    fetch_accessible_tables. Returns simple counters for logging.
+    """
+    dsn = connection_dsn(conn)
+    user = str(getattr(conn, "username", "") or "").upper()
+    owner_list = sorted({str(o).upper() for o in (owners or [user]) if o})
+    stats = {"tables": 0, "columns": 0, "pk_tables": 0}
+    with contextlib.closing(conn.cursor()) as cur:
+        _tune_catalog_cursor(cur)
+        pairs = _query_accessible_tables(conn, cur)
+        with _CATALOG_LOCK:
+            _CATALOG_TABLES[(dsn, user)] = (pairs, time.time())
+        stats["tables"] = len(pairs)
+
+        for owner in owner_list:
+            columns: Dict[str, List[Dict[str, Any]]] = {}
+            cur.execute(
+                "SELECT table_name, column_name, data_type, data_length, data_precision, data_scale, nullable, column_id "
+                "FROM all_tab_columns WHERE owner = :owner ORDER BY table_name, column_id",
+                {"owner": owner},
+            )
+            while True:
+                rows = cur.fetchmany()
+                if not rows:
+                    break
+                for row in rows:
+                    columns.setdefault(str(row[0]).upper(), []).append(
+                        {
+                            "column_name": str(row[1]),
+                            "data_type": str(row[2]),
+                            "data_length": row[3],
+                            "data_precision": row[4],
+                            "data_scale": row[5],
+                            "nullable": (str(row[6]).upper() != "N"),
+                            "column_id": row[7],
+                        }
+                    )
+
+            pks: Dict[str, List[str]] = {}
+            cur.execute(
+                "SELECT ac.table_name, acc.column_name FROM all_constraints ac "
+                "JOIN all_cons_columns acc "
+                "ON ac.owner = acc.owner AND ac.constraint_name = acc.constraint_name "
+                "WHERE ac.constraint_type = 'P' AND ac.owner = :owner "
+                "ORDER BY ac.table_name, acc.position",
+                {"owner": owner},
+            )
+            while True:
+                rows = cur.fetchmany()
+                if not rows:
+                    break
+                for row in rows:
+                    pks.setdefault(str(row[0]).upper(), []).append(str(row[1]))
+
+            _METADATA_CACHE.replace_owner(
+                dsn,
+                owner,
+                {table: {"columns": cols, "pk": pks.get(table, [])} for table, cols in columns.items()},
+            )
+            stats["columns"] += sum(len(cols) for cols in columns.values())
+            stats["pk_tables"] += len(pks)
+    return stats
+
+
+def _conn_info_key(conn_info: Dict[str, Any]) -> Tuple[str, str]:
+    dsn = build_dsn(
+        conn_info.get("host", ""),
+        conn_info.get("port", ""),
+        conn_info.get("alias", ""),
+        bool(conn_info.get("use_host_port")),
+    )
+    return str(conn_info.get("user", "") or "").upper(), dsn
+
+
+def catalog_refresh_interval() -> float:
+    """
+    Seconds between background catalog reloads, derived from the metadata cache TTL.
+    """
+    ttl = _METADATA_CACHE.ttl if _METADATA_CACHE.ttl > 0 else METADATA_CACHE_TTL
+    return max(CATALOG_REFRESH_MIN_INTERVAL, ttl * CATALOG_REFRESH_RATIO)
+
+
+class CatalogRefresher:
+    """
+    Daemon thread that keeps schema catalogs warm for connected screens.
+    Each refresh borrows its own pooled session, so screens are never blocked.
+    """
+
+    def __init__(self, interval: Optional[float] = None) -> None:
+        # None: theo TTL hiện tại của metadata cache (configure_metadata_cache có thể đổi lúc chạy)
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._targets: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, conn_info: Dict[str, Any], owners: Optional[Iterable[str]] = None) -> None:
+        key = _conn_info_key(conn_info)
+        with self._lock:
+            target = self._targets.get(key)
+            if target is None:
+                target = {"info": dict(conn_info), "owners": set(), "refs": 0, "next": 0.0}
+                self._targets[key] = target
+            target["refs"] += 1
+            target["owners"].update(str(o).upper() for o in (owners or [key[0]]) if o)
+            if not self._thread or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="ToolVIP-catalog", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def unregister(self, conn_info: Dict[str, Any]) -> None:
+        key = _conn_info_key(conn_info)
+        with self._lock:
+            target = self._targets.get(key)
+            if target is None:
+                return
+            target["refs"] -= 1
+            if target["refs"] <= 0:
+                self._targets.pop(key, None)
+
+    def _interval(self) -> float:
+        return self.interval if self.interval is not None else catalog_refresh_interval()
+
+    def refresh_now(self, conn_info: Dict[str, Any], owners: Optional[Iterable[str]] = None) -> None:
+        """
+        Reload the given owners on the next loop instead of waiting for the interval.
+        Unregistered connections get a one-shot reload on a separate daemon thread.
+        """
+        key = _conn_info_key(conn_info)
+        owner_set = {str(o).upper() for o in (owners or [key[0]]) if o}
+        with self._lock:
+            target = self._targets.get(key)
+            if target is not None:
+                target["owners"].update(owner_set)
+                target["next"] = 0.0
+        if target is None:
+            threading.Thread(
+                target=self._refresh_once,
+                args=(dict(conn_info), owner_set),
+                name="ToolVIP-catalog-once",
+                daemon=True,
+            ).start()
+            return
+        self._wake.set()
+
+    def _refresh_once(self, info: Dict[str, Any], owners: Iterable[str]) -> None:
+        with contextlib.suppress(Exception):
+            self._refresh(info, owners)
+
+    def _refresh(self, info: Dict[str, Any], owners: Iterable[str]) -> None:
+        conn = acquire_connection(
+            info.get("user", ""),
+            info.get("password", ""),
+            info.get("host", ""),
+            info.get("port", ""),
+            info.get("alias", ""),
+            bool(info.get("use_host_port")),
+        )
+        try:
+            load_schema_catalog(conn, owners)
+        finally:
+            with contextlib.suppress(Exception):
+                release_connection(conn)
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if not self._targets:
+                    self._thread = None
+                    return
+                now = time.time()
+                due = [(key, dict(t["info"]), set(t["owners"])) for key, t in self._targets.items() if t["next"] <= now]
+            for key, info, owners in due:
+                try:
+                    self._refresh(info, owners)
+                    delay = self._interval()
+                except Exception:
+                    # Lỗi mạng/quyền: thử lại sau, các hàm fetch_* vẫn tự truy vấn khi cần
+                    delay = min(self._interval(), 60.0)
+                with self._lock:
+                    target = self._targets.get(key)
+                    if target is not None:
+                        target["next"] = time.time() + delay
+            with self._lock:
+                pending = [t["next"] for t in self._targets.values()]
+            wait = max(1.0, min(pending) - time.time()) if pending else 1.0
+            self._wake.wait(wait)
+            self._wake.clear()
+
+
+_CATALOG_REFRESHER = CatalogRefresher()
+
+
+def start_catalog_refresh(conn_info: Dict[str, Any], owners: Optional[Iterable[str]] = None) -> None:
+    """
+    Prefetch the owner's catalog in the background and keep refreshing it while registered.
+    """
+    _CATALOG_REFRESHER.register(conn_info, owners)
+
+
+def stop_catalog_refresh(conn_info: Dict[str, Any]) -> None:
+    _CATALOG_REFRESHER.unregister(conn_info)
+
+
+def refresh_schema_catalog(conn_info: Dict[str, Any], owners: Optional[Iterable[str]] = None) -> None:
+    """
+    Reload the owners' catalog in the background right away, e.g. after CREATE/DROP TABLE.
+    """
+    _CATALOG_REFRESHER.refresh_now(conn_info, owners)
+
+
+def fetch_table_columns(
+    conn,
+    table_name: str,
+    default_owner: str,
+    *,
+    use_cache: bool = True,
+) -> List[Dict[str, Any]]:
     owner, table = _split_owner_table(table_name, default_owner)
+    cache_key = (connection_dsn(conn), owner, table)
+    if use_cache:
+        cached = _METADATA_CACHE.get(cache_key, "columns")
+        if cached is not None:
+            return cached
     sql = (
         "SELECT column_name, data_type, data_length, data_precision, data_scale, nullable, column_id "
         "FROM all_tab_columns WHERE owner = :owner AND table_name = :tbl ORDER BY column_id"
     )
     with contextlib.closing(conn.cursor()) as cur:
         cur.execute(sql, {"owner": owner, "tbl": table})
-        return [
+        columns = [
             {
                 "column_name": str(row[0]),
                 "data_type": str(row[1]),
@@ -360,10 +1135,24 @@ def fetch_table_columns(conn, table_name: str, default_owner: str) -> List[Dict[
             }
             for row in cur
         ]
+    if columns:
+        _METADATA_CACHE.put(cache_key, "columns", columns)
+    return columns
 
 
-def fetch_primary_keys(conn, table_name: str, default_owner: str) -> List[str]:
+def fetch_primary_keys(
+    conn,
+    table_name: str,
+    default_owner: str,
+    *,
+    use_cache: bool = True,
+) -> List[str]:
     owner, table = _split_owner_table(table_name, default_owner)
+    cache_key = (connection_dsn(conn), owner, table)
+    if use_cache:
+        cached = _METADATA_CACHE.get(cache_key, "pk")
+        if cached is not None:
+            return cached
     sql = (
         "SELECT acc.column_name FROM all_constraints ac "
         "JOIN all_cons_columns acc "
@@ -373,7 +1162,53 @@ def fetch_primary_keys(conn, table_name: str, default_owner: str) -> List[str]:
     )
     with contextlib.closing(conn.cursor()) as cur:
         cur.execute(sql, {"owner": owner, "tbl": table})
-        return [str(row[0]) for row in cur]
+        pk_columns = [str(row[0]) for row in cur]
+    _METADATA_CACHE.put(cache_key, "pk", pk_columns)
+    return pk_columns
+
+
+@dataclass
+class ForeignKey:
+    """
+    One enabled FK constraint: columns of the child table -> ref_columns of the parent.
+    """
+
+    name: str
+    columns: List[str]
+    ref_owner: str
+    ref_table: str
+    ref_columns: List[str]
+
+    @property
+    def ref_source(self) -> str:
+        return f"{self.ref_owner}.{self.ref_table}"
+
+
+def fetch_foreign_keys(conn, table_name: str, default_owner: str) -> List[ForeignKey]:
+    """
+    Enabled foreign keys declared on table_name, columns in constraint order.
+    """
+    owner, table = _split_owner_table(table_name, default_owner)
+    sql = (
+        "SELECT ac.constraint_name, acc.column_name, rc.owner, rc.table_name, rcc.column_name "
+        "FROM all_constraints ac "
+        "JOIN all_cons_columns acc ON acc.owner = ac.owner AND acc.constraint_name = ac.constraint_name "
+        "JOIN all_constraints rc ON rc.owner = ac.r_owner AND rc.constraint_name = ac.r_constraint_name "
+        "JOIN all_cons_columns rcc ON rcc.owner = rc.owner AND rcc.constraint_name = rc.constraint_name "
+        "AND rcc.position = acc.position "
+        "WHERE ac.constraint_type = 'R' AND ac.status = 'ENABLED' AND ac.owner = :owner AND ac.table_name = :tbl "
+        "ORDER BY ac.constraint_name, acc.position"
+    )
+    keys: Dict[str, ForeignKey] = {}
+    with contextlib.closing(conn.cursor()) as cur:
+        cur.execute(sql, {"owner": owner, "tbl": table})
+        for name, column, ref_owner, ref_table, ref_column in cur:
+            fk = keys.get(name)
+            if fk is None:
+                fk = keys[name] = ForeignKey(str(name), [], str(ref_owner), str(ref_table), [])
+            fk.columns.append(str(column))
+            fk.ref_columns.append(str(ref_column))
+    return list(keys.values())
 
 
 def format_sql_literal(value: Any, column_meta: Optional[Dict[str, Any]] = None) -> str:
@@ -428,75 +1263,516 @@ def _try_parse_datetime(value: str, prefer_date: bool) -> Tuple[Optional[_dt.dat
     return None, "", ""
 
 
+PK_LOOKUP_CHUNK = 500
+DML_CHUNK_SIZE = 1000
+INSERT_COMMIT_INTERVAL = 10000
+
+
+def _key_kind(value: Any) -> str:
+    if isinstance(value, (_dt.datetime, _dt.date)):
+        return "datetime"
+    if isinstance(value, (int, float, decimal.Decimal)) and not isinstance(value, bool):
+        return "number"
+    return "text"
+
+
+def _normalize_key_value(value: Any, kind: str) -> Any:
+    """
+    Normalise a PK component so grid strings and driver values compare equal.
+    """
+    if value is None:
+        return None
+    if kind == "number":
+        try:
+            return decimal.Decimal(str(value).strip()).normalize()
+        except (decimal.InvalidOperation, ValueError):
+            return str(value).strip()
+    if kind == "datetime":
+        if isinstance(value, _dt.datetime):
+            return value
+        if isinstance(value, _dt.date):
+            return _dt.datetime.combine(value, _dt.time())
+        parsed, _, _ = _try_parse_datetime(str(value), prefer_date=False)
+        return parsed or str(value).strip()
+    return str(value).strip() if isinstance(value, str) else str(value)
+
+
 def fetch_rows_by_pk(
     conn,
     table_name: str,
     default_owner: str,
     pk_columns: Sequence[str],
     keys: Iterable[Sequence[Any]],
+    *,
+    chunk_size: int = PK_LOOKUP_CHUNK,
 ) -> Dict[Tuple[Any, ...], Dict[str, Any]]:
     """
-    Fetch rows identified by PK combinations.
-    Returns mapping from PK tuple to {column: value}.
+    Fetch rows identified by PK combinations with chunked IN lists.
+    Composite keys use row-value lists: (A, B) IN ((:1, :2), ...).
+    Returns mapping from the caller's PK tuple to {column: value}; errors propagate.
     """
     owner, table = _split_owner_table(table_name, default_owner)
     pk_columns = [col.upper() for col in pk_columns]
-    key_list = list(keys)
+    if not pk_columns:
+        return {}
+    unique_keys: Dict[Tuple[Any, ...], None] = {}
+    for key in keys:
+        unique_keys.setdefault(tuple(key), None)
+    key_list = list(unique_keys)
     if not key_list:
         return {}
 
-    col_list = ", ".join(pk_columns)
-    all_cols_sql = "SELECT * FROM {}.{} WHERE ".format(owner, table)
+    width = len(pk_columns)
+    chunk_size = max(1, min(int(chunk_size), 1000))
+    if width == 1:
+        target = pk_columns[0]
+        item_sql = ":{}"
+    else:
+        target = "(" + ", ".join(pk_columns) + ")"
+        item_sql = "(" + ", ".join(":{}" for _ in range(width)) + ")"
     result: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
 
     with contextlib.closing(conn.cursor()) as cur:
-        for key in key_list:
-            where_parts = []
-            bind_params = {}
-            for idx, col in enumerate(pk_columns):
-                bind_name = f"v{idx}"
-                where_parts.append(f"{col} = :{bind_name}")
-                bind_params[bind_name] = key[idx]
-            sql = all_cols_sql + " AND ".join(where_parts)
-            try:
-                cur.execute(sql, bind_params)
-            except Exception:
-                continue
-            row = cur.fetchone()
-            if not row:
-                continue
+        cur.arraysize = chunk_size
+        for start in range(0, len(key_list), chunk_size):
+            chunk = key_list[start:start + chunk_size]
+            # Đệm đủ kích thước chunk để mọi lượt dùng chung một câu SQL (tránh parse lại)
+            padded = chunk + [chunk[-1]] * (chunk_size - len(chunk)) if len(key_list) > chunk_size else chunk
+            items = []
+            binds: List[Any] = []
+            for key in padded:
+                items.append(item_sql.format(*range(len(binds) + 1, len(binds) + width + 1)))
+                binds.extend(key[idx] for idx in range(width))
+            sql = f"SELECT * FROM {owner}.{table} WHERE {target} IN ({', '.join(items)})"
+            cur.execute(sql, binds)
             columns = [d[0] for d in cur.description]
-            record = {columns[i]: row[i] for i in range(len(columns))}
-            result[tuple(key)] = record
+            pk_pos = [columns.index(pk) for pk in pk_columns]
+            index: Optional[Dict[Tuple[Any, ...], Tuple[Any, ...]]] = None
+            for row in cur:
+                if index is None:
+                    kinds = [_key_kind(row[pos]) for pos in pk_pos]
+                    index = {
+                        tuple(_normalize_key_value(key[i], kinds[i]) for i in range(width)): key for key in chunk
+                    }
+                db_key = tuple(_normalize_key_value(row[pos], kinds[i]) for i, pos in enumerate(pk_pos))
+                original = index.get(db_key)
+                if original is None:
+                    continue
+                result[original] = {columns[i]: row[i] for i in range(len(columns))}
     return result
 
 
+@dataclass
+class DmlResult:
+    """
+    Outcome of an array DML call; row indexes refer to the caller's input order.
+    """
+
+    total: int = 0
+    row_counts: List[int] = field(default_factory=list)
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+    committed: bool = False
+
+    @property
+    def affected(self) -> int:
+        return sum(self.row_counts)
+
+    @property
+    def failed_rows(self) -> List[int]:
+        return [idx for idx, _ in self.errors]
+
+
+@dataclass
+class DeleteResult(DmlResult):
+    """
+    DmlResult plus the keys that were actually deleted and the ones not found.
+    """
+
+    deleted: List[Tuple[Any, ...]] = field(default_factory=list)
+    missing: List[Tuple[Any, ...]] = field(default_factory=list)
+
+    def mark_rolled_back(self) -> None:
+        """
+        Reset the counts after a rollback: no row stays deleted.
+        """
+        self.row_counts = [0] * len(self.row_counts)
+        self.deleted = []
+        self.committed = False
+
+
+def _execute_array(cur, sql: str, rows: Sequence[Any], offset: int = 0) -> Tuple[List[int], List[Tuple[int, str]]]:
+    """
+    Run executemany with batch errors and per-row counts.
+    Returns (row_counts aligned with rows, [(offset + row index, message)]).
+    """
+    cur.executemany(sql, rows, batcherrors=True, arraydmlrowcounts=True)
+    errors = [(offset + int(err.offset), str(err.message).strip()) for err in cur.getbatcherrors()]
+    raw_counts = [int(c) for c in cur.getarraydmlrowcounts()]
+    if len(raw_counts) == len(rows):
+        counts = raw_counts
+    else:
+        # Một số driver chỉ trả số dòng cho các dòng thành công -> gióng lại theo vị trí
+        failed = {idx - offset for idx, _ in errors}
+        it = iter(raw_counts)
+        counts = [0 if idx in failed else next(it, 0) for idx in range(len(rows))]
+    for idx, _ in errors:
+        counts[idx - offset] = 0
+    return counts, errors
+
+
 def delete_by_pk(
     conn,
     table_name: str,
     default_owner: str,
     pk_columns: Sequence[str],
     keys: Iterable[Sequence[Any]],
-):
+    *,
+    chunk_size: int = DML_CHUNK_SIZE,
+    commit: bool = True,
+    progress: Optional[ProgressCallback] = None,
+) -> DeleteResult:
     """
-    Delete rows identified by PK combinations.
+    Delete rows identified by PK combinations using array DML.
+    With commit=True the work is committed only when no row failed, otherwise rolled back
+    and the result reports nothing deleted (call mark_rolled_back after your own rollback).
+    progress(done) is called after every chunk and may raise OperationCancelled.
     """
     owner, table = _split_owner_table(table_name, default_owner)
     pk_columns = [col.upper() for col in pk_columns]
-    key_list = list(keys)
+    key_list = [tuple(key) for key in keys]
+    result = DeleteResult(total=len(key_list))
     if not key_list:
-        return
+        return result
+    where_parts = [f"{col} = :{idx + 1}" for idx, col in enumerate(pk_columns)]
+    sql = f"DELETE FROM {owner}.{table} WHERE " + " AND ".join(where_parts)
+    chunk_size = max(1, int(chunk_size))
     with contextlib.closing(conn.cursor()) as cur:
-        for key in key_list:
-            where_parts = []
-            bind_params = {}
-            for idx, col in enumerate(pk_columns):
-                bind_name = f"v{idx}"
-                where_parts.append(f"{col} = :{bind_name}")
-                bind_params[bind_name] = key[idx]
-            sql = f"DELETE FROM {owner}.{table} WHERE " + " AND ".join(where_parts)
-            cur.execute(sql, bind_params)
-    conn.commit()
+        for start in range(0, len(key_list), chunk_size):
+            chunk = [list(key) for key in key_list[start:start + chunk_size]]
+            counts, errors = _execute_array(cur, sql, chunk, start)
+            result.row_counts.extend(counts)
+            result.errors.extend(errors)
+            if progress is not None:
+                progress(len(result.row_counts))
+    failed = set(result.failed_rows)
+    for idx, key in enumerate(key_list):
+        if idx in failed:
+            continue
+        if result.row_counts[idx] > 0:
+            result.deleted.append(key)
+        else:
+            result.missing.append(key)
+    if commit:
+        if result.errors:
+            conn.rollback()
+            result.mark_rolled_back()
+        else:
+            conn.commit()
+            result.committed = True
+    return result
+
+
+_INT_RE = re.compile(r"[+-]?\d+")
+_DECIMAL_RE = re.compile(r"[+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?")
+# FLOAT/REAL của Oracle là NUMBER thập phân (độ chính xác nhị phân) -> bind Decimal như NUMBER
+FLOAT_TYPES = {"BINARY_FLOAT", "BINARY_DOUBLE"}
+
+
+class BindConversionError(ValueError):
+    """
+    Raised when a grid value cannot be converted to its column's native type.
+    """
+
+    def __init__(self, column: str, value: Any, expected: str) -> None:
+        self.column = column
+        self.value = value
+        self.expected = expected
+        super().__init__(f"{column}: '{value}' is not a valid {expected}")
+
+
+class ColumnConverter:
+    """
+    Turn grid strings of one column into native bind values (int/Decimal/float/datetime).
+    The first strptime format that matches is remembered and tried first for later cells.
+    Invalid cells raise BindConversionError.
+    """
+
+    __slots__ = ("name", "kind", "data_type", "_format")
+
+    def __init__(self, meta: Optional[Dict[str, Any]], name: str = "") -> None:
+        meta = meta or {}
+        self.name = str(meta.get("column_name") or name)
+        self.data_type = str(meta.get("data_type") or "").upper()
+        base_type = self.data_type.split("(", 1)[0].strip()
+        if base_type in FLOAT_TYPES:
+            self.kind = "float"
+        elif base_type in NUMERIC_TYPES:
+            self.kind = "number"
+        elif base_type in DATE_TYPES:
+            self.kind = "date"
+        elif base_type.startswith("TIMESTAMP"):
+            self.kind = "timestamp"
+        else:
+            self.kind = "text"
+        self._format: Optional[str] = None
+
+    def _parse_datetime(self, text: str) -> _dt.datetime:
+        if self._format:
+            try:
+                return _dt.datetime.strptime(text, self._format)
+            except ValueError:
+                pass
+        for fmt in COMMON_DATE_FORMATS:
+            if fmt == self._format:
+                continue
+            try:
+                parsed = _dt.datetime.strptime(text, fmt)
+            except ValueError:
+                continue
+            self._format = fmt
+            return parsed
+        raise BindConversionError(self.name, text, self.data_type or "date")
+
+    def __call__(self, value: Any) -> Any:
+        if value is None:
+            return None
+        if not isinstance(value, str):
+            return value
+        if self.kind == "text":
+            return value if value != "" else None
+        text = value.strip()
+        if not text:
+            return None
+        if self.kind == "number":
+            if _INT_RE.fullmatch(text):
+                return int(text)
+            if _DECIMAL_RE.fullmatch(text):
+                return decimal.Decimal(text)
+            raise BindConversionError(self.name, text, "number")
+        if self.kind == "float":
+            try:
+                return float(text)
+            except ValueError:
+                raise BindConversionError(self.name, text, "number") from None
+        return self._parse_datetime(text)
+
+    def input_size(self, driver: _Driver) -> Any:
+        """
+        Value for cursor.setinputsizes (None lets the driver size strings from the data).
+        """
+        if self.kind == "number":
+            return getattr(driver, "DB_TYPE_NUMBER", None)
+        if self.kind == "float":
+            return getattr(driver, "DB_TYPE_BINARY_DOUBLE", None)
+        if self.kind == "date":
+            return getattr(driver, "DB_TYPE_DATE", None)
+        if self.kind == "timestamp":
+            return getattr(driver, "DB_TYPE_TIMESTAMP", None)
+        return None
+
+
+class RowConverter:
+    """
+    Per-table bind plan: one ColumnConverter per column, compiled once from metadata.
+    """
+
+    def __init__(self, columns: Sequence[str], column_meta: Dict[str, Dict[str, Any]]) -> None:
+        self.columns = [c.upper() for c in columns]
+        meta_by_name = {str(k).upper(): v for k, v in (column_meta or {}).items()}
+        self.converters = [ColumnConverter(meta_by_name.get(col), col) for col in self.columns]
+
+    def convert_row(self, row: Sequence[Any]) -> List[Any]:
+        return [conv(row[idx] if idx < len(row) else None) for idx, conv in enumerate(self.converters)]
+
+    def convert(self, rows: Iterable[Sequence[Any]], offset: int = 0) -> Tuple[List[List[Any]], List[Tuple[int, str]]]:
+        """
+        Convert rows in bulk; returns (converted rows, [(row index, message)]).
+        Rows that fail are left out of the converted list.
+        """
+        converted: List[List[Any]] = []
+        errors: List[Tuple[int, str]] = []
+        for idx, row in enumerate(rows, start=offset):
+            try:
+                converted.append(self.convert_row(row))
+            except BindConversionError as exc:
+                errors.append((idx, str(exc)))
+        return converted, errors
+
+    def set_input_sizes(self, cur, driver: Optional[_Driver] = None) -> None:
+        """
+        Declare bind types up front so executemany sends typed arrays without re-binding.
+        """
+        try:
+            driver = driver or load_driver()
+        except OracleDriverNotAvailable:
+            return
+        sizes = [conv.input_size(driver) for conv in self.converters]
+        if any(size is not None for size in sizes):
+            cur.setinputsizes(*sizes)
+
+
+def compile_row_converter(columns: Sequence[str], column_meta: Dict[str, Dict[str, Any]]) -> RowConverter:
+    return RowConverter(columns, column_meta)
+
+
+def _same_value(conv: ColumnConverter, grid_value: Any, db_value: Any) -> bool:
+    """
+    Compare a grid cell with the value read from the DB using the column's converter.
+    Values that cannot be converted count as changed so the DB reports the error.
+    """
+    try:
+        new = conv(grid_value)
+    except BindConversionError:
+        return False
+    if new is None or db_value is None:
+        return new is None and db_value is None
+    if conv.kind == "number":
+        try:
+            return decimal.Decimal(str(new)) == decimal.Decimal(str(db_value))
+        except (decimal.InvalidOperation, ValueError):
+            return False
+    if conv.kind == "float":
+        try:
+            return float(new) == float(db_value)
+        except (TypeError, ValueError):
+            return False
+    if conv.kind in ("date", "timestamp"):
+        if isinstance(db_value, _dt.date) and not isinstance(db_value, _dt.datetime):
+            db_value = _dt.datetime.combine(db_value, _dt.time())
+        return new == db_value
+    if hasattr(db_value, "read"):
+        db_value = db_value.read()
+    db_text = str(db_value)
+    if conv.data_type.startswith(("CHAR", "NCHAR")):
+        return db_text.rstrip() == str(new).rstrip()
+    return db_text == str(new)
+
+
+def diff_rows_against_db(
+    conn,
+    table_name: str,
+    default_owner: str,
+    pk_columns: Sequence[str],
+    columns: Sequence[str],
+    rows: Sequence[Dict[str, Any]],
+    column_meta: Optional[Dict[str, Dict[str, Any]]] = None,
+    *,
+    chunk_size: int = PK_LOOKUP_CHUNK,
+) -> List[Optional[List[str]]]:
+    """
+    Bulk-fetch the current rows by PK and compare them with rows per column.
+    Returns, aligned with rows, the list of changed columns (empty = no-op) or None
+    when the PK is not found.
+    """
+    pk_columns = [c.upper() for c in pk_columns]
+    columns = [c.upper() for c in columns]
+    keys = [tuple(row.get(pk) for pk in pk_columns) for row in rows]
+    current = fetch_rows_by_pk(conn, table_name, default_owner, pk_columns, keys, chunk_size=chunk_size)
+    converter = compile_row_converter(columns, column_meta or {})
+    changes: List[Optional[List[str]]] = []
+    for row, key in zip(rows, keys):
+        db_row = current.get(key)
+        if db_row is None:
+            changes.append(None)
+            continue
+        changed = [
+            col
+            for col, conv in zip(converter.columns, converter.converters)
+            if not _same_value(conv, row.get(col), db_row.get(col))
+        ]
+        changes.append(changed)
+    return changes
+
+
+@dataclass
+class InsertResult(DmlResult):
+    """
+    DmlResult for inserts; committed_rows counts rows already made permanent.
+    Input rows before committed_upto are final: committed, or listed in errors.
+    """
+
+    committed_rows: int = 0
+    committed_upto: int = 0
+
+    @property
+    def inserted(self) -> int:
+        return self.affected
+
+
+def _execute_row_stream(
+    conn,
+    sql: str,
+    rows: Iterable[Sequence[Any]],
+    converter: Optional[RowConverter],
+    chunk_size: int,
+    commit_interval: int,
+    commit: bool,
+    progress: Optional[ProgressCallback] = None,
+) -> InsertResult:
+    """
+    Shared chunk loop of insert_rows/merge_rows: convert, array-execute, commit by interval.
+    Any exception (including a cancel raised by progress) carries the partial result as
+    exc.result, so callers know which rows were committed before the failure.
+    """
+    chunk_size = max(1, int(chunk_size))
+    result = InsertResult()
+    since_commit = 0
+
+    def flush(chunk: List[Sequence[Any]], start: int, cur) -> None:
+        nonlocal since_commit
+        counts = [0] * len(chunk)
+        positions = list(range(len(chunk)))
+        payload: List[Any] = list(chunk)
+        if converter is not None:
+            payload = []
+            positions = []
+            for pos, row in enumerate(chunk):
+                try:
+                    payload.append(converter.convert_row(row))
+                    positions.append(pos)
+                except BindConversionError as exc:
+                    result.errors.append((start + pos, str(exc)))
+        if payload:
+            if converter is not None:
+                converter.set_input_sizes(cur)
+            batch_counts, batch_errors = _execute_array(cur, sql, payload)
+            for pos, count in zip(positions, batch_counts):
+                counts[pos] = count
+            result.errors.extend((start + positions[off], message) for off, message in batch_errors)
+        result.row_counts.extend(counts)
+        result.total += len(chunk)
+        since_commit += sum(counts)
+        if commit and commit_interval > 0 and since_commit >= commit_interval:
+            conn.commit()
+            result.committed_rows += since_commit
+            result.committed_upto = result.total
+            since_commit = 0
+        if progress is not None:
+            progress(result.total)
+
+    try:
+        with contextlib.closing(conn.cursor()) as cur:
+            chunk: List[Sequence[Any]] = []
+            start = 0
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) >= chunk_size:
+                    flush(chunk, start, cur)
+                    start += len(chunk)
+                    chunk = []
+            if chunk:
+                flush(chunk, start, cur)
+    except Exception as exc:
+        result.errors.sort()
+        exc.result = result
+        raise
+    result.errors.sort()
+    if commit:
+        conn.commit()
+        result.committed_rows += since_commit
+        result.committed_upto = result.total
+        result.committed = True
+    return result
 
 
 def insert_rows(
@@ -504,16 +1780,119 @@ def insert_rows(
     table_name: str,
     default_owner: str,
     columns: Sequence[str],
-    rows: Sequence[Sequence[Any]],
-):
+    rows: Iterable[Sequence[Any]],
+    *,
+    column_meta: Optional[Dict[str, Dict[str, Any]]] = None,
+    chunk_size: int = DML_CHUNK_SIZE,
+    commit_interval: int = INSERT_COMMIT_INTERVAL,
+    commit: bool = True,
+    progress: Optional[ProgressCallback] = None,
+) -> InsertResult:
+    """
+    Insert rows in chunks of chunk_size with array DML and batch errors.
+    When column_meta is given, values are converted to native types first (rows that
+    cannot be converted are reported as errors) and bind types are declared up front.
+    commit_interval > 0 commits every N processed rows; commit=False never commits.
+    Failing rows are skipped and listed in the result with their input index.
+    """
     owner, table = _split_owner_table(table_name, default_owner)
     columns = [c.upper() for c in columns]
     col_expr = ", ".join(columns)
     bind_names = [f":{i+1}" for i in range(len(columns))]
     sql = f"INSERT INTO {owner}.{table} ({col_expr}) VALUES ({', '.join(bind_names)})"
+    converter: Optional[RowConverter] = None
+    if column_meta is not None:
+        converter = compile_row_converter(columns, column_meta)
+    return _execute_row_stream(conn, sql, rows, converter, chunk_size, commit_interval, commit, progress)
+
+
+def build_merge_sql(owner: str, table: str, columns: Sequence[str], pk_columns: Sequence[str]) -> str:
+    """
+    MERGE keyed on pk_columns with one positional bind per column (:1..:n in column order).
+    """
+    columns = [c.upper() for c in columns]
+    pk_columns = [c.upper() for c in pk_columns]
+    missing = [pk for pk in pk_columns if pk not in columns]
+    if not pk_columns or missing:
+        raise ValueError(f"MERGE requires every PK column in the column list: {', '.join(missing) or '-'}")
+    source = ", ".join(f":{idx + 1} AS {col}" for idx, col in enumerate(columns))
+    on_clause = " AND ".join(f"t.{pk} = s.{pk}" for pk in pk_columns)
+    parts = [f"MERGE INTO {owner}.{table} t USING (SELECT {source} FROM dual) s ON ({on_clause})"]
+    non_pk = [col for col in columns if col not in pk_columns]
+    if non_pk:
+        parts.append("WHEN MATCHED THEN UPDATE SET " + ", ".join(f"t.{col} = s.{col}" for col in non_pk))
+    parts.append(
+        f"WHEN NOT MATCHED THEN INSERT ({', '.join(columns)}) VALUES ({', '.join('s.' + col for col in columns)})"
+    )
+    return " ".join(parts)
+
+
+def merge_rows(
+    conn,
+    table_name: str,
+    default_owner: str,
+    columns: Sequence[str],
+    pk_columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    *,
+    column_meta: Optional[Dict[str, Dict[str, Any]]] = None,
+    chunk_size: int = DML_CHUNK_SIZE,
+    commit_interval: int = INSERT_COMMIT_INTERVAL,
+    commit: bool = True,
+    progress: Optional[ProgressCallback] = None,
+) -> InsertResult:
+    """
+    Upsert rows with one array-bound MERGE per chunk (update when the PK exists, insert otherwise).
+    Conversion, batch errors and commit behaviour are the same as insert_rows.
+    """
+    owner, table = _split_owner_table(table_name, default_owner)
+    columns = [c.upper() for c in columns]
+    sql = build_merge_sql(owner, table, columns, pk_columns)
+    converter: Optional[RowConverter] = None
+    if column_meta is not None:
+        converter = compile_row_converter(columns, column_meta)
+    return _execute_row_stream(conn, sql, rows, converter, chunk_size, commit_interval, commit, progress)
+
+
+def execute_dml_groups(
+    conn,
+    statements: Sequence[Tuple[str, Any]],
+    *,
+    chunk_size: int = DML_CHUNK_SIZE,
+    commit: bool = True,
+    progress: Optional[ProgressCallback] = None,
+) -> DmlResult:
+    """
+    Run (sql, binds) pairs grouped by statement text, each group with array DML.
+    Row counts and errors are reported against the position in statements.
+    With commit=True the work is committed only when no row failed, otherwise rolled back.
+    progress(done) is called after every chunk and may raise OperationCancelled.
+    """
+    result = DmlResult(total=len(statements), row_counts=[0] * len(statements))
+    groups: Dict[str, List[int]] = {}
+    for idx, (sql, _) in enumerate(statements):
+        groups.setdefault(sql, []).append(idx)
+    chunk_size = max(1, int(chunk_size))
+    done = 0
     with contextlib.closing(conn.cursor()) as cur:
-        cur.executemany(sql, rows)
-    conn.commit()
+        for sql, indexes in groups.items():
+            for start in range(0, len(indexes), chunk_size):
+                part = indexes[start:start + chunk_size]
+                counts, errors = _execute_array(cur, sql, [statements[i][1] for i in part])
+                for pos, count in enumerate(counts):
+                    result.row_counts[part[pos]] = count
+                result.errors.extend((part[pos], message) for pos, message in errors)
+                done += len(part)
+                if progress is not None:
+                    progress(done)
+    result.errors.sort()
+    if commit:
+        if result.errors:
+            conn.rollback()
+        else:
+            conn.commit()
+            result.committed = True
+    return result
 
 
 def update_rows(
@@ -524,7 +1903,14 @@ def update_rows(
     pk_columns: Sequence[str],
     data_rows: Iterable[Dict[str, Any]],
     extra_where: Optional[str] = None,
-):
+    *,
+    chunk_size: int = DML_CHUNK_SIZE,
+    commit: bool = True,
+    progress: Optional[ProgressCallback] = None,
+) -> DmlResult:
+    """
+    Update rows by PK with array DML; returns per-row counts and batch errors.
+    """
     owner, table = _split_owner_table(table_name, default_owner)
     update_columns = [c.upper() for c in update_columns]
     pk_columns = [c.upper() for c in pk_columns]
@@ -537,12 +1923,189 @@ def update_rows(
 
     sql = f"UPDATE {owner}.{table} SET {set_clause} WHERE " + " AND ".join(where_parts) + extra_where_clause
 
+    statements: List[Tuple[str, Dict[str, Any]]] = []
+    for row in data_rows:
+        binds: Dict[str, Any] = {}
+        for col in update_columns:
+            binds[col] = row.get(col)
+        for pk in pk_columns:
+            binds[f"PK_{pk}"] = row.get(pk)
+        statements.append((sql, binds))
+    return execute_dml_groups(conn, statements, chunk_size=chunk_size, commit=commit, progress=progress)
+
+
+PLAN_LARGE_TABLE_ROWS = 100000
+_EXPLAINABLE_RE = re.compile(r"^\s*(SELECT|WITH|INSERT|UPDATE|DELETE|MERGE|CREATE\s+TABLE)\b", re.IGNORECASE)
+_PLAN_IDS = itertools.count(1)
+
+
+@dataclass
+class PlanStep:
+    """
+    One row of PLAN_TABLE for an explained statement.
+    """
+
+    id: int
+    operation: str
+    options: str
+    object_owner: str
+    object_name: str
+    cardinality: Optional[int]
+    cost: Optional[int]
+
+    @property
+    def is_full_scan(self) -> bool:
+        # FULL, STORAGE FULL (Exadata), INMEMORY FULL...
+        return self.operation == "TABLE ACCESS" and "FULL" in self.options
+
+
+@dataclass
+class PlanFinding:
+    """
+    Full scan of a large table found while explaining sql; executions counts statements of that shape.
+    """
+
+    sql: str
+    owner: str
+    table: str
+    table_rows: Optional[int]
+    cardinality: Optional[int]
+    cost: Optional[int]
+    executions: int = 1
+
+
+def is_explainable(sql: str) -> bool:
+    return bool(_EXPLAINABLE_RE.match(sql or ""))
+
+
+def explain_plan(conn, sql: str) -> List[PlanStep]:
+    """
+    Run EXPLAIN PLAN for sql (bind placeholders stay unbound) and read the steps back.
+    Uses only cursor.execute/fetchall so it can be driven by a stub connection.
+    """
+    statement_id = f"TV{os.getpid() % 100000}_{next(_PLAN_IDS)}"
     with contextlib.closing(conn.cursor()) as cur:
-        for row in data_rows:
-            binds: Dict[str, Any] = {}
-            for col in update_columns:
-                binds[col] = row.get(col)
-            for pk in pk_columns:
-                binds[f"PK_{pk}"] = row.get(pk)
-            cur.execute(sql, binds)
-    conn.commit()
+        cur.execute(f"EXPLAIN PLAN SET STATEMENT_ID = '{statement_id}' FOR {sql}")
+        cur.execute(
+            "SELECT id, operation, options, object_owner, object_name, cardinality, cost "
+            "FROM plan_table WHERE statement_id = :1 ORDER BY id",
+            [statement_id],
+        )
+        rows = cur.fetchall()
+        cur.execute("DELETE FROM plan_table WHERE statement_id = :1", [statement_id])
+    steps = []
+    for row in rows:
+        steps.append(
+            PlanStep(
+                id=int(row[0]),
+                operation=str(row[1] or "").upper(),
+                options=str(row[2] or "").upper(),
+                object_owner=str(row[3] or "").upper(),
+                object_name=str(row[4] or "").upper(),
+                cardinality=int(row[5]) if row[5] is not None else None,
+                cost=int(row[6]) if row[6] is not None else None,
+            )
+        )
+    return steps
+
+
+@dataclass
+class TableStats:
+    """
+    Optimizer statistics of one table from ALL_TABLES (None when never analysed).
+    """
+
+    num_rows: Optional[int] = None
+    avg_row_len: Optional[int] = None
+    blocks: Optional[int] = None
+
+    @property
+    def est_bytes(self) -> Optional[int]:
+        if self.num_rows is None:
+            return None
+        return self.num_rows * (self.avg_row_len or 1)
+
+
+def fetch_table_stats(conn, tables: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], TableStats]:
+    """
+    NUM_ROWS / AVG_ROW_LEN / BLOCKS for (owner, table) pairs, keyed by the upper-cased pair.
+    """
+    pairs = sorted({(o.upper(), t.upper()) for o, t in tables})
+    result: Dict[Tuple[str, str], TableStats] = {pair: TableStats() for pair in pairs}
+    if not pairs:
+        return result
+
+    def as_int(value: Any) -> Optional[int]:
+        return int(value) if value is not None else None
+
+    with contextlib.closing(conn.cursor()) as cur:
+        for start in range(0, len(pairs), PK_LOOKUP_CHUNK):
+            chunk = pairs[start:start + PK_LOOKUP_CHUNK]
+            items = ", ".join(f"(:{2 * i + 1}, :{2 * i + 2})" for i in range(len(chunk)))
+            binds = [value for pair in chunk for value in pair]
+            cur.execute(
+                "SELECT owner, table_name, num_rows, avg_row_len, blocks FROM all_tables "
+                f"WHERE (owner, table_name) IN ({items})",
+                binds,
+            )
+            for owner, table, num_rows, avg_row_len, blocks in cur.fetchall():
+                result[(str(owner).upper(), str(table).upper())] = TableStats(
+                    as_int(num_rows), as_int(avg_row_len), as_int(blocks)
+                )
+    return result
+
+
+def fetch_table_row_estimates(conn, tables: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], Optional[int]]:
+    """
+    NUM_ROWS from optimizer statistics for (owner, table) pairs; None when never analysed.
+    """
+    return {pair: stats.num_rows for pair, stats in fetch_table_stats(conn, tables).items()}
+
+
+def check_statement_plans(
+    conn,
+    statements: Iterable[str],
+    *,
+    large_table_rows: int = PLAN_LARGE_TABLE_ROWS,
+    progress: Optional[ProgressCallback] = None,
+) -> Tuple[List[PlanFinding], List[Tuple[str, str]], int]:
+    """
+    Explain each distinct statement shape once and report full scans of tables with at least
+    large_table_rows rows (statistics first, plan cardinality when the table has none).
+    Returns (findings, [(sql, error)], number of shapes explained).
+    """
+    shapes: Dict[str, int] = {}
+    for sql in statements:
+        text = (sql or "").strip().rstrip(";").strip()
+        if text and is_explainable(text):
+            shapes[text] = shapes.get(text, 0) + 1
+    candidates: List[Tuple[str, PlanStep]] = []
+    errors: List[Tuple[str, str]] = []
+    for done, sql in enumerate(shapes, start=1):
+        try:
+            steps = explain_plan(conn, sql)
+        except Exception as exc:
+            errors.append((sql, str(exc).strip()))
+        else:
+            candidates.extend((sql, step) for step in steps if step.is_full_scan and step.object_name)
+        if progress is not None:
+            progress(done)
+    estimates = fetch_table_row_estimates(conn, [(s.object_owner, s.object_name) for _, s in candidates])
+    findings: List[PlanFinding] = []
+    for sql, step in candidates:
+        table_rows = estimates.get((step.object_owner, step.object_name))
+        size = table_rows if table_rows is not None else (step.cardinality or 0)
+        if size < large_table_rows:
+            continue
+        findings.append(
+            PlanFinding(
+                sql=sql,
+                owner=step.object_owner,
+                table=step.object_name,
+                table_rows=table_rows,
+                cardinality=step.cardinality,
+                cost=step.cost,
+                executions=shapes[sql],
+            )
+        )
+    return findings, errors, len(shapes)
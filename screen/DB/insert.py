@@ -8,9 +8,9 @@ import threading
 import tkinter as tk
 from tkinter import messagebox, ttk, font as tkfont
 from tkinter.scrolledtext import ScrolledText
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from screen.DB import db_utils
+from screen.DB import db_utils, job_runner
 from screen.DB.widgets import ColumnOrderDialog, DataGrid, DuplicatePreviewDialog, LoadingPopup
 from core import history, i18n
 
@@ -27,6 +27,8 @@ def get_logger() -> logging.Logger:
 
 class InsertWindow(tk.Toplevel):
     GRID_SECTION_RATIO = 0.35
+    INSERT_CHUNK_SIZE = db_utils.DML_CHUNK_SIZE
+    INSERT_COMMIT_INTERVAL = db_utils.INSERT_COMMIT_INTERVAL
     def __init__(self, parent: tk.Widget, connection: Dict[str, str]):
         """Khởi tạo cửa sổ Insert với thông tin kết nối đã chọn."""
         super().__init__(parent)
@@ -54,6 +56,7 @@ class InsertWindow(tk.Toplevel):
         self._current_table_label: str = "..."
         self._metadata_cache: Dict[str, Dict[str, Any]] = {}
         self._metadata_token: int = 0
+        self._job: Optional[job_runner.BackgroundJob] = None
 
         ACTIVE_WINDOWS.append(self)
 
@@ -192,6 +195,32 @@ class InsertWindow(tk.Toplevel):
         self.btn_reorder.grid(row=1, column=0, sticky="ew", pady=4)
         self.btn_clear = ttk.Button(self.grp_actions, text=self._t("insert.btn.clear"), command=self._clear)
         self.btn_clear.grid(row=2, column=0, sticky="ew", pady=4)
+        self.btn_execute = ttk.Button(self.grp_actions, text=self._t("insert.btn.execute"), command=self._execute)
+        self.btn_execute.grid(row=3, column=0, sticky="ew", pady=4)
+        self.var_upsert = tk.BooleanVar(value=False)
+        self.chk_upsert = ttk.Checkbutton(
+            self.grp_actions,
+            text=self._t("insert.chk.upsert"),
+            variable=self.var_upsert,
+            command=self._on_toggle_upsert,
+        )
+        self.chk_upsert.grid(row=4, column=0, sticky="w", pady=(4, 0))
+        self.var_upsert_preview = tk.BooleanVar(value=True)
+        self.chk_upsert_preview = ttk.Checkbutton(
+            self.grp_actions,
+            text=self._t("insert.chk.upsert_preview"),
+            variable=self.var_upsert_preview,
+            state="disabled",
+        )
+        self.chk_upsert_preview.grid(row=5, column=0, sticky="w", padx=(16, 0))
+
+    def _on_toggle_upsert(self):
+        """Chỉ cho chọn xem trước khi đang ở chế độ upsert."""
+        state = "normal" if self.var_upsert.get() else "disabled"
+        try:
+            self.chk_upsert_preview.config(state=state)
+        except tk.TclError:
+            pass
 
 
 
@@ -234,7 +263,7 @@ class InsertWindow(tk.Toplevel):
         """Khởi tạo kết nối và tải danh sách bảng trong luồng nền."""
         def worker():
             try:
-                self.conn = db_utils.connect_oracle(
+                self.conn = db_utils.acquire_connection(
                     self.conn_info.get("user", ""),
                     self.conn_info.get("password", ""),
                     self.conn_info.get("host", ""),
@@ -243,6 +272,8 @@ class InsertWindow(tk.Toplevel):
                     bool(self.conn_info.get("use_host_port")),
                 )
                 tables = db_utils.fetch_accessible_tables(self.conn)
+                db_utils.start_catalog_refresh(self.conn_info)
+                self._catalog_registered = True
             except db_utils.OracleDriverNotAvailable as exc:
                 msg = str(exc)
                 self._log_exception("Oracle driver unavailable for insert window", exc)
@@ -369,8 +400,9 @@ class InsertWindow(tk.Toplevel):
 
         def worker():
             try:
-                columns = db_utils.fetch_table_columns(self.conn, table_key, self.current_owner)
-                pk_cols = db_utils.fetch_primary_keys(self.conn, table_key, self.current_owner)
+                with job_runner.connection_lock(self.conn):
+                    columns = db_utils.fetch_table_columns(self.conn, table_key, self.current_owner)
+                    pk_cols = db_utils.fetch_primary_keys(self.conn, table_key, self.current_owner)
             except Exception as exc:
                 self._log_exception(f"Failed to fetch metadata for table {table_key}", exc)
                 self.after(0, lambda: self._handle_metadata_error(item, exc, token))
@@ -433,6 +465,8 @@ class InsertWindow(tk.Toplevel):
             getattr(self, "btn_build_sql", None),
             getattr(self, "btn_reorder", None),
             getattr(self, "btn_clear", None),
+            getattr(self, "btn_execute", None),
+            getattr(self, "chk_upsert", None),
             getattr(self, "btn_import_csv", None),
             getattr(self, "btn_export_csv", None),
             getattr(self, "btn_add_row", None),
@@ -545,7 +579,7 @@ class InsertWindow(tk.Toplevel):
         self._draft_history_sql = ""
 
     def _execute(self):
-        """Thuc thi cau lenh INSERT len co so du lieu."""
+        """Thuc thi cau lenh INSERT len co so du lieu (chay nen, co tien do va huy)."""
         table = self._current_table()
         if not table:
             messagebox.showwarning(self._t(APP_TITLE_KEY), self._t("insert.msg.no_table"), parent=self)
@@ -554,6 +588,8 @@ class InsertWindow(tk.Toplevel):
         if not table_name:
             messagebox.showwarning(self._t(APP_TITLE_KEY), self._t("insert.msg.no_table"), parent=self)
             return
+        if self._job is not None and self._job.running:
+            return
         rows = self.grid.get_all()
         if not rows:
             messagebox.showwarning(self._t(APP_TITLE_KEY), self._t("insert.msg.no_data_execute"), parent=self)
@@ -573,31 +609,55 @@ class InsertWindow(tk.Toplevel):
         if pk_cols and pk_missing:
             if not messagebox.askyesno(self._t(APP_TITLE_KEY), self._t("insert.msg.pk_missing_confirm"), parent=self):
                 return
-        duplicates: Dict[tuple, Dict[str, str]] = {}
-        try:
-            if pk_cols:
-                keys = []
-                for row in rows:
-                    if any(row.get(pk) == "" for pk in pk_cols):
-                        continue
-                    keys.append([row.get(pk) for pk in pk_cols])
-                duplicates = db_utils.fetch_rows_by_pk(self.conn, table, self.current_owner, pk_cols, keys)
-        except Exception as exc:
-            msg = self._t("insert.msg.check_duplicates_error", error=str(exc))
-            self._log_exception("Failed to check duplicate rows before insert", exc)
-            self._log_history_status("failed", msg, row_count, sql_text_trim, table)
-            messagebox.showerror(self._t(APP_TITLE_KEY), msg, parent=self)
+        plan = {"table": table, "table_name": table_name, "rows": rows, "sql": sql_text_trim}
+        if self.var_upsert.get():
+            if not pk_cols:
+                messagebox.showwarning(self._t(APP_TITLE_KEY), self._t("insert.msg.upsert_no_pk"), parent=self)
+                return
+            self._execute_upsert(plan)
             return
+        if not pk_cols:
+            self._start_insert(plan, [])
+            return
+        keys = [[row.get(pk) for pk in pk_cols] for row in rows if all(row.get(pk) != "" for pk in pk_cols)]
+        self._lookup_existing(
+            plan,
+            keys,
+            on_found=lambda duplicates: self._confirm_duplicates(plan, duplicates),
+            log_message="Failed to check duplicate rows before insert",
+        )
+
+    def _lookup_existing(self, plan: Dict[str, Any], keys: List[List[Any]], on_found, log_message: str):
+        """Tìm các dòng đã tồn tại theo khóa chính (IN list theo lô) trên luồng nền."""
+        pk_cols = list(self._pk_columns)
+
+        def work(ctx):
+            found = db_utils.fetch_rows_by_pk(self.conn, plan["table"], self.current_owner, pk_cols, keys)
+            ctx.check_cancelled()
+            return found
+
+        self._job = job_runner.run_job(
+            self,
+            self.conn,
+            work,
+            title=self._t("insert.progress.check_duplicates"),
+            on_success=on_found,
+            on_error=lambda exc: self._fail_execution(plan, "insert.msg.check_duplicates_error", exc, log_message),
+            on_cancel=lambda _partial: self._job_cancelled(plan, None),
+        )
 
+    def _confirm_duplicates(self, plan: Dict[str, Any], duplicates: Dict[tuple, Dict[str, Any]]):
+        """Hiển thị dữ liệu trùng để xác nhận ghi đè rồi chạy bước xóa + insert."""
+        pk_cols = self._pk_columns
         if duplicates:
             dup_user = []
-            for row in rows:
+            for row in plan["rows"]:
                 key = tuple("" if row.get(pk) is None else str(row.get(pk)) for pk in pk_cols)
                 if key in duplicates:
                     dup_user.append(row)
             dlg = DuplicatePreviewDialog(
                 self,
-                table_name=table_name,
+                table_name=plan["table_name"],
                 columns=self._columns,
                 pk_columns=pk_cols,
                 user_rows=dup_user,
@@ -606,35 +666,274 @@ class InsertWindow(tk.Toplevel):
             self.wait_window(dlg)
             if not dlg.result:
                 return
-            try:
-                db_utils.delete_by_pk(
+        self._start_insert(plan, list(duplicates.keys()))
+
+    def _ordered_rows(self, rows: List[Dict[str, str]]) -> List[List[Any]]:
+        return [[row.get(col) if row.get(col) != "" else None for col in self._columns] for row in rows]
+
+    def _start_insert(self, plan: Dict[str, Any], dup_keys: List[tuple]):
+        """Xóa dòng trùng (nếu có) rồi insert theo lô trên luồng nền."""
+        table = plan["table"]
+        row_count = len(plan["rows"])
+        ordered_rows = self._ordered_rows(plan["rows"])
+        columns = list(self._columns)
+        column_meta = dict(self._column_meta)
+        pk_cols = list(self._pk_columns)
+        # Đã xóa dữ liệu cũ -> không commit dở dang, lỗi thì rollback toàn bộ để không mất dòng cũ
+        deleted_old = bool(dup_keys)
+        label_delete = self._t("insert.progress.deleting")
+        label_insert = self._t("insert.progress.inserting")
+        state = {"step": "delete" if deleted_old else "insert"}
+
+        def work(ctx):
+            delete_result = None
+            if deleted_old:
+                delete_result = db_utils.delete_by_pk(
                     self.conn,
                     table,
                     self.current_owner,
                     pk_cols,
-                    duplicates.keys(),
+                    dup_keys,
+                    commit=False,
+                    progress=lambda done: ctx.progress(done, len(dup_keys), label_delete),
                 )
-            except Exception as exc:
-                msg = self._t("insert.msg.delete_old_error", error=str(exc))
-                self._log_exception("Failed to delete duplicate rows before insert", exc)
+                if delete_result.errors:
+                    self.conn.rollback()
+                    delete_result.mark_rolled_back()
+                    return delete_result, None
+            state["step"] = "insert"
+            result = db_utils.insert_rows(
+                self.conn,
+                table,
+                self.current_owner,
+                columns,
+                ordered_rows,
+                column_meta=column_meta,
+                chunk_size=self.INSERT_CHUNK_SIZE,
+                commit_interval=self.INSERT_COMMIT_INTERVAL,
+                commit=not deleted_old,
+                progress=lambda done: ctx.progress(done, row_count, label_insert),
+            )
+            if deleted_old:
+                if result.errors:
+                    self.conn.rollback()
+                    delete_result.mark_rolled_back()
+                else:
+                    self.conn.commit()
+            return delete_result, result
+
+        def on_error(exc: Exception):
+            if state["step"] == "delete":
+                self._fail_execution(plan, "insert.msg.delete_old_error", exc, "Failed to delete duplicate rows before insert")
+            else:
+                self._fail_execution(plan, "insert.msg.insert_error", exc, "Failed to execute insert rows")
+
+        self.grid.clear_marks()
+        self._job = job_runner.run_job(
+            self,
+            self.conn,
+            work,
+            title=self._t("insert.progress.title", table=plan["table_name"]),
+            on_success=lambda payload: self._finish_insert(plan, dup_keys, *payload),
+            on_error=on_error,
+            on_cancel=lambda partial: self._job_cancelled(plan, partial),
+        )
+
+    def _finish_insert(
+        self,
+        plan: Dict[str, Any],
+        dup_keys: List[tuple],
+        delete_result: Optional[db_utils.DeleteResult],
+        result: Optional[db_utils.InsertResult],
+    ):
+        """Hiển thị kết quả insert (đã commit/rollback ở luồng nền)."""
+        table = plan["table"]
+        row_count = len(plan["rows"])
+        sql_text_trim = plan["sql"]
+        if result is None and delete_result is not None:
+            detail = self._format_key_errors(dup_keys, delete_result.errors)
+            msg = self._t("insert.msg.delete_old_error", error=detail)
+            self._logger.error("Failed to delete %s duplicate rows before insert: %s", len(delete_result.errors), detail)
+            self._log_history_status("failed", msg, row_count, sql_text_trim, table)
+            messagebox.showerror(self._t(APP_TITLE_KEY), msg, parent=self)
+            return
+        if result.errors:
+            if delete_result is not None:
+                self.grid.mark_rows({idx: "error" for idx in result.failed_rows})
+                details = self._format_row_errors(result.errors)
+                msg = self._t("insert.msg.row_errors_rollback", count=len(result.errors), details=details)
+                self._logger.error("Insert failed on %s rows, rolled back: %s", len(result.errors), details)
                 self._log_history_status("failed", msg, row_count, sql_text_trim, table)
                 messagebox.showerror(self._t(APP_TITLE_KEY), msg, parent=self)
                 return
+            self._report_partial_errors(result, row_count, sql_text_trim, table)
+            return
 
-        try:
-            ordered_rows = []
-            for row in rows:
-                ordered_rows.append([row.get(col) if row.get(col) != "" else None for col in self._columns])
-            db_utils.insert_rows(self.conn, table, self.current_owner, self._columns, ordered_rows)
-        except Exception as exc:
-            msg = self._t("insert.msg.insert_error", error=str(exc))
-            self._log_exception("Failed to execute insert rows", exc)
-            self._log_history_status("failed", msg, row_count, sql_text_trim, table)
+        success_msg = self._t("insert.msg.insert_success")
+        if delete_result is not None:
+            success_msg += "\n" + self._t(
+                "insert.msg.delete_summary",
+                deleted=len(delete_result.deleted),
+                missing=len(delete_result.missing),
+            )
+        self._log_history_status("success", success_msg, row_count, sql_text_trim, table)
+        messagebox.showinfo(self._t(APP_TITLE_KEY), success_msg, parent=self)
+
+    def _execute_upsert(self, plan: Dict[str, Any]):
+        """Upsert bằng một câu MERGE (array bind theo chunk), có xem trước dòng đã tồn tại."""
+        pk_cols = self._pk_columns
+        if not self.var_upsert_preview.get():
+            self._start_upsert(plan, None)
+            return
+        keys = [[row.get(pk) for pk in pk_cols] for row in plan["rows"] if all(row.get(pk) for pk in pk_cols)]
+        self._lookup_existing(
+            plan,
+            keys,
+            on_found=lambda existing: self._confirm_upsert(plan, existing),
+            log_message="Failed to preview existing rows before upsert",
+        )
+
+    def _confirm_upsert(self, plan: Dict[str, Any], existing: Dict[tuple, Dict[str, Any]]):
+        """Xem trước các dòng sẽ bị ghi đè bởi MERGE."""
+        pk_cols = self._pk_columns
+        if existing:
+            dup_user = [row for row in plan["rows"] if tuple(row.get(pk) for pk in pk_cols) in existing]
+            dlg = DuplicatePreviewDialog(
+                self,
+                table_name=plan["table_name"],
+                columns=self._columns,
+                pk_columns=pk_cols,
+                user_rows=dup_user,
+                db_rows=list(existing.values()),
+            )
+            self.wait_window(dlg)
+            if not dlg.result:
+                return
+        self._start_upsert(plan, existing)
+
+    def _start_upsert(self, plan: Dict[str, Any], existing: Optional[Dict[tuple, Dict[str, Any]]]):
+        """Chạy MERGE theo lô trên luồng nền."""
+        table = plan["table"]
+        row_count = len(plan["rows"])
+        ordered_rows = self._ordered_rows(plan["rows"])
+        columns = list(self._columns)
+        column_meta = dict(self._column_meta)
+        pk_cols = list(self._pk_columns)
+        label = self._t("insert.progress.merging")
+
+        def work(ctx):
+            return db_utils.merge_rows(
+                self.conn,
+                table,
+                self.current_owner,
+                columns,
+                pk_cols,
+                ordered_rows,
+                column_meta=column_meta,
+                chunk_size=self.INSERT_CHUNK_SIZE,
+                commit_interval=self.INSERT_COMMIT_INTERVAL,
+                progress=lambda done: ctx.progress(done, row_count, label),
+            )
+
+        self.grid.clear_marks()
+        self._job = job_runner.run_job(
+            self,
+            self.conn,
+            work,
+            title=self._t("insert.progress.title", table=plan["table_name"]),
+            on_success=lambda result: self._finish_upsert(plan, existing, result),
+            on_error=lambda exc: self._fail_execution(plan, "insert.msg.insert_error", exc, "Failed to execute upsert rows"),
+            on_cancel=lambda partial: self._job_cancelled(plan, partial),
+        )
+
+    def _finish_upsert(
+        self,
+        plan: Dict[str, Any],
+        existing: Optional[Dict[tuple, Dict[str, Any]]],
+        result: db_utils.InsertResult,
+    ):
+        """Hiển thị kết quả upsert."""
+        row_count = len(plan["rows"])
+        if result.errors:
+            self._report_partial_errors(result, row_count, plan["sql"], plan["table"])
+            return
+        success_msg = self._t("insert.msg.upsert_success", merged=result.affected, total=row_count)
+        if existing is not None:
+            updated = min(len(existing), result.affected)
+            success_msg += "\n" + self._t(
+                "insert.msg.upsert_summary",
+                updated=updated,
+                inserted=result.affected - updated,
+            )
+        self._log_history_status("success", success_msg, result.affected, plan["sql"], plan["table"])
+        messagebox.showinfo(self._t(APP_TITLE_KEY), success_msg, parent=self)
+
+    def _fail_execution(self, plan: Dict[str, Any], key: str, exc: Exception, log_message: str):
+        """Báo lỗi của job nền (phần chưa commit đã được rollback)."""
+        msg = self._t(key, error=str(exc))
+        self._log_exception(log_message, exc)
+        partial = getattr(exc, "result", None)
+        committed = getattr(partial, "committed_rows", 0) or 0
+        if not committed:
+            self._log_history_status("failed", msg, len(plan["rows"]), plan["sql"], plan["table"])
             messagebox.showerror(self._t(APP_TITLE_KEY), msg, parent=self)
             return
+        # Các chunk trước lỗi đã commit theo interval -> báo rõ và chỉ giữ lại phần cần gửi lại
+        upto = partial.committed_upto
+        msg += "\n" + self._t("insert.msg.partial_committed", committed=committed, upto=upto, total=len(plan["rows"]))
+        self._log_history_status("failed", msg, committed, plan["sql"], plan["table"])
+        failed = [idx for idx in partial.failed_rows if idx < upto]
+        pending = failed + list(range(upto, len(plan["rows"])))
+        self.grid.mark_rows({idx: "error" for idx in failed})
+        if messagebox.askyesno(self._t(APP_TITLE_KEY), msg + "\n\n" + self._t("insert.msg.keep_uncommitted_rows"), parent=self):
+            self.grid.keep_rows(pending)
+            self.grid.mark_rows({pos: "error" for pos in range(len(failed))})
+
+    def _job_cancelled(self, plan: Dict[str, Any], partial: Optional[db_utils.InsertResult]):
+        """Người dùng hủy job: báo số dòng đã commit trước đó (nếu có)."""
+        committed = getattr(partial, "committed_rows", 0) or 0
+        if committed:
+            msg = self._t("widget.progress.cancelled_partial", committed=committed)
+        else:
+            msg = self._t("widget.progress.cancelled")
+        self._log_history_status("cancelled", msg, committed, plan["sql"], plan["table"])
+        messagebox.showwarning(self._t(APP_TITLE_KEY), msg, parent=self)
+
+    def _report_partial_errors(self, result: db_utils.InsertResult, row_count: int, sql_text_trim: str, table: str):
+        """Tô đỏ dòng lỗi, báo số dòng đã ghi và hỏi giữ lại dòng lỗi để sửa."""
+        self.grid.mark_rows({idx: "error" for idx in result.failed_rows})
+        details = self._format_row_errors(result.errors)
+        msg = self._t(
+            "insert.msg.row_errors_partial",
+            inserted=result.inserted,
+            total=row_count,
+            count=len(result.errors),
+            details=details,
+        )
+        self._logger.warning("Insert skipped %s failing rows: %s", len(result.errors), details)
+        self._log_history_status("failed", msg, result.inserted, sql_text_trim, table)
+        if messagebox.askyesno(self._t(APP_TITLE_KEY), msg + "\n\n" + self._t("insert.msg.keep_failed_rows"), parent=self):
+            self.grid.keep_rows(result.failed_rows)
+            self.grid.mark_rows({pos: "error" for pos in range(len(result.failed_rows))})
 
-        self._log_history_status("success", self._t("insert.msg.insert_success"), row_count, sql_text_trim, table)
-        messagebox.showinfo(self._t(APP_TITLE_KEY), self._t("insert.msg.insert_success"), parent=self)
+    @staticmethod
+    def _format_row_errors(errors: Sequence[Tuple[int, str]], limit: int = 5) -> str:
+        """Ghép thông báo lỗi theo số thứ tự dòng trên lưới."""
+        details = "\n".join(f"#{idx + 1}: {message}" for idx, message in errors[:limit])
+        if len(errors) > limit:
+            details += f"\n... (+{len(errors) - limit})"
+        return details
+
+    @staticmethod
+    def _format_key_errors(keys: Sequence[Sequence[Any]], errors: Sequence[Tuple[int, str]], limit: int = 5) -> str:
+        """Ghép danh sách khóa lỗi + thông báo ORA để hiển thị."""
+        lines = []
+        for idx, message in errors[:limit]:
+            key_text = ", ".join("" if v is None else str(v) for v in keys[idx]) if idx < len(keys) else str(idx)
+            lines.append(f"({key_text}): {message}")
+        if len(errors) > limit:
+            lines.append(f"... (+{len(errors) - limit})")
+        return "\n".join(lines)
 
 
     # ------------------------------------------------------------------
@@ -655,9 +954,17 @@ class InsertWindow(tk.Toplevel):
     def _on_close(self):
         """Đóng cửa sổ và giải phóng kết nối."""
         self._hide_loading()
+        if getattr(self, "_catalog_registered", False):
+            db_utils.stop_catalog_refresh(self.conn_info)
+            self._catalog_registered = False
+        if self._job is not None and self._job.running:
+            # Job đang chạy giữ kết nối: yêu cầu hủy, trả kết nối khi job đã rollback xong
+            self._job.cancel()
+            job_runner.release_when_idle(self.conn)
+            self.conn = None
         try:
             if self.conn:
-                self.conn.close()
+                db_utils.release_connection(self.conn)
         except Exception as exc:
             if not self._is_expected_close_error(exc):
                 self._log_exception("Failed to close insert connection", exc)
@@ -716,7 +1023,7 @@ class InsertWindow(tk.Toplevel):
         except Exception as exc:
             self._log_exception("Failed to write insert history status", exc)
         finally:
-            if status in {"success", "failed"}:
+            if status in {"success", "failed", "cancelled"}:
                 self._draft_history_id = None
 
     def _show_loading(self, message: str):
@@ -751,6 +1058,12 @@ class InsertWindow(tk.Toplevel):
             self.btn_reorder.config(text=self._t("insert.btn.reorder"))
         if hasattr(self, "btn_clear"):
             self.btn_clear.config(text=self._t("insert.btn.clear"))
+        if hasattr(self, "btn_execute"):
+            self.btn_execute.config(text=self._t("insert.btn.execute"))
+        if hasattr(self, "chk_upsert"):
+            self.chk_upsert.config(text=self._t("insert.chk.upsert"))
+        if hasattr(self, "chk_upsert_preview"):
+            self.chk_upsert_preview.config(text=self._t("insert.chk.upsert_preview"))
         if hasattr(self, "grp_connection"):
             self.grp_connection.config(text=self._t("insert.section.connection"))
         if hasattr(self, "lbl_user"):
@@ -0,0 +1,183 @@
+"""
+Chạy tác vụ DB nặng ngoài luồng giao diện cho các màn hình Insert/Update/Backup.
+
+Mỗi kết nối Oracle chỉ được dùng bởi một luồng tại một thời điểm, nên các job
+trên cùng một kết nối được xếp hàng tuần tự bằng khóa theo kết nối.
+"""
+from __future__ import annotations
+
+import contextlib
+import logging
+import threading
+import time
+import tkinter as tk
+from typing import Any, Callable, Dict, Optional
+
+from screen.DB import db_utils
+from screen.DB.widgets import ProgressDialog
+
+logger = logging.getLogger("ToolVIP.Jobs")
+
+JobCancelled = db_utils.OperationCancelled
+
+PROGRESS_INTERVAL = 0.15
+
+_LOCKS_GUARD = threading.Lock()
+_CONNECTION_LOCKS: Dict[int, threading.RLock] = {}
+
+
+def connection_lock(conn) -> threading.RLock:
+    """Khóa dùng chung cho mọi thao tác trên cùng một kết nối."""
+    with _LOCKS_GUARD:
+        lock = _CONNECTION_LOCKS.get(id(conn))
+        if lock is None:
+            lock = threading.RLock()
+            _CONNECTION_LOCKS[id(conn)] = lock
+        return lock
+
+
+def release_when_idle(conn) -> None:
+    """Trả kết nối về pool sau khi job đang chạy trên kết nối đó kết thúc."""
+    if conn is None:
+        return
+
+    def worker():
+        lock = connection_lock(conn)
+        with lock:
+            try:
+                db_utils.release_connection(conn)
+            except Exception as exc:
+                logger.debug("Release connection after jobs failed: %s", exc)
+        with _LOCKS_GUARD:
+            if _CONNECTION_LOCKS.get(id(conn)) is lock:
+                _CONNECTION_LOCKS.pop(id(conn), None)
+
+    threading.Thread(target=worker, daemon=True).start()
+
+
+def _post(owner: tk.Misc, callback: Callable[..., Any], *args: Any) -> None:
+    """Đẩy callback về luồng Tk; bỏ qua nếu cửa sổ đã đóng."""
+    try:
+        owner.after(0, lambda: callback(*args))
+    except (tk.TclError, RuntimeError):
+        pass
+
+
+class JobContext:
+    """Đối tượng truyền vào hàm work: báo tiến độ, kiểm tra hủy, gửi cập nhật về UI."""
+
+    def __init__(self, job: "BackgroundJob") -> None:
+        self._job = job
+        self._last_report = 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        return self._job.cancel_event.is_set()
+
+    def check_cancelled(self) -> None:
+        if self.cancelled:
+            raise JobCancelled()
+
+    def progress(self, done: int, total: Optional[int] = None, message: str = "") -> None:
+        """Báo số dòng đã xử lý (giới hạn tần suất cập nhật UI) và dừng nếu người dùng hủy."""
+        self.check_cancelled()
+        now = time.monotonic()
+        if total is not None and done < total and now - self._last_report < PROGRESS_INTERVAL:
+            return
+        self._last_report = now
+        self.post(self._job.report_progress, done, total, message)
+
+    def post(self, callback: Callable[..., Any], *args: Any) -> None:
+        _post(self._job.owner, callback, *args)
+
+
+class BackgroundJob:
+    """
+    Chạy work(ctx) trên luồng nền, giữ khóa kết nối trong suốt thời gian chạy.
+    Lỗi hoặc hủy đều rollback giao dịch dang dở trước khi báo về UI.
+    """
+
+    def __init__(
+        self,
+        owner: tk.Misc,
+        conn,
+        work: Callable[[JobContext], Any],
+        *,
+        title: str = "",
+        on_success: Optional[Callable[[Any], None]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+        on_cancel: Optional[Callable[[Any], None]] = None,
+        cancellable: bool = True,
+    ) -> None:
+        self.owner = owner
+        self.conn = conn
+        self.work = work
+        self.title = title
+        self.on_success = on_success
+        self.on_error = on_error
+        self.on_cancel = on_cancel
+        self.cancellable = cancellable
+        self.cancel_event = threading.Event()
+        self._dialog: Optional[ProgressDialog] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> "BackgroundJob":
+        self._dialog = ProgressDialog(
+            self.owner,
+            self.title,
+            on_cancel=self.cancel if self.cancellable else None,
+        )
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self) -> None:
+        self.cancel_event.set()
+        if self._dialog is not None:
+            self._dialog.set_cancelling()
+
+    def report_progress(self, done: int, total: Optional[int], message: str) -> None:
+        if self._dialog is not None:
+            self._dialog.update_progress(done, total, message)
+
+    def _rollback(self) -> None:
+        try:
+            if self.conn is not None:
+                self.conn.rollback()
+        except Exception as exc:
+            logger.warning("Rollback after background job failed: %s", exc)
+
+    def _run(self) -> None:
+        ctx = JobContext(self)
+        # Job không dùng kết nối (vd. quét tệp) thì không cần xếp hàng sau các job khác
+        lock = connection_lock(self.conn) if self.conn is not None else contextlib.nullcontext()
+        with lock:
+            try:
+                result = self.work(ctx)
+            except JobCancelled as exc:
+                self._rollback()
+                logger.info("Background job cancelled: %s", self.title)
+                _post(self.owner, self._finish, self.on_cancel, exc.result)
+                return
+            except Exception as exc:
+                self._rollback()
+                logger.exception("Background job failed: %s", self.title, exc_info=exc)
+                _post(self.owner, self._finish, self.on_error, exc)
+                return
+        _post(self.owner, self._finish, self.on_success, result)
+
+    def _finish(self, callback: Optional[Callable[[Any], None]], payload: Any) -> None:
+        if self._dialog is not None:
+            self._dialog.close()
+            self._dialog = None
+        if callback is not None:
+            callback(payload)
+
+
+def run_job(owner: tk.Misc, conn, work: Callable[[JobContext], Any], **kwargs: Any) -> BackgroundJob:
+    """Tạo và khởi chạy một BackgroundJob (xem tham số của BackgroundJob)."""
+    return BackgroundJob(owner, conn, work, **kwargs).start()
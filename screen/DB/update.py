@@ -11,8 +11,8 @@ from tkinter import messagebox, ttk, font as tkfont
 from tkinter.scrolledtext import ScrolledText
 from typing import Any, Dict, List, Optional
 
-from screen.DB import db_utils
-from screen.DB.widgets import ColumnOrderDialog, DataGrid, LoadingPopup
+from screen.DB import db_utils, job_runner
+from screen.DB.widgets import ColumnOrderDialog, DataGrid, LoadingPopup, format_plan_report
 from core import history, i18n
 
 APP_TITLE_KEY = "common.app_title"
@@ -47,14 +47,17 @@ class UpdateWindow(tk.Toplevel):
         self._active_table: Optional[Dict[str, str]] = None
         self._columns: List[str] = []
         self._column_meta: Dict[str, dict] = {}
+        self._converters: Dict[str, tuple] = {}
         self._pk_columns: List[str] = []
         self._cached_rows: List[Dict[str, str]] = []
+        self._last_row_counts: List[Optional[int]] = []
         self._draft_history_id: Optional[int] = None
         self._draft_history_sql: str = ""
         self._loader: Optional[LoadingPopup] = None
         self._current_table_label: str = "..."
         self._metadata_cache: Dict[str, Dict[str, Any]] = {}
         self._metadata_token: int = 0
+        self._job: Optional[job_runner.BackgroundJob] = None
 
         ACTIVE_WINDOWS.append(self)
 
@@ -209,6 +212,16 @@ class UpdateWindow(tk.Toplevel):
         self.btn_clear = ttk.Button(self.grp_actions, text=self._t("update.btn.clear"), command=self._clear)
         self.btn_clear.grid(row=2, column=0, sticky="ew", pady=4)
 
+        self.btn_execute = ttk.Button(self.grp_actions, text=self._t("update.btn.execute"), command=self._execute)
+        self.btn_execute.grid(row=3, column=0, sticky="ew", pady=4)
+
+        self.btn_analyze = ttk.Button(self.grp_actions, text=self._t("plan.btn.analyze"), command=self._analyze)
+        self.btn_analyze.grid(row=4, column=0, sticky="ew", pady=4)
+
+        self.var_diff_only = tk.BooleanVar(value=True)
+        self.chk_diff_only = ttk.Checkbutton(self.grp_actions, text=self._t("update.chk.diff_only"), variable=self.var_diff_only)
+        self.chk_diff_only.grid(row=5, column=0, sticky="w", pady=(4, 0))
+
 
     def _build_connection(self, parent: ttk.Frame):
         """Hiển thị thông tin kết nối đang sử dụng."""
@@ -250,7 +263,7 @@ class UpdateWindow(tk.Toplevel):
         """Kết nối cơ sở dữ liệu ở luồng nền và tải danh sách bảng."""
         def worker():
             try:
-                self.conn = db_utils.connect_oracle(
+                self.conn = db_utils.acquire_connection(
                     self.conn_info.get("user", ""),
                     self.conn_info.get("password", ""),
                     self.conn_info.get("host", ""),
@@ -259,6 +272,8 @@ class UpdateWindow(tk.Toplevel):
                     bool(self.conn_info.get("use_host_port")),
                 )
                 tables = db_utils.fetch_accessible_tables(self.conn)
+                db_utils.start_catalog_refresh(self.conn_info)
+                self._catalog_registered = True
             except db_utils.OracleDriverNotAvailable as exc:
                 msg = str(exc)
                 self._log_exception("Oracle driver unavailable for update window", exc)
@@ -390,8 +405,9 @@ class UpdateWindow(tk.Toplevel):
 
         def worker():
             try:
-                columns = db_utils.fetch_table_columns(self.conn, table_key, self.current_owner)
-                pk_cols = db_utils.fetch_primary_keys(self.conn, table_key, self.current_owner)
+                with job_runner.connection_lock(self.conn):
+                    columns = db_utils.fetch_table_columns(self.conn, table_key, self.current_owner)
+                    pk_cols = db_utils.fetch_primary_keys(self.conn, table_key, self.current_owner)
             except Exception as exc:
                 self._log_exception(f"Failed to fetch metadata for table {table_key}", exc)
                 self.after(0, lambda: self._handle_metadata_error(item, exc, token))
@@ -459,6 +475,9 @@ class UpdateWindow(tk.Toplevel):
             getattr(self, "btn_build_sql", None),
             getattr(self, "btn_reorder", None),
             getattr(self, "btn_clear", None),
+            getattr(self, "btn_execute", None),
+            getattr(self, "btn_analyze", None),
+            getattr(self, "chk_diff_only", None),
             getattr(self, "btn_import_csv", None),
             getattr(self, "btn_export_csv", None),
             getattr(self, "btn_add_row", None),
@@ -580,82 +599,272 @@ class UpdateWindow(tk.Toplevel):
         self._draft_history_id = None
         self._draft_history_sql = ""
 
-    def _execute(self):
-        """Thuc thi cau UPDATE truoc tiep len co so du lieu."""
+    def _prepare_update(self, execute: bool) -> Optional[Dict[str, Any]]:
+        """
+        Kiểm tra điều kiện và dựng (sql, binds) cho từng dòng lưới.
+        execute=True: hỏi xác nhận và ghi lịch sử khi lỗi; False dùng cho bước phân tích.
+        """
         table = self._current_table()
         if not table:
             messagebox.showwarning(self._t(APP_TITLE_KEY), self._t("update.msg.no_table"), parent=self)
-            return
+            return None
         rows = self.grid.get_all()
         if not rows:
             messagebox.showwarning(self._t(APP_TITLE_KEY), self._t("update.msg.no_data_execute"), parent=self)
-            return
+            return None
         if not self.conn:
             msg = self._t("update.msg.not_connected")
-            self._log_history_status("failed", msg, len(rows), self.txt_sql.get("1.0", tk.END).strip(), table)
+            if execute:
+                self._log_history_status("failed", msg, len(rows), self.txt_sql.get("1.0", tk.END).strip(), table)
             messagebox.showerror(self._t(APP_TITLE_KEY), msg, parent=self)
-            return
-        if not messagebox.askyesno(self._t(APP_TITLE_KEY), self._t("update.msg.confirm_execute"), parent=self):
-            return
+            return None
+        if self._job is not None and self._job.running:
+            return None
+        if execute and not messagebox.askyesno(self._t(APP_TITLE_KEY), self._t("update.msg.confirm_execute"), parent=self):
+            return None
         set_columns = [col for col in self._columns if col not in self._pk_columns]
         if not set_columns:
             messagebox.showwarning(self._t(APP_TITLE_KEY), self._t("update.msg.no_columns_update"), parent=self)
-            return
+            return None
         row_count = len(rows)
         sql_text_trim = (self.txt_sql.get("1.0", tk.END) or "").strip()
         condition_template = self._condition_template()
         owner, table_name = self._split_table(table)
+        # Chạy thật luôn dùng OWNER.TABLE để bước so sánh (diff) và UPDATE cùng trỏ một bảng
+        sql_table = f"{owner}.{table_name}"
+
+        condition_sql, condition_cols = self._bind_condition(condition_template)
+        if not self._pk_columns and not condition_sql:
+            msg = self._t("update.msg.where_missing_no_pk")
+            if execute:
+                self._log_history_status("failed", msg, row_count, sql_text_trim, table)
+            messagebox.showerror(self._t(APP_TITLE_KEY), msg, parent=self)
+            return None
 
         try:
-            cur = self.conn.cursor()
-        except Exception as exc:
-            self._log_exception("Failed to create cursor for update", exc)
-            msg = self._t("update.msg.cursor_error", error=str(exc))
-            self._log_history_status("failed", msg, row_count, sql_text_trim, table)
+            statements = [
+                self._build_update_statement(row, set_columns, sql_table, condition_sql, condition_cols)
+                for row in rows
+            ]
+        except ValueError as exc:
+            msg = str(exc)
+            if execute:
+                self._log_history_status("failed", msg, row_count, sql_text_trim, table)
             messagebox.showerror(self._t(APP_TITLE_KEY), msg, parent=self)
+            return None
+        return {
+            "table": table,
+            "table_name": table_name,
+            "sql_table": sql_table,
+            "rows": rows,
+            "set_columns": set_columns,
+            "condition_sql": condition_sql,
+            "condition_cols": condition_cols,
+            "statements": statements,
+            "sql": sql_text_trim,
+        }
+
+    def _analyze(self):
+        """EXPLAIN PLAN cho mỗi dạng câu UPDATE, cảnh báo full scan trên bảng lớn."""
+        plan = self._prepare_update(execute=False)
+        if plan is None:
             return
+        sql_list = [sql for sql, _ in plan["statements"]]
 
-        try:
-            for row in rows:
-                set_clause = ", ".join(f"{col} = :{col}" for col in set_columns)
-                if not self._pk_columns and not condition_template:
-                    raise ValueError(self._t("update.msg.where_missing_no_pk"))
-                where_parts = []
-                binds = {}
-                for col in set_columns:
-                    binds[col] = self._convert_value(row.get(col), self._column_meta.get(col))
-                for pk in self._pk_columns:
-                    value = row.get(pk)
-                    if value in (None, ""):
-                        raise ValueError(self._t("update.msg.pk_missing", column=pk))
-                    binds[f"PK_{pk}"] = self._convert_value(value, self._column_meta.get(pk))
-                    where_parts.append(f"{pk} = :PK_{pk}")
-                extra = self._render_condition(condition_template, row)
-                sql = f"UPDATE {table_name} SET {set_clause}"
-                if where_parts:
-                    sql += " WHERE " + " AND ".join(where_parts)
-                    if extra:
-                        sql += " AND (" + extra + ")"
+        def work(ctx):
+            return db_utils.check_statement_plans(self.conn, sql_list, progress=lambda done: ctx.progress(done))
+
+        def on_success(payload):
+            findings, errors, explained = payload
+            report = format_plan_report(findings, errors, explained)
+            if findings or errors:
+                messagebox.showwarning(self._t(APP_TITLE_KEY), report, parent=self)
+            else:
+                messagebox.showinfo(self._t(APP_TITLE_KEY), report, parent=self)
+
+        self._job = job_runner.run_job(
+            self,
+            self.conn,
+            work,
+            title=self._t("plan.progress"),
+            on_success=on_success,
+            on_error=lambda exc: messagebox.showerror(self._t(APP_TITLE_KEY), self._t("plan.error", error=str(exc)), parent=self),
+        )
+
+    def _execute(self):
+        """Thuc thi cau UPDATE truoc tiep len co so du lieu."""
+        plan = self._prepare_update(execute=True)
+        if plan is None:
+            return
+        table = plan["table"]
+        table_name = plan["table_name"]
+        sql_table = plan["sql_table"]
+        rows = plan["rows"]
+        row_count = len(rows)
+        set_columns = plan["set_columns"]
+        condition_sql = plan["condition_sql"]
+        condition_cols = plan["condition_cols"]
+        statements = plan["statements"]
+        sql_text_trim = plan["sql"]
+
+        self.grid.clear_marks()
+        label = self._t("update.progress.updating")
+        label_compare = self._t("update.progress.comparing")
+        diff_mode = bool(self.var_diff_only.get() and self._pk_columns)
+        pk_cols = list(self._pk_columns)
+        column_meta = dict(self._column_meta)
+
+        def work(ctx):
+            if not diff_mode:
+                result = db_utils.execute_dml_groups(
+                    self.conn,
+                    statements,
+                    progress=lambda done: ctx.progress(done, row_count, label),
+                )
+                return result, list(range(row_count)), [], []
+            ctx.progress(0, None, label_compare)
+            changes = db_utils.diff_rows_against_db(
+                self.conn, sql_table, self.current_owner, pk_cols, set_columns, rows, column_meta
+            )
+            ctx.check_cancelled()
+            changed_statements = []
+            index_map: List[int] = []
+            skipped: List[int] = []
+            missing: List[int] = []
+            for idx, changed in enumerate(changes):
+                if changed is None:
+                    missing.append(idx)
+                elif not changed:
+                    skipped.append(idx)
                 else:
-                    if not extra:
-                        raise ValueError(self._t("update.msg.where_missing"))
-                    sql += " WHERE " + extra
-                cur.execute(sql, binds)
-            self.conn.commit()
-        except Exception as exc:
+                    index_map.append(idx)
+                    changed_statements.append(
+                        self._build_update_statement(rows[idx], changed, sql_table, condition_sql, condition_cols)
+                    )
+            total = len(changed_statements)
+            result = db_utils.execute_dml_groups(
+                self.conn,
+                changed_statements,
+                progress=lambda done: ctx.progress(done, total, label),
+            )
+            return result, index_map, skipped, missing
+
+        def on_error(exc: Exception):
             self._log_exception("Failed executing update statements", exc)
-            self.conn.rollback()
             msg = self._t("update.msg.update_error", error=str(exc))
             self._log_history_status("failed", msg, row_count, sql_text_trim, table)
             messagebox.showerror(self._t(APP_TITLE_KEY), msg, parent=self)
+
+        def on_cancel(_partial):
+            msg = self._t("widget.progress.cancelled")
+            self._log_history_status("cancelled", msg, 0, sql_text_trim, table)
+            messagebox.showwarning(self._t(APP_TITLE_KEY), msg, parent=self)
+
+        self._job = job_runner.run_job(
+            self,
+            self.conn,
+            work,
+            title=self._t("update.progress.title", table=table_name),
+            on_success=lambda payload: self._finish_update(*payload, row_count, sql_text_trim, table),
+            on_error=on_error,
+            on_cancel=on_cancel,
+        )
+
+    def _finish_update(
+        self,
+        result: db_utils.DmlResult,
+        index_map: List[int],
+        skipped: List[int],
+        missing: List[int],
+        row_count: int,
+        sql_text_trim: str,
+        table: str,
+    ):
+        """Hiển thị kết quả update: tô vàng dòng không khớp, tô đỏ dòng lỗi."""
+        # Gióng kết quả của các câu đã gửi về vị trí dòng trên lưới (None = dòng không đổi, bỏ qua)
+        counts: List[Optional[int]] = [None] * row_count
+        for pos, idx in enumerate(index_map):
+            counts[idx] = result.row_counts[pos]
+        for idx in missing:
+            counts[idx] = 0
+        errors = [(index_map[pos], message) for pos, message in result.errors]
+        self._last_row_counts = counts
+        marks = {idx: "warning" for idx, count in enumerate(counts) if count == 0}
+        marks.update({idx: "error" for idx, _ in errors})
+        self.grid.mark_rows(marks)
+        if errors:
+            details = "\n".join(f"#{idx + 1}: {message}" for idx, message in errors[:5])
+            if len(errors) > 5:
+                details += f"\n... (+{len(errors) - 5})"
+            msg = self._t("update.msg.row_errors", count=len(errors), details=details)
+            self._logger.error("Update failed on %s grid rows: %s", len(errors), details)
+            self._log_history_status("failed", msg, row_count, sql_text_trim, table)
+            messagebox.showerror(self._t(APP_TITLE_KEY), msg, parent=self)
             return
-        finally:
-            try:
-                cur.close()
-            except Exception:
-                pass
-        self._log_history_status("success", self._t("update.msg.update_success"), row_count, sql_text_trim, table)
-        messagebox.showinfo(self._t(APP_TITLE_KEY), self._t("update.msg.update_success"), parent=self)
+
+        lines = [
+            self._t("update.msg.update_success"),
+            self._t("update.msg.update_summary", updated=result.affected, rows=row_count),
+        ]
+        if skipped:
+            lines.append(self._t("update.msg.skipped_rows", count=len(skipped)))
+        zero_rows = [idx for idx, count in enumerate(counts) if count == 0]
+        multi_rows = [(idx, count) for idx, count in enumerate(counts) if count is not None and count > 1]
+        if zero_rows:
+            lines.append(self._t("update.msg.zero_rows", count=len(zero_rows), rows=self._format_row_refs(zero_rows)))
+        if multi_rows:
+            refs = self._format_row_refs([idx for idx, _ in multi_rows], {idx: count for idx, count in multi_rows})
+            lines.append(self._t("update.msg.multi_rows", count=len(multi_rows), rows=refs))
+        msg = "\n".join(lines)
+        self._log_history_status("success", msg, result.affected, sql_text_trim, table)
+        if zero_rows:
+            messagebox.showwarning(self._t(APP_TITLE_KEY), msg, parent=self)
+        else:
+            messagebox.showinfo(self._t(APP_TITLE_KEY), msg, parent=self)
+
+    def _build_update_statement(
+        self,
+        row: Dict[str, str],
+        set_columns: List[str],
+        table_name: str,
+        condition_sql: str,
+        condition_cols: List[str],
+    ) -> tuple[str, Dict[str, Any]]:
+        """Tạo (sql, binds) cho một dòng lưới; thiếu giá trị khóa chính -> ValueError."""
+        binds: Dict[str, Any] = {}
+        for col in set_columns:
+            binds[col] = self._convert_value(row.get(col), col)
+        where_parts = []
+        for pk in self._pk_columns:
+            value = row.get(pk)
+            if value in (None, ""):
+                raise ValueError(self._t("update.msg.pk_missing", column=pk))
+            binds[f"PK_{pk}"] = self._convert_value(value, pk)
+            where_parts.append(f"{pk} = :PK_{pk}")
+        for col in condition_cols:
+            binds[f"C_{col}"] = self._condition_value(row.get(col), col)
+        # Placeholder nằm trong chuỗi '...' (vd. LIKE '%{{COL}}%') không bind được -> chèn giá trị
+        condition_sql = self._render_quoted(condition_sql, row)
+        # Cùng tập cột SET + cùng điều kiện -> cùng câu SQL -> gom chung một executemany
+        set_clause = ", ".join(f"{col} = :{col}" for col in set_columns)
+        sql = f"UPDATE {table_name} SET {set_clause}"
+        if where_parts:
+            sql += " WHERE " + " AND ".join(where_parts)
+            if condition_sql:
+                sql += " AND (" + condition_sql + ")"
+        else:
+            sql += " WHERE " + condition_sql
+        return sql, binds
+
+    @staticmethod
+    def _format_row_refs(indexes: List[int], counts: Optional[Dict[int, int]] = None, limit: int = 20) -> str:
+        """Hiển thị danh sách số thứ tự dòng lưới (kèm số dòng DB nếu có)."""
+        refs = []
+        for idx in indexes[:limit]:
+            refs.append(f"#{idx + 1}" + (f"={counts[idx]}" if counts and idx in counts else ""))
+        if len(indexes) > limit:
+            refs.append(f"... (+{len(indexes) - limit})")
+        return ", ".join(refs)
 
     def _condition_template(self) -> str:
         """Lấy mẫu điều kiện bổ sung người dùng nhập vào."""
@@ -671,21 +880,76 @@ class UpdateWindow(tk.Toplevel):
             meta = self._column_meta.get(col, {})
             return db_utils.format_sql_literal(row.get(col), meta)
 
-        pattern = re.compile(r"\{\{([A-Za-z0-9_]+)\}\}")
-        rendered = pattern.sub(repl, template)
-        return rendered
+        parts: List[str] = []
+        pos = 0
+        for quoted in self._QUOTED_RE.finditer(template):
+            parts.append(self._PLACEHOLDER_RE.sub(repl, template[pos : quoted.start()]))
+            parts.append(self._render_quoted(quoted.group(0), row))
+            pos = quoted.end()
+        parts.append(self._PLACEHOLDER_RE.sub(repl, template[pos:]))
+        return "".join(parts)
+
+    _PLACEHOLDER_RE = re.compile(r"\{\{([A-Za-z0-9_]+)\}\}")
+    _QUOTED_RE = re.compile(r"'(?:[^']|'')*'")
+
+    def _bind_condition(self, template: str) -> tuple[str, List[str]]:
+        """
+        Đổi placeholder {{COL}} trong điều kiện thành biến bind :C_COL.
+        Placeholder trong chuỗi '...' được giữ nguyên để _render_quoted chèn theo từng dòng.
+        """
+        if not template:
+            return "", []
+        columns: List[str] = []
+
+        def repl(match):
+            col = match.group(1).strip().upper()
+            if col not in columns:
+                columns.append(col)
+            return f":C_{col}"
+
+        parts: List[str] = []
+        pos = 0
+        for quoted in self._QUOTED_RE.finditer(template):
+            parts.append(self._PLACEHOLDER_RE.sub(repl, template[pos : quoted.start()]))
+            parts.append(quoted.group(0))
+            pos = quoted.end()
+        parts.append(self._PLACEHOLDER_RE.sub(repl, template[pos:]))
+        return "".join(parts), columns
+
+    def _render_quoted(self, condition_sql: str, row: Dict[str, str]) -> str:
+        """Chèn giá trị dòng vào placeholder còn lại (bên trong chuỗi), escape như format_sql_literal."""
+        if "{{" not in condition_sql:
+            return condition_sql
 
-    def _convert_value(self, value, meta):
-        """Chuyển đổi giá trị theo metadata để bind tham số chính xác."""
+        def repl(match):
+            value = row.get(match.group(1).strip().upper())
+            return db_utils.format_sql_literal(None if value is None else str(value))[1:-1]
+
+        return self._PLACEHOLDER_RE.sub(repl, condition_sql)
+
+    def _condition_value(self, value, col: str):
+        """Giá trị bind cho điều kiện: rỗng ở cột chuỗi -> ' ' giống literal của format_sql_literal."""
+        converter = self._converter(col)
+        if value in (None, "") or (isinstance(value, str) and not value.strip()):
+            return " " if converter.kind == "text" else None
+        return converter(value.strip() if isinstance(value, str) else value)
+
+    def _convert_value(self, value, col: str):
+        """
+        Chuyển giá trị lưới sang kiểu bind theo metadata (NUMBER -> int/Decimal,
+        DATE/TIMESTAMP -> datetime) để không phụ thuộc NLS và không mất độ chính xác.
+        """
         if value in (None, ""):
             return None
-        data_type = (meta or {}).get("data_type", "").upper() if meta else ""
-        if data_type in db_utils.NUMERIC_TYPES:
-            try:
-                return float(value) if "." in str(value) else int(value)
-            except Exception:
-                return value
-        return value
+        return self._converter(col)(value)
+
+    def _converter(self, col: str) -> db_utils.ColumnConverter:
+        meta = self._column_meta.get(col)
+        cached = self._converters.get(col)
+        if cached is None or cached[0] is not meta:
+            cached = (meta, db_utils.ColumnConverter(meta, col))
+            self._converters[col] = cached
+        return cached[1]
 
     # ------------------------------------------------------------------
     def _split_table(self, raw: str) -> tuple[str, str]:
@@ -701,9 +965,17 @@ class UpdateWindow(tk.Toplevel):
     def _on_close(self):
         """Đóng cửa sổ và giải phóng kết nối."""
         self._hide_loading()
+        if getattr(self, "_catalog_registered", False):
+            db_utils.stop_catalog_refresh(self.conn_info)
+            self._catalog_registered = False
+        if self._job is not None and self._job.running:
+            # Job đang chạy giữ kết nối: yêu cầu hủy, trả kết nối khi job đã rollback xong
+            self._job.cancel()
+            job_runner.release_when_idle(self.conn)
+            self.conn = None
         try:
             if self.conn:
-                self.conn.close()
+                db_utils.release_connection(self.conn)
         except Exception as exc:
             if not self._is_expected_close_error(exc):
                 self._log_exception("Failed to close update connection", exc)
@@ -751,7 +1023,7 @@ class UpdateWindow(tk.Toplevel):
         except Exception as exc:
             self._log_exception("Failed to write update history status", exc)
         finally:
-            if status in {"success", "failed"}:
+            if status in {"success", "failed", "cancelled"}:
                 self._draft_history_id = None
 
     def _show_loading(self, message: str):
@@ -792,6 +1064,12 @@ class UpdateWindow(tk.Toplevel):
             self.btn_reorder.configure(text=self._t("update.btn.reorder"))
         if hasattr(self, "btn_clear"):
             self.btn_clear.configure(text=self._t("update.btn.clear"))
+        if hasattr(self, "btn_execute"):
+            self.btn_execute.configure(text=self._t("update.btn.execute"))
+        if hasattr(self, "btn_analyze"):
+            self.btn_analyze.configure(text=self._t("plan.btn.analyze"))
+        if hasattr(self, "chk_diff_only"):
+            self.chk_diff_only.configure(text=self._t("update.chk.diff_only"))
         if hasattr(self, "btn_import_csv"):
             self.btn_import_csv.configure(text=self._t("update.btn.import_csv"))
         if hasattr(self, "btn_export_csv"):
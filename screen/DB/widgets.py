@@ -8,9 +8,15 @@ import csv
 import tkinter as tk
 from dataclasses import dataclass
 from tkinter import filedialog, messagebox, ttk
-from typing import Any, Dict, Iterable, List, Optional, Sequence
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
 from core import i18n
+from screen.DB import csv_stream
+
+
+GRID_CSV_MAX_ROWS = 50000
+# Số dòng thêm vào Treeview mỗi lượt after() khi nạp CSV
+GRID_CSV_LOAD_BATCH = 500
 
 
 def _t(key: str, **kwargs) -> str:
@@ -29,6 +35,33 @@ def _normalize_headers(headers: Sequence[str]) -> List[str]:
     return [str(h).strip() for h in headers]
 
 
+def format_plan_report(findings: Sequence[Any], errors: Sequence[Any], explained: int, limit: int = 10) -> str:
+    """Ghép kết quả kiểm tra EXPLAIN PLAN (db_utils.check_statement_plans) thành văn bản hiển thị."""
+    lines = [_t("plan.summary", shapes=explained, warnings=len(findings))]
+    for finding in findings[:limit]:
+        rows = finding.table_rows if finding.table_rows is not None else finding.cardinality
+        sql_preview = " ".join(finding.sql.split())
+        if len(sql_preview) > 120:
+            sql_preview = sql_preview[:117] + "..."
+        lines.append(
+            _t(
+                "plan.full_scan",
+                table=f"{finding.owner}.{finding.table}",
+                rows=f"{rows:,}" if rows is not None else "?",
+                cost=finding.cost if finding.cost is not None else "?",
+                executions=finding.executions,
+            )
+        )
+        lines.append(f"    {sql_preview}")
+    if len(findings) > limit:
+        lines.append(f"... (+{len(findings) - limit})")
+    for sql, message in errors[:limit]:
+        lines.append(_t("plan.error", error=message))
+    if not findings and not errors:
+        lines.append(_t("plan.ok"))
+    return "\n".join(lines)
+
+
 _excel_style_initialized = False
 
 
@@ -145,6 +178,101 @@ class LoadingPopup:
         self._progress = None
 
 
+class ProgressDialog:
+    """Popup tiến độ cho job nền: số dòng đã xử lý và nút hủy (tùy chọn)."""
+
+    def __init__(self, parent: tk.Widget, message: str | None = None, on_cancel=None):
+        """Khởi tạo popup, thanh tiến độ chạy vô hạn cho tới khi biết tổng số dòng."""
+        self._window = tk.Toplevel(parent)
+        self._window.transient(parent)
+        self._window.title(_t("widget.loading.title"))
+        self._window.resizable(False, False)
+        self._on_cancel = on_cancel
+        self._window.protocol("WM_DELETE_WINDOW", self._cancel if on_cancel else (lambda: None))
+
+        frame = ttk.Frame(self._window, padding=16)
+        frame.pack(fill="both", expand=True)
+        ttk.Label(frame, text=message or _t("widget.loading.message"), anchor="w").pack(fill="x")
+        self._progress = ttk.Progressbar(frame, mode="indeterminate", length=280, maximum=100)
+        self._progress.pack(fill="x", pady=(12, 4))
+        self._progress.start(12)
+        self._determinate = False
+        self._detail = ttk.Label(frame, text="", anchor="w")
+        self._detail.pack(fill="x")
+        self._btn_cancel = None
+        if on_cancel is not None:
+            self._btn_cancel = ttk.Button(frame, text=_t("common.cancel"), command=self._cancel, width=12)
+            self._btn_cancel.pack(anchor="e", pady=(10, 0))
+
+        try:
+            parent.update_idletasks()
+            self._window.update_idletasks()
+            w = self._window.winfo_reqwidth()
+            h = self._window.winfo_reqheight()
+            x = parent.winfo_rootx() + (parent.winfo_width() - w) // 2
+            y = parent.winfo_rooty() + (parent.winfo_height() - h) // 2
+            self._window.geometry(f"+{x}+{y}")
+        except Exception:
+            pass
+        try:
+            self._window.grab_set()
+        except Exception:
+            pass
+
+    def update_progress(self, done: int, total: Optional[int] = None, message: str = ""):
+        """Cập nhật số dòng đã xử lý; có tổng thì chuyển sang thanh tiến độ xác định."""
+        if self._window is None:
+            return
+        try:
+            if total:
+                if not self._determinate:
+                    self._progress.stop()
+                    self._progress.configure(mode="determinate")
+                    self._determinate = True
+                self._progress.configure(value=min(100.0, done * 100.0 / total))
+                text = _t("widget.progress.rows_total", done=done, total=total)
+            else:
+                text = _t("widget.progress.rows", done=done)
+            if message:
+                text = f"{message} - {text}"
+            self._detail.configure(text=text)
+        except tk.TclError:
+            pass
+
+    def set_cancelling(self):
+        """Khóa nút hủy trong lúc chờ job dừng và rollback."""
+        if self._window is None:
+            return
+        try:
+            if self._btn_cancel is not None:
+                self._btn_cancel.configure(state="disabled")
+            self._detail.configure(text=_t("widget.progress.cancelling"))
+        except tk.TclError:
+            pass
+
+    def _cancel(self):
+        if self._on_cancel is not None:
+            self._on_cancel()
+
+    def close(self):
+        """Đóng popup tiến độ."""
+        if self._window is None:
+            return
+        try:
+            self._progress.stop()
+        except Exception:
+            pass
+        try:
+            self._window.grab_release()
+        except Exception:
+            pass
+        try:
+            self._window.destroy()
+        except Exception:
+            pass
+        self._window = None
+
+
 class EditableTreeview(ttk.Treeview):
     """Treeview cho phép chỉnh sửa trực tiếp và thao tác clipboard."""
 
@@ -174,10 +302,14 @@ class EditableTreeview(ttk.Treeview):
         self._last_click_region = ""
         self._editing_tag = "grid-row-editing"
         self._new_row_tag = "grid-row-new"
+        self._mark_tags = ("grid-row-warning", "grid-row-error")
         self.tag_configure("grid-row-even", background="#FFFFFF")
         self.tag_configure("grid-row-odd", background="#F8FAFF")
         self.tag_configure(self._editing_tag, background="#E0ECFF")
         self.tag_configure(self._new_row_tag, background="#FEF3C7")
+        # Cấu hình sau cùng để màu đánh dấu kết quả thực thi được ưu tiên hơn zebra/new
+        self.tag_configure("grid-row-warning", background="#FDE68A")
+        self.tag_configure("grid-row-error", background="#FECACA")
 
     # ---- editing -------------------------------------------------
     def _on_double_click(self, event):
@@ -436,6 +568,7 @@ class EditableTreeview(ttk.Treeview):
         if item and column:
             self.set(item, column, value)
             self._set_current_cell(item, column)
+            self._unmark_item(item)
         self._close_editor()
         self.refresh_striping()
 
@@ -602,6 +735,53 @@ class EditableTreeview(ttk.Treeview):
             result.append(row)
         return result
 
+    def data_items(self) -> List[str]:
+        """Danh sách item tương ứng từng dòng mà get_all() trả về (bỏ dòng trống)."""
+        items = []
+        for item in self.get_children(""):
+            if all(self.set(item, col) == "" for col in self["columns"]):
+                continue
+            items.append(item)
+        return items
+
+    def mark_rows(self, marks: Dict[int, str]):
+        """
+        Tô màu các dòng theo chỉ số get_all(): status "error" hoặc "warning".
+        Các đánh dấu cũ được xóa trước.
+        """
+        self.clear_marks()
+        items = self.data_items()
+        first: Optional[str] = None
+        for idx in sorted(marks):
+            if not 0 <= idx < len(items):
+                continue
+            item = items[idx]
+            tags = [t for t in self.item(item, "tags") if t not in self._mark_tags]
+            tags.append(f"grid-row-{marks[idx]}")
+            self.item(item, tags=tags)
+            first = first or item
+        if first:
+            self.see(first)
+
+    def clear_marks(self):
+        for item in self.get_children(""):
+            self._unmark_item(item)
+
+    def keep_rows(self, indexes: Iterable[int]):
+        """Chỉ giữ lại các dòng có chỉ số (theo get_all()) nằm trong indexes."""
+        keep = set(indexes)
+        self._close_editor()
+        for idx, item in enumerate(self.data_items()):
+            if idx not in keep:
+                self.delete(item)
+        self.refresh_striping()
+
+    def _unmark_item(self, item: str):
+        tags = list(self.item(item, "tags"))
+        kept = [t for t in tags if t not in self._mark_tags]
+        if len(kept) != len(tags):
+            self.item(item, tags=kept)
+
     def export_csv(self, path: str):
         headers = list(self["columns"])
         with open(path, "w", encoding="utf-8", newline="") as f:
@@ -610,27 +790,31 @@ class EditableTreeview(ttk.Treeview):
             for item in self.get_children(""):
                 writer.writerow([self.set(item, col) for col in headers])
 
-    def import_csv(self, path: str, has_header: bool = True):
-        with open(path, "r", encoding="utf-8") as f:
-            reader = csv.reader(f)
-            rows = list(reader)
-        if not rows:
-            return
-        if has_header:
-            header = rows[0]
-            if len(header) == len(self["columns"]):
-                for col, head in zip(self["columns"], header):
-                    self.heading(col, text=head or col)
-            data_rows = rows[1:]
-        else:
-            data_rows = rows
+    def import_csv(self, path: str, has_header: bool = True, max_rows: Optional[int] = None) -> Tuple[int, bool]:
+        """
+        Đọc CSV vào lưới ngay trên luồng gọi, dừng sau max_rows dòng dữ liệu.
+        Trả về (số dòng đã nạp, tệp còn dòng chưa nạp hay không).
+        """
+        load = csv_stream.read_grid_rows(path, max_rows, has_header=has_header)
+        self.begin_csv_load(load.headers)
+        self.append_values(load.rows)
+        self.refresh_striping()
+        return len(load.rows), load.dropped > 0
+
+    def begin_csv_load(self, headers: Sequence[str]):
+        """Xóa lưới và lấy header CSV làm tiêu đề cột khi khớp số cột."""
+        columns = list(self["columns"])
         self.clear()
-        for idx, data_row in enumerate(data_rows):
-            values = {}
-            for col_index, col in enumerate(self["columns"]):
-                values[col] = data_row[col_index] if col_index < len(data_row) else ""
+        if headers and len(headers) == len(columns):
+            for col, head in zip(columns, headers):
+                self.heading(col, text=head or col)
+
+    def append_values(self, rows: Iterable[Sequence[Any]]):
+        """Thêm các dòng theo vị trí cột (dòng mới); gọi refresh_striping sau khi nạp xong."""
+        columns = list(self["columns"])
+        for data_row in rows:
+            values = {col: (data_row[idx] if idx < len(data_row) else "") for idx, col in enumerate(columns)}
             self._append_row(values, mark_new=True)
-        self.refresh_striping()
 
 
 class DataGrid(ttk.Frame):
@@ -694,6 +878,17 @@ class DataGrid(ttk.Frame):
         """Trả về toàn bộ dữ liệu hiện có trong lưới."""
         return self.tree.get_all()
 
+    def mark_rows(self, marks: Dict[int, str]):
+        """Đánh dấu dòng lỗi/cảnh báo theo chỉ số của get_all()."""
+        self.tree.mark_rows(marks)
+
+    def clear_marks(self):
+        self.tree.clear_marks()
+
+    def keep_rows(self, indexes: Iterable[int]):
+        """Giữ lại các dòng được chỉ định (vd: dòng lỗi cần gửi lại)."""
+        self.tree.keep_rows(indexes)
+
     def import_csv_dialog(self):
         """Mở hộp thoại chọn CSV và nạp dữ liệu vào lưới."""
         path = filedialog.askopenfilename(
@@ -703,14 +898,69 @@ class DataGrid(ttk.Frame):
         )
         if not path:
             return
-        try:
-            self.tree.import_csv(path)
-        except Exception as exc:
-            messagebox.showerror(
-                _t("common.app_title"),
-                _t("grid.msg.read_csv_error", error=str(exc)),
+        # job_runner import widgets -> import tại chỗ để tránh vòng lặp import
+        from screen.DB import job_runner
+
+        label = _t("grid.progress.reading_csv")
+
+        def work(ctx):
+            return csv_stream.read_grid_rows(
+                path, GRID_CSV_MAX_ROWS, progress=lambda done: ctx.progress(done, None, label)
             )
 
+        def on_error(exc: Exception):
+            if self.winfo_exists():
+                messagebox.showerror(
+                    _t("common.app_title"),
+                    _t("grid.msg.read_csv_error", error=str(exc)),
+                    parent=self,
+                )
+
+        job_runner.run_job(
+            self,
+            None,
+            work,
+            title=_t("grid.progress.import_csv"),
+            on_success=self._fill_from_csv,
+            on_error=on_error,
+        )
+
+    def _fill_from_csv(self, load: csv_stream.CsvGridLoad):
+        """Nạp dòng vào lưới theo lô qua after() để giao diện không bị treo."""
+        if not self.winfo_exists():
+            return
+        self.tree.begin_csv_load(load.headers)
+        total = len(load.rows)
+        state = {"done": 0, "cancelled": False}
+        dialog = ProgressDialog(
+            self,
+            _t("grid.progress.import_csv"),
+            on_cancel=lambda: state.update(cancelled=True),
+        )
+
+        def step():
+            if not self.winfo_exists():
+                dialog.close()
+                return
+            if not state["cancelled"] and state["done"] < total:
+                end = min(total, state["done"] + GRID_CSV_LOAD_BATCH)
+                self.tree.append_values(load.rows[state["done"]:end])
+                state["done"] = end
+                dialog.update_progress(end, total, _t("grid.progress.filling"))
+                self.after(1, step)
+                return
+            dialog.close()
+            self.tree.refresh_striping()
+            loaded = state["done"]
+            if loaded < load.total:
+                messagebox.showwarning(
+                    _t("common.app_title"),
+                    _t("grid.msg.csv_truncated", count=loaded, total=load.total, dropped=load.total - loaded),
+                    parent=self,
+                )
+
+        step()
+
     def export_csv_dialog(self):
         """Mở hộp thoại lưu CSV và ghi dữ liệu hiện có."""
         path = filedialog.asksaveasfilename(
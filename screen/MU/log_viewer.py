@@ -1,15 +1,20 @@
 # log_viewer.py
+import argparse
+import csv
+import glob
+import json
 import logging
 import os
 import re
 import subprocess
 import sys
 import tkinter as tk
-from dataclasses import dataclass
+from collections import deque
+from dataclasses import asdict, dataclass
 from datetime import datetime
 from pathlib import Path
 from tkinter import filedialog, ttk, messagebox
-from typing import Any, List, Optional, Sequence, Tuple
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple
 
 from core import i18n
 
@@ -38,6 +43,10 @@ logger = logging.getLogger("ToolVIP.LogViewer")
 
 
 MAX_DISPLAY_ROWS = 2000
+# Số dòng trước/sau dòng Preparing dùng để dò mã màn hình
+SCREEN_LOOKAROUND = 5
+# Giới hạn số dòng giữ lại khi chờ Parameters của một câu SQL (giữ bộ nhớ cố định)
+MAX_PARAM_LOOKAHEAD = 5000
 EMPTY_MARK = "[ ]"
 CHECK_MARK = "[x]"
 
@@ -167,81 +176,180 @@ def _collect_param_blocks(
         blocks.append(current)
     return blocks
 
-def parse_sql(file_path: str) -> List[SqlEntry]:
-    """Đọc file log và gom danh sách các câu SQL."""
-    entries: List[SqlEntry] = []
-    try:
-        with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-            lines = f.readlines()
-    except Exception as e:
-        logger.exception("Could not read log file %s", file_path)
-        raise RuntimeError(f"Could not read log file {file_path}: {e}")
+def _update_thread_map(line: str, screen_map: Dict[str, str]) -> Optional[str]:
+    """Cập nhật ánh xạ thread -> màn hình từ một dòng log, trả về tên thread nếu có."""
+    m_thread = THREAD_RE.search(line)
+    if not m_thread:
+        return None
+    thread = m_thread.group(1)
+    req_match = REQUEST_RE.search(line)
+    if req_match:
+        screen_map[thread] = req_match.group(1)
+    elif "service.MU" in line:
+        m = SCREEN_ID_RE.search(line)
+        if m:
+            screen_map[thread] = m.group(0)
+    return thread
 
-    global thread_screen_map
-    thread_screen_map = {}
-    i = 0
-    total = len(lines)
-    while i < total:
-        line = lines[i]
-        # Update thread context mapping
-        thread = None
-        m_thread = THREAD_RE.search(line)
-        if m_thread:
-            thread = m_thread.group(1)
-            req_match = REQUEST_RE.search(line)
-            if req_match:
-                thread_screen_map[thread] = req_match.group(1)
-            elif "service.MU" in line:
-                m = SCREEN_ID_RE.search(line)
-                if m:
-                    thread_screen_map[thread] = m.group(0)
 
+def _replace_placeholders(query: str, parameters: Sequence[Tuple[str, str]]) -> str:
+    """Thay từng dấu ? trong câu SQL bằng giá trị tham số tương ứng."""
+    param_iter = iter(parameters)
+
+    def repl(_: re.Match) -> str:
+        try:
+            val, typ = next(param_iter)
+        except StopIteration:
+            return "?"
+        is_numeric = bool(re.match(r"^-?\d+(\.\d+)?$", val)) and (typ and "String" not in typ)
+        return val if is_numeric else f"'{val}'"
+
+    return re.sub(r"\?", repl, query)
+
+
+@dataclass
+class _PendingSql:
+    """Câu SQL đã gặp dòng Preparing nhưng chưa gom đủ Parameters."""
+
+    index: int
+    thread: Optional[str]
+    mapped_screen: Optional[str]
+    timestamp: str
+    function: str
+    raw_sql: str
+
+
+def iter_sql_entries(
+    lines: Iterable[str],
+    screen_map: Optional[Dict[str, str]] = None,
+) -> Iterator[SqlEntry]:
+    """
+    Duyệt log theo luồng và sinh SqlEntry theo thứ tự xuất hiện trong file.
+    Chỉ giữ một cửa sổ nhỏ các dòng quanh câu SQL đang xử lý nên bộ nhớ không phụ thuộc kích thước log.
+    """
+    if screen_map is None:
+        screen_map = {}
+    buf: List[str] = []
+    base = 0
+    pending: Deque[_PendingSql] = deque()
+    last_prepare = -1
+    index = -1
+
+    def emit(item: _PendingSql) -> Iterator[SqlEntry]:
+        offset = item.index - base
+        param_blocks = _collect_param_blocks(buf[offset:], 0, item.thread)
+        screen_id: Optional[str] = None
+        for k in range(max(0, offset - SCREEN_LOOKAROUND), min(offset + SCREEN_LOOKAROUND + 1, len(buf))):
+            m = SCREEN_ID_RE.search(buf[k])
+            if m:
+                screen_id = m.group(0)
+                break
+        if screen_id is None and item.thread:
+            screen_id = item.mapped_screen
+        for params in param_blocks or [[]]:
+            final_sql = _replace_placeholders(item.raw_sql, params)
+            sql_type = final_sql.strip().split()[0].upper() if final_sql.strip() else ""
+            param_values = [val for val, _ in params]
+            yield SqlEntry(item.timestamp, screen_id, sql_type, item.function, param_values, item.raw_sql, final_sql)
+
+    def flush(force: bool) -> Iterator[SqlEntry]:
+        nonlocal buf, base
+        while pending:
+            head = pending[0]
+            closed = last_prepare > head.index and index >= head.index + SCREEN_LOOKAROUND
+            if not (force or closed or index - head.index >= MAX_PARAM_LOOKAHEAD):
+                break
+            pending.popleft()
+            yield from emit(head)
+        keep_from = (pending[0].index if pending else index + 1) - SCREEN_LOOKAROUND
+        if keep_from > base:
+            del buf[: keep_from - base]
+            base = keep_from
+
+    for index, line in enumerate(lines):
+        buf.append(line)
+        thread = _update_thread_map(line, screen_map)
         if "Preparing:" in line and "DEBUG" in line:
+            last_prepare = index
             timestamp = line[:19] if DATE_PREFIX_RE.match(line) else ""
             try:
                 prefix, rest = line.split(": ==>", 1)
-            except ValueError:
-                i += 1
-                continue
-            func_tokens = prefix.rstrip().split()
-            function = func_tokens[-1].split(".")[-1] if func_tokens else ""
-            try:
                 raw_sql = rest.split("Preparing:", 1)[1].strip()
-            except IndexError:
-                i += 1
+            except (ValueError, IndexError):
+                prefix = ""
+                raw_sql = None
+            if raw_sql is not None:
+                func_tokens = prefix.rstrip().split()
+                function = func_tokens[-1].split(".")[-1] if func_tokens else ""
+                mapped = screen_map.get(thread) if thread else None
+                pending.append(_PendingSql(index, thread, mapped, timestamp, function, raw_sql))
+        yield from flush(False)
+    yield from flush(True)
+
+
+def iter_error_entries(
+    lines: Iterable[str],
+    screen_map: Optional[Dict[str, str]] = None,
+) -> Iterator[ErrorEntry]:
+    """
+    Duyệt log theo luồng và sinh ErrorEntry theo thứ tự xuất hiện.
+    Nếu không truyền screen_map, ánh xạ thread -> màn hình được dựng dần trong lúc đọc.
+    """
+    track_threads = screen_map is None
+    if screen_map is None:
+        screen_map = {}
+    details_lines: Optional[List[str]] = None
+
+    def build(block: List[str]) -> ErrorEntry:
+        first = block[0]
+        timestamp = first[:19] if DATE_PREFIX_RE.match(first) else ""
+        screen_id: Optional[str] = None
+        for m in SCREEN_ID_RE.finditer("\n".join(block)):
+            screen_id = m.group(0)
+            break
+        if screen_id is None:
+            m_thread = THREAD_RE.search(first)
+            if m_thread:
+                thread = m_thread.group(1)
+                if thread in screen_map:
+                    screen_id = screen_map[thread]
+        summary = first
+        if "ERROR" in summary:
+            parts = summary.split("ERROR", 1)[1].strip()
+            if " - " in parts:
+                parts = parts.split(" - ", 1)[1].strip()
+            summary = parts
+        return ErrorEntry(timestamp, screen_id, summary, "\n".join(block))
+
+    for line in lines:
+        if track_threads:
+            _update_thread_map(line, screen_map)
+        if details_lines is not None:
+            if not DATE_PREFIX_RE.match(line):
+                details_lines.append(line.rstrip("\n"))
                 continue
+            yield build(details_lines)
+            details_lines = None
+        if "ERROR" in line:
+            details_lines = [line.rstrip("\n")]
+    if details_lines is not None:
+        yield build(details_lines)
 
-            param_blocks = _collect_param_blocks(lines, i, thread)
 
-            # Replace ? with each parameter set
-            def replace_placeholders(query: str, parameters: Sequence[Tuple[str, str]]) -> str:
-                param_iter = iter(parameters)
-                def repl(_: re.Match) -> str:
-                    try:
-                        val, typ = next(param_iter)
-                    except StopIteration:
-                        return "?"
-                    is_numeric = bool(re.match(r"^-?\d+(\.\d+)?$", val)) and (typ and "String" not in typ)
-                    return val if is_numeric else f"'{val}'"
-                return re.sub(r"\?", repl, query)
-
-            # Screen id nearby or via thread map
-            screen_id: Optional[str] = None
-            for k in range(max(0, i - 5), min(i + 6, total)):
-                m = SCREEN_ID_RE.search(lines[k])
-                if m:
-                    screen_id = m.group(0)
-                    break
-            if screen_id is None and thread:
-                screen_id = thread_screen_map.get(thread, None)
-
-            blocks = param_blocks if param_blocks else [[]]
-            for params in blocks:
-                final_sql = replace_placeholders(raw_sql, params)
-                sql_type = final_sql.strip().split()[0].upper() if final_sql.strip() else ""
-                param_values = [val for val, _ in params]
-                entries.append(SqlEntry(timestamp, screen_id, sql_type, function, param_values, raw_sql, final_sql))
-        i += 1
+def _open_log(file_path: str) -> TextIO:
+    try:
+        return open(file_path, "r", encoding="utf-8", errors="ignore")
+    except Exception as e:
+        logger.exception("Could not read log file %s", file_path)
+        raise RuntimeError(f"Could not read log file {file_path}: {e}")
+
+
+def parse_sql(file_path: str) -> List[SqlEntry]:
+    """Đọc file log và gom danh sách các câu SQL."""
+    global thread_screen_map
+    thread_screen_map = {}
+    with _open_log(file_path) as f:
+        entries = list(iter_sql_entries(f, thread_screen_map))
     try:
         return sorted(entries, key=lambda e: e.timestamp, reverse=True)
     except Exception:
@@ -250,48 +358,8 @@ def parse_sql(file_path: str) -> List[SqlEntry]:
 
 def parse_errors(file_path: str) -> List[ErrorEntry]:
     """Đọc file log và gom danh sách lỗi kèm chi tiết."""
-    errors: List[ErrorEntry] = []
-    try:
-        with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-            lines = f.readlines()
-    except Exception as e:
-        logger.exception("Could not read log file %s", file_path)
-        raise RuntimeError(f"Could not read log file {file_path}: {e}")
-
-    i = 0
-    total = len(lines)
-    while i < total:
-        line = lines[i]
-        if "ERROR" in line:
-            timestamp = line[:19] if DATE_PREFIX_RE.match(line) else ""
-            details_lines = [line.rstrip("\n")]
-            i += 1
-            while i < total:
-                next_line = lines[i]
-                if DATE_PREFIX_RE.match(next_line):
-                    break
-                details_lines.append(next_line.rstrip("\n"))
-                i += 1
-            screen_id: Optional[str] = None
-            for m in SCREEN_ID_RE.finditer("\n".join(details_lines)):
-                screen_id = m.group(0)
-                break
-            if screen_id is None:
-                m_thread = THREAD_RE.search(details_lines[0])
-                if m_thread:
-                    thread = m_thread.group(1)
-                    if thread in thread_screen_map:
-                        screen_id = thread_screen_map[thread]
-            summary = details_lines[0]
-            if "ERROR" in summary:
-                parts = summary.split("ERROR", 1)[1].strip()
-                if " - " in parts:
-                    parts = parts.split(" - ", 1)[1].strip()
-                summary = parts
-            details = "\n".join(details_lines)
-            errors.append(ErrorEntry(timestamp, screen_id, summary, details))
-        else:
-            i += 1
+    with _open_log(file_path) as f:
+        errors = list(iter_error_entries(f, thread_screen_map))
     try:
         return sorted(errors, key=lambda e: e.timestamp, reverse=True)
     except Exception:
@@ -1809,9 +1877,185 @@ def open_log_viewer(parent: Optional[tk.Misc] = None, icon_path: Optional[str] =
     return root
 
 
-def main() -> None:
+CLI_TIME_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d", "%Y/%m/%d %H:%M:%S", "%Y/%m/%d")
+SQL_CSV_FIELDS = ("file", "timestamp", "screen_id", "sql_type", "function", "params", "sql")
+ERROR_CSV_FIELDS = ("file", "timestamp", "screen_id", "summary", "details")
+
+
+def _parse_cli_time(value: str) -> str:
+    """Chuẩn hoá mốc thời gian nhập từ dòng lệnh về dạng giống timestamp trong log."""
+    text = value.strip()
+    for fmt in CLI_TIME_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime("%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError(f"invalid time: {value!r}")
+
+
+def _expand_log_paths(patterns: Sequence[str]) -> List[str]:
+    """Mở rộng wildcard/thư mục thành danh sách file log (giữ thứ tự nhập)."""
+    paths: List[str] = []
+    for pattern in patterns:
+        if pattern == "-":
+            paths.append(pattern)
+            continue
+        if os.path.isdir(pattern):
+            matches = sorted(glob.glob(os.path.join(pattern, "*.log")))
+        elif glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern))
+        else:
+            matches = [pattern]
+        if not matches:
+            logger.warning("No log file matches %s", pattern)
+        paths.extend(matches)
+    return paths
+
+
+def _entry_matches(
+    entry: Any,
+    *,
+    screen: Optional[str],
+    command: Optional[str],
+    since: Optional[str],
+    until: Optional[str],
+    keyword: Optional[str],
+) -> bool:
+    """Áp dụng bộ lọc màn hình/lệnh/thời gian/từ khoá giống màn hình log viewer."""
+    if screen and entry.screen_id != screen:
+        return False
+    if isinstance(entry, SqlEntry):
+        if command and entry.sql_type != command:
+            return False
+        fields = [entry.screen_id or "", entry.timestamp, entry.sql_type, entry.function, ", ".join(entry.params), entry.sql]
+    else:
+        fields = [entry.timestamp, entry.screen_id or "", entry.summary, entry.details]
+    if since or until:
+        if not entry.timestamp:
+            return False
+        if since and entry.timestamp < since:
+            return False
+        if until and entry.timestamp > until:
+            return False
+    if keyword:
+        return any(v and keyword in str(v).lower() for v in fields)
+    return True
+
+
+class _EntryWriter:
+    """Ghi từng entry ra JSONL/CSV/SQL ngay khi đọc được, không giữ lại trong bộ nhớ."""
+
+    def __init__(self, stream: TextIO, fmt: str, log_type: str) -> None:
+        self.stream = stream
+        self.fmt = fmt
+        self.count = 0
+        self._csv: Optional[Any] = None
+        if fmt == "csv":
+            fields = SQL_CSV_FIELDS if log_type == "SQL" else ERROR_CSV_FIELDS
+            self._csv = csv.DictWriter(stream, fieldnames=fields, extrasaction="ignore")
+            self._csv.writeheader()
+
+    def write(self, source: str, entry: Any) -> None:
+        record = asdict(entry)
+        record["file"] = source
+        if self.fmt == "jsonl":
+            self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        elif self.fmt == "csv":
+            if isinstance(entry, SqlEntry):
+                record["params"] = ", ".join(entry.params)
+            self._csv.writerow(record)
+        else:
+            header = " ".join(part for part in (entry.timestamp, entry.screen_id or "", entry.function) if part)
+            self.stream.write(f"-- {header}\n{entry.sql.rstrip().rstrip(';')};\n\n")
+        self.count += 1
+
+
+def _build_cli_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="log_viewer",
+        description="Parse MU logs without the GUI and export SQL/ERROR entries in file order.",
+    )
+    parser.add_argument("logs", nargs="+", help="log files, directories (*.log) or wildcards; '-' reads stdin")
+    parser.add_argument("-t", "--type", dest="log_type", choices=("sql", "error"), default="sql", help="entry type (default: sql)")
+    parser.add_argument("-s", "--screen", help="screen id, e.g. MUAB0010")
+    parser.add_argument(
+        "-c", "--command", type=str.upper, choices=("SELECT", "INSERT", "UPDATE", "DELETE"), help="SQL command (sql type only)"
+    )
+    parser.add_argument("--since", type=_parse_cli_time, help="keep entries at or after this time (YYYY-MM-DD[ HH:MM[:SS]])")
+    parser.add_argument("--until", type=_parse_cli_time, help="keep entries at or before this time (YYYY-MM-DD[ HH:MM[:SS]])")
+    parser.add_argument("-k", "--keyword", help="case-insensitive keyword searched in every column")
+    parser.add_argument("-f", "--format", dest="fmt", choices=("jsonl", "csv", "sql"), default="jsonl", help="output format (default: jsonl)")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    return parser
+
+
+def run_cli(argv: Sequence[str]) -> int:
+    """Chạy chế độ dòng lệnh: đọc log theo luồng, lọc và ghi kết quả."""
+    parser = _build_cli_parser()
+    args = parser.parse_args(list(argv))
+    log_type = args.log_type.upper()
+    if args.fmt == "sql" and log_type != "SQL":
+        parser.error("--format sql is only available for --type sql")
+    if args.command and log_type != "SQL":
+        parser.error("--command is only available for --type sql")
+    paths = _expand_log_paths(args.logs)
+    if not paths:
+        parser.error("no log file to read")
+    screen = args.screen.strip().upper() if args.screen else None
+    keyword = args.keyword.strip().lower() if args.keyword else None
+
+    if args.output:
+        out_stream: TextIO = open(args.output, "w", encoding="utf-8", newline="")
+    else:
+        out_stream = sys.stdout
+    writer = _EntryWriter(out_stream, args.fmt, log_type)
+    exit_code = 0
+    try:
+        for path in paths:
+            try:
+                handle = sys.stdin if path == "-" else _open_log(path)
+            except RuntimeError as exc:
+                print(exc, file=sys.stderr)
+                exit_code = 1
+                continue
+            try:
+                entries: Iterator[Any]
+                if log_type == "SQL":
+                    entries = iter_sql_entries(handle)
+                else:
+                    entries = iter_error_entries(handle)
+                for entry in entries:
+                    if _entry_matches(
+                        entry,
+                        screen=screen,
+                        command=args.command,
+                        since=args.since,
+                        until=args.until,
+                        keyword=keyword,
+                    ):
+                        writer.write(path, entry)
+            finally:
+                if handle is not sys.stdin:
+                    handle.close()
+    except BrokenPipeError:
+        # Đầu ra bị đóng sớm (vd: | head) -> dừng êm
+        return exit_code
+    finally:
+        if out_stream is not sys.stdout:
+            out_stream.close()
+        else:
+            out_stream.flush()
+    logger.info("Exported %s %s entries from %s file(s)", writer.count, log_type, len(paths))
+    return exit_code
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = list(sys.argv[1:] if argv is None else argv)
+    if args:
+        return run_cli(args)
     open_log_viewer()
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
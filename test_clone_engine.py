@@ -0,0 +1,221 @@
+"""
+Kiểm tra phần logic thuần của clone_engine (chia batch/khoảng, hash delta, checkpoint,
+chạy tiếp, mở rộng theo FK) bằng kết nối giả, không cần Oracle driver.
+Hash theo khoảng được chạy thật trên sqlite với ORA_HASH/NVL/TO_CHAR giả lập.
+"""
+import sqlite3
+import threading
+import zlib
+
+from screen.DB import clone_engine as ce
+from screen.DB import db_utils
+
+
+class StubCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self._rows = []
+
+    def execute(self, sql, params=None):
+        self.conn.executed.append((sql, params))
+        self._rows = list(self.conn.respond(sql, params))
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def close(self):
+        pass
+
+
+class StubConnection:
+    def __init__(self, respond):
+        self.respond = respond
+        self.executed = []
+
+    def cursor(self):
+        return StubCursor(self)
+
+
+def _sqlite_oracle():
+    """sqlite có schema APP và các hàm Oracle mà row_hash_expr/range_hashes dùng."""
+    conn = sqlite3.connect(":memory:")
+    conn.execute("ATTACH DATABASE ':memory:' AS APP")
+    conn.create_function(
+        "ORA_HASH", 2, lambda value, limit: None if value is None else zlib.crc32(str(value).encode()) % (limit + 1)
+    )
+    conn.create_function("NVL", 2, lambda value, default: default if value is None else value)
+    conn.create_function("TO_CHAR", 3, lambda value, _fmt, _nls: None if value is None else str(value))
+    conn.execute("CREATE TABLE APP.SRC (ID INTEGER, STATUS TEXT, NOTE TEXT)")
+    conn.execute("CREATE TABLE APP.DST (ID INTEGER, STATUS TEXT, NOTE TEXT)")
+    return conn
+
+
+COLUMNS = [
+    {"column_name": "ID", "data_type": "NUMBER"},
+    {"column_name": "STATUS", "data_type": "VARCHAR2"},
+    {"column_name": "NOTE", "data_type": "VARCHAR2"},
+]
+
+
+def _range_hashes(conn, table, bounds):
+    return ce.range_hashes(conn, table, "ID", bounds, ce.row_hash_expr(COLUMNS))
+
+
+def test_batch_sizer_hard_limit_drops_below_min_for_wide_rows():
+    lob_columns = [{"column_name": f"C{i}", "data_type": "CLOB"} for i in range(40)]
+    sizer = ce.BatchSizer(lob_columns, max_bytes=16 * 1024 * 1024)
+    assert sizer.hard_limit == 16 * 1024 * 1024 // (40 * ce.LOB_INLINE_LIMIT)
+    assert sizer.hard_limit < ce.MIN_BATCH_SIZE
+    assert sizer.batch_size <= sizer.hard_limit
+    assert sizer.observe(10, 10 * 100) <= sizer.hard_limit
+
+
+def test_batch_sizer_adapts_towards_target_bytes():
+    sizer = ce.BatchSizer([{"column_name": "A", "data_type": "VARCHAR2", "data_length": 100}], target_bytes=100_000)
+    assert sizer.batch_size == 1000
+    # Dữ liệu thực hẹp hơn khai báo -> batch lớn dần, không vượt hard limit
+    sizer.observe(1000, 10_000)
+    assert 1000 < sizer.batch_size <= sizer.hard_limit
+    assert ce.BatchSizer(COLUMNS, fixed_size=7).observe(100, 1) == 7
+
+
+def test_batch_queue_blocks_on_bytes_and_close_wakes_producer():
+    queue = ce.BatchQueue(max_bytes=100)
+    assert queue.put("a", 80)
+    # Hàng đợi rỗng luôn nhận batch, kể cả batch lớn hơn giới hạn
+    assert queue.get() == "a"
+    assert queue.put("big", 500)
+    results = []
+    producer = threading.Thread(target=lambda: results.append(queue.put("b", 10)))
+    producer.start()
+    producer.join(0.1)
+    assert producer.is_alive()
+    queue.close()
+    producer.join(1)
+    assert results == [False]
+    assert queue.get() is ce._END
+    assert queue.peak_bytes == 500
+
+
+def test_plan_ranges_builds_open_ended_half_open_ranges():
+    conn = StubConnection(lambda sql, params: [(1,), (100,), (200,)])
+    task = ce.CloneTask("APP", "SRC", "APP", "DST")
+    ranges = ce.plan_ranges(conn, task, 3, key="ID")
+    assert [(r.lower, r.upper, r.index, r.count) for r in ranges] == [(None, 100, 0, 3), (100, 200, 1, 3), (200, None, 2, 3)]
+    assert conn.executed[0][1] == {"parts": 3}
+    where, binds = ranges[1].predicate()
+    assert where == "ID >= :range_lo AND ID < :range_hi" and binds == {"range_lo": 100, "range_hi": 200}
+    single = ce.plan_ranges(StubConnection(lambda sql, params: [(5,)]), task, 4, key="ID")
+    assert len(single) == 1 and single[0].predicate() == ("1 = 1", {})
+
+
+def test_row_hash_detects_column_values_swapped_between_rows():
+    conn = _sqlite_oracle()
+    rows = [(1, "OPEN", "x"), (2, "CLOSED", "y"), (3, None, "z")]
+    conn.executemany("INSERT INTO APP.SRC VALUES (?, ?, ?)", rows)
+    conn.executemany("INSERT INTO APP.DST VALUES (?, ?, ?)", rows)
+    assert _range_hashes(conn, "APP.SRC", [3]) == _range_hashes(conn, "APP.DST", [3])
+
+    # Đổi STATUS của id=1 và id=2: số dòng và tổng từng cột không đổi nhưng dòng đã khác
+    conn.execute("UPDATE APP.DST SET STATUS = 'CLOSED' WHERE ID = 1")
+    conn.execute("UPDATE APP.DST SET STATUS = 'OPEN' WHERE ID = 2")
+    src, dst = _range_hashes(conn, "APP.SRC", [3]), _range_hashes(conn, "APP.DST", [3])
+    assert src[0][0] == dst[0][0] == 2
+    assert src[0] != dst[0]
+    assert src[1] == dst[1]
+
+
+def test_row_hash_separates_null_from_empty_and_groups_wide_tables():
+    conn = _sqlite_oracle()
+    conn.execute("INSERT INTO APP.SRC VALUES (1, NULL, 'a')")
+    conn.execute("INSERT INTO APP.DST VALUES (1, 'a', NULL)")
+    assert _range_hashes(conn, "APP.SRC", []) != _range_hashes(conn, "APP.DST", [])
+
+    wide = [{"column_name": f"C{i}", "data_type": "CHAR"} for i in range(ce.ROW_HASH_GROUP + 1)]
+    expr = ce.row_hash_expr(wide)
+    assert expr.count("ORA_HASH(NVL(ORA_HASH(") == 2
+    assert ce.row_hash_expr([{"column_name": "L", "data_type": "LONG"}]) == "0"
+
+
+def test_checkpoint_round_trip_and_pending_ranges(tmp_path):
+    path = str(tmp_path / "clone.json")
+    task = ce.CloneTask("APP", "SRC", "APP", "DST")
+    checkpoint = ce.CloneCheckpoint.create(path, "u@SRC", "u@DST", [task], ce.CloneOptions())
+    checkpoint.set_ranges(task.source, [ce.CopyRange("ID", None, 100, 0, 2), ce.CopyRange("ID", 100, None, 1, 2)])
+    checkpoint.update_range(task.source, 0, 99, 100, done=True)
+    checkpoint.update_range(task.source, 1, 150, 50)
+
+    loaded = ce.CloneCheckpoint.load(path)
+    assert loaded.matches("u@SRC", "u@DST") and not loaded.matches("u@SRC", "v@DST")
+    assert [t.source for t in loaded.tasks()] == ["APP.SRC"]
+    pending = loaded.pending_ranges(task.source)
+    assert [(r.lower, r.upper, r.after, r.done_rows) for r in pending] == [(100, None, 150, 50)]
+    assert loaded.committed_rows(task.source) == 150
+    restart = loaded.pending_ranges(task.source, restart=True)
+    assert [(r.index, r.after, r.done_rows) for r in restart] == [(0, None, 0), (1, None, 0)]
+
+    loaded.finish_table(task.source, 200)
+    assert ce.CloneCheckpoint.load(path).progress() == (1, 1)
+
+
+def _resume(tmp_path, options, replace=False):
+    task = ce.CloneTask("APP", "SRC", "APP", "DST")
+    checkpoint = ce.CloneCheckpoint.create(str(tmp_path / "resume.json"), "s", "t", [task], options)
+    checkpoint.set_ranges(
+        task.source,
+        [ce.CopyRange("ID", None, 100, 0, 2, replace=replace), ce.CopyRange("ID", 100, None, 1, 2, replace=replace)],
+    )
+    checkpoint.update_range(task.source, 0, 99, 100, done=True)
+    checkpoint.update_range(task.source, 1, 150, 50)
+    done = []
+    env = {"user": "u", "password": "p", "host": "", "port": "", "alias": "DB", "use_host_port": False}
+    runner = ce.CloneRunner(env, env, [task], options, checkpoint=checkpoint, on_table_done=done.append)
+    runner._resume_table(None, task, checkpoint.table(task.source))
+    return runner, done
+
+
+def test_resume_after_truncate_replaces_rows_past_checkpoint(tmp_path):
+    runner, done = _resume(tmp_path, ce.CloneOptions(truncate=True))
+    assert done == []
+    [unit] = list(runner._units)
+    assert (unit.part.lower, unit.part.after, unit.part.replace) == (100, 150, True)
+    assert runner._runs["APP.SRC"].result.resumed_rows == 150
+
+
+def test_resume_without_truncate_refuses_table(tmp_path):
+    runner, done = _resume(tmp_path, ce.CloneOptions(truncate=False))
+    assert not runner._units
+    assert len(done) == 1 and "did not truncate" in done[0].error
+
+
+def test_resume_delta_ranges_without_truncate(tmp_path):
+    runner, done = _resume(tmp_path, ce.CloneOptions(truncate=False, delta=True), replace=True)
+    assert done == []
+    assert [u.part.replace for u in runner._units] == [True]
+
+
+def test_apply_fk_closure_follows_children_parents_and_self_references(monkeypatch):
+    keys = {
+        "APP.ORDERS": [db_utils.ForeignKey("FK_ORD_CUST", ["CUST_ID"], "APP", "CUSTOMERS", ["ID"])],
+        "APP.ITEMS": [db_utils.ForeignKey("FK_ITEM_ORD", ["ORDER_ID"], "APP", "ORDERS", ["ID"])],
+        "APP.CUSTOMERS": [db_utils.ForeignKey("FK_CUST_PARENT", ["PARENT_ID"], "APP", "CUSTOMERS", ["ID"])],
+    }
+    monkeypatch.setattr(db_utils, "fetch_foreign_keys", lambda conn, table, owner: keys.get(table, []))
+    orders = ce.CloneTask("APP", "ORDERS", "DST", "ORDERS", where="ORDER_DATE > SYSDATE - 7")
+    items = ce.CloneTask("APP", "ITEMS", "DST", "ITEMS")
+    tasks, notes = ce.apply_fk_closure(None, [orders, items], "DST")
+
+    by_source = {t.source: t for t in tasks}
+    assert set(by_source) == {"APP.ORDERS", "APP.ITEMS", "APP.CUSTOMERS"}
+    assert "(ORDER_ID) IN (SELECT ID FROM APP.ORDERS WHERE ORDER_DATE > SYSDATE - 7)" in by_source["APP.ITEMS"].where
+    customers = by_source["APP.CUSTOMERS"]
+    assert customers.target == "DST.CUSTOMERS"
+    # Khách hàng được đơn hàng tham chiếu, kèm các dòng tổ tiên theo FK tự tham chiếu
+    assert customers.where.startswith("ROWID IN (SELECT ROWID FROM APP.CUSTOMERS START WITH (")
+    assert "CONNECT BY NOCYCLE (ID = PRIOR PARENT_ID)" in customers.where
+    assert "(ID) IN (SELECT CUST_ID FROM APP.ORDERS WHERE CUST_ID IS NOT NULL" in customers.where
+    assert any("added as parent" in note for note in notes)
+
+    unfiltered = [ce.CloneTask("APP", "ORDERS", "DST", "ORDERS")]
+    assert ce.apply_fk_closure(None, unfiltered, "DST") == (unfiltered, [])
@@ -0,0 +1,43 @@
+"""
+Kiểm tra đọc CSV theo luồng (csv_stream): số dòng CSV thật, đọc một phần cho lưới, quét lỗi.
+"""
+from screen.DB import csv_stream, db_utils
+
+
+def _write(tmp_path, text):
+    path = tmp_path / "data.csv"
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_iter_records_keeps_csv_line_numbers_across_blank_and_multiline_rows(tmp_path):
+    path = _write(tmp_path, 'id,name\n1,a\n\n2,"multi\nline"\n3,c\n')
+    records = list(csv_stream.iter_records(path, ["NAME", "ID", "MISSING"]))
+    assert [(line, rec["ID"], rec["MISSING"]) for line, rec in records] == [(2, "1", ""), (5, "2", ""), (6, "3", "")]
+
+    lines = csv_stream.LineIndex()
+    for idx, (line, _) in enumerate(records):
+        lines.add(idx, line)
+    assert [lines.line(i) for i in range(3)] == [2, 5, 6]
+    # Chưa ghi nhận gì: dòng header + đánh số từ 1
+    assert csv_stream.LineIndex().line(0) == 2
+
+
+def test_read_grid_rows_counts_rows_it_does_not_keep(tmp_path):
+    path = _write(tmp_path, "﻿A,B\n1,2\n\n3,4\n5,6\n")
+    seen = []
+    load = csv_stream.read_grid_rows(path, 2, progress=seen.append)
+    assert load.headers == ["A", "B"]
+    assert load.rows == [["1", "2"], ["3", "4"]]
+    assert (load.total, load.dropped) == (3, 1)
+    assert seen[-1] == 3
+    assert csv_stream.read_grid_rows(path, None, has_header=False).total == 4
+
+
+def test_scan_csv_reports_width_and_type_issues(tmp_path):
+    path = _write(tmp_path, "ID,NAME\n1,a\nx,b\n3\n")
+    meta = {"ID": {"data_type": "NUMBER"}, "NAME": {"data_type": "VARCHAR2"}}
+    scan = csv_stream.scan_csv(path, ["ID", "NAME"], meta)
+    assert scan.row_count == 3
+    assert [line for line, _ in scan.issues] == [3, 4]
+    assert isinstance(db_utils.ColumnConverter(meta["ID"], "ID")("7"), int)
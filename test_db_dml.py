@@ -0,0 +1,150 @@
+"""
+Kiểm tra chuyển kiểu bind, MERGE, array DML và cache metadata của db_utils bằng kết nối giả,
+không cần Oracle driver.
+"""
+import datetime as dt
+import decimal
+
+import pytest
+
+from screen.DB import db_utils
+
+
+class BatchError:
+    def __init__(self, offset, message):
+        self.offset = offset
+        self.message = message
+
+
+class StubCursor:
+    """executemany: dòng có giá trị trong conn.bad -> batch error, dòng có trong conn.missing -> 0 dòng."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._errors = []
+        self._counts = []
+
+    def executemany(self, sql, rows, batcherrors=False, arraydmlrowcounts=False):
+        self.conn.calls += 1
+        if self.conn.fail_on_call == self.conn.calls:
+            raise RuntimeError("ORA-03113: end-of-file on communication channel")
+        self.conn.executed.append((sql, [list(r) for r in rows]))
+        self._errors = [BatchError(i, "ORA-00001: unique constraint") for i, r in enumerate(rows) if r[0] in self.conn.bad]
+        failed = {e.offset for e in self._errors}
+        self._counts = [0 if r[0] in self.conn.missing else 1 for i, r in enumerate(rows) if i not in failed]
+
+    def getbatcherrors(self):
+        return self._errors
+
+    def getarraydmlrowcounts(self):
+        return self._counts
+
+    def close(self):
+        pass
+
+
+class StubConnection:
+    def __init__(self, bad=(), missing=(), fail_on_call=None):
+        self.bad = set(bad)
+        self.missing = set(missing)
+        self.fail_on_call = fail_on_call
+        self.calls = 0
+        self.executed = []
+        self.log = []
+
+    def cursor(self):
+        return StubCursor(self)
+
+    def commit(self):
+        self.log.append("commit")
+
+    def rollback(self):
+        self.log.append("rollback")
+
+
+def test_column_converter_binds_native_types():
+    number = db_utils.ColumnConverter({"column_name": "AMOUNT", "data_type": "NUMBER"})
+    assert number(" 42 ") == 42
+    assert number("1.50") == decimal.Decimal("1.50")
+    assert number("") is None
+    # FLOAT của Oracle là NUMBER -> giữ chính xác bằng Decimal
+    assert db_utils.ColumnConverter({"column_name": "RATE", "data_type": "FLOAT"})("0.1") == decimal.Decimal("0.1")
+    assert db_utils.ColumnConverter({"column_name": "R", "data_type": "BINARY_DOUBLE"})("0.5") == 0.5
+    assert db_utils.ColumnConverter({"column_name": "NAME", "data_type": "VARCHAR2"})("") is None
+    date = db_utils.ColumnConverter({"column_name": "CREATED", "data_type": "DATE"})
+    assert date("2024-03-01") == dt.datetime(2024, 3, 1)
+    with pytest.raises(db_utils.BindConversionError) as info:
+        number("12a")
+    assert (info.value.column, info.value.value, info.value.expected) == ("AMOUNT", "12a", "number")
+
+
+def test_row_converter_reports_bad_rows_by_index():
+    meta = {"ID": {"data_type": "NUMBER"}, "NAME": {"data_type": "VARCHAR2"}}
+    converter = db_utils.compile_row_converter(["id", "name"], meta)
+    rows, errors = converter.convert([["1", "a"], ["x", "b"], ["3"]], offset=10)
+    assert rows == [[1, "a"], [3, None]]
+    assert len(errors) == 1 and errors[0][0] == 11 and "ID" in errors[0][1]
+
+
+def test_build_merge_sql_keys_on_pk_and_updates_other_columns():
+    sql = db_utils.build_merge_sql("APP", "T", ["id", "name", "qty"], ["ID"])
+    assert sql == (
+        "MERGE INTO APP.T t USING (SELECT :1 AS ID, :2 AS NAME, :3 AS QTY FROM dual) s ON (t.ID = s.ID) "
+        "WHEN MATCHED THEN UPDATE SET t.NAME = s.NAME, t.QTY = s.QTY "
+        "WHEN NOT MATCHED THEN INSERT (ID, NAME, QTY) VALUES (s.ID, s.NAME, s.QTY)"
+    )
+    assert "WHEN MATCHED" not in db_utils.build_merge_sql("APP", "T", ["ID"], ["ID"])
+    with pytest.raises(ValueError):
+        db_utils.build_merge_sql("APP", "T", ["NAME"], ["ID"])
+
+
+def test_delete_by_pk_reports_nothing_deleted_after_rollback():
+    conn = StubConnection(missing={2})
+    result = db_utils.delete_by_pk(conn, "APP.T", "APP", ["ID"], [(1,), (2,), (3,)], chunk_size=2)
+    assert result.committed and conn.log == ["commit"]
+    assert result.deleted == [(1,), (3,)] and result.missing == [(2,)]
+
+    conn = StubConnection(bad={3})
+    result = db_utils.delete_by_pk(conn, "APP.T", "APP", ["ID"], [(1,), (3,)])
+    assert conn.log == ["rollback"] and not result.committed
+    assert result.deleted == [] and result.affected == 0
+    assert result.failed_rows == [1]
+
+
+def test_insert_rows_skips_failing_rows_and_commits_by_interval():
+    conn = StubConnection(bad={"2"})
+    result = db_utils.insert_rows(
+        conn, "APP.T", "APP", ["ID"], [["1"], ["2"], ["3"], ["4"]], chunk_size=2, commit_interval=1
+    )
+    assert result.inserted == 3 and result.failed_rows == [1]
+    assert result.committed_rows == 3 and result.committed_upto == 4
+    assert conn.executed[0][0] == "INSERT INTO APP.T (ID) VALUES (:1)"
+
+
+def test_insert_rows_attaches_partial_result_to_errors():
+    conn = StubConnection(fail_on_call=2)
+    with pytest.raises(RuntimeError) as info:
+        db_utils.insert_rows(conn, "APP.T", "APP", ["ID"], [[i] for i in range(5)], chunk_size=2, commit_interval=2)
+    partial = info.value.result
+    assert partial.committed_rows == 2 and partial.committed_upto == 2
+    assert conn.log == ["commit"]
+
+
+def test_metadata_cache_ttl_and_owner_replacement():
+    cache = db_utils.MetadataCache(ttl=60)
+    cache.put(("DSN", "APP", "OLD"), "columns", [{"column_name": "A"}])
+    cache.put(("DSN", "APP", "KEEP"), "fk", ["FK1"])
+    cache.put(("DSN", "OTHER", "T"), "pk", ["ID"])
+    cached = cache.get(("DSN", "APP", "OLD"), "columns")
+    cached.append("mutated")
+    assert cache.get(("DSN", "APP", "OLD"), "columns") == [{"column_name": "A"}]
+
+    cache.replace_owner("DSN", "app", {"KEEP": {"columns": [], "pk": ["ID"]}, "NEW": {"pk": []}})
+    assert cache.get(("DSN", "APP", "OLD"), "columns") is None
+    assert cache.get(("DSN", "APP", "KEEP"), "fk") == ["FK1"]
+    assert cache.get(("DSN", "APP", "NEW"), "pk") == []
+    assert cache.get(("DSN", "OTHER", "T"), "pk") == ["ID"]
+
+    assert cache.is_fresh(db_utils.time.time() - 30)
+    assert not cache.is_fresh(db_utils.time.time() - 61)
+    assert cache.invalidate(dsn="DSN", owner="app") == 2
@@ -0,0 +1,117 @@
+"""
+Kiểm tra EXPLAIN PLAN (db_utils.explain_plan / check_statement_plans) bằng kết nối giả,
+không cần Oracle driver.
+"""
+from screen.DB import db_utils
+
+
+class StubCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self._rows = []
+
+    def execute(self, sql, params=None):
+        self.conn.executed.append(sql)
+        self._rows = list(self.conn.respond(sql, params))
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def close(self):
+        pass
+
+
+class StubConnection:
+    """PLAN_TABLE trả theo plans[câu lệnh]; ALL_TABLES trả 5 cột như fetch_table_stats đọc."""
+
+    def __init__(self, plans, stats):
+        self.plans = plans
+        self.stats = stats
+        self.executed = []
+        self._explained = {}
+
+    def cursor(self):
+        return StubCursor(self)
+
+    def respond(self, sql, params):
+        if sql.startswith("EXPLAIN PLAN"):
+            statement_id = sql.split("'")[1]
+            statement = sql.split(" FOR ", 1)[1]
+            if statement not in self.plans:
+                raise RuntimeError("ORA-00942: table or view does not exist")
+            self._explained[statement_id] = self.plans[statement]
+            return []
+        if "FROM plan_table" in sql and sql.startswith("SELECT"):
+            return self._explained.get(params[0], [])
+        if "FROM all_tables" in sql:
+            pairs = list(zip(params[0::2], params[1::2]))
+            return [(o, t, *self.stats[(o, t)]) for o, t in pairs if (o, t) in self.stats]
+        return []
+
+
+UPDATE_BIG = "UPDATE APP.ORDERS SET STATUS = :1 WHERE NOTE = :2"
+UPDATE_SMALL = "UPDATE APP.CODES SET NAME = :1 WHERE LABEL = :2"
+UPDATE_PK = "UPDATE APP.ORDERS SET STATUS = :1 WHERE ID = :2"
+
+PLANS = {
+    UPDATE_BIG: [
+        (0, "UPDATE STATEMENT", None, None, None, 10, 900),
+        (1, "UPDATE", None, "APP", "ORDERS", None, None),
+        (2, "TABLE ACCESS", "STORAGE FULL", "APP", "ORDERS", 10, 900),
+    ],
+    UPDATE_SMALL: [
+        (0, "UPDATE STATEMENT", None, None, None, 1, 3),
+        (1, "TABLE ACCESS", "FULL", "APP", "CODES", 1, 3),
+    ],
+    UPDATE_PK: [
+        (0, "UPDATE STATEMENT", None, None, None, 1, 2),
+        (1, "TABLE ACCESS", "BY INDEX ROWID", "APP", "ORDERS", 1, 2),
+        (2, "INDEX", "UNIQUE SCAN", "APP", "ORDERS_PK", 1, 1),
+    ],
+}
+STATS = {
+    ("APP", "ORDERS"): (2_000_000, 120, 40_000),
+    ("APP", "CODES"): (50, 30, 1),
+}
+
+
+def test_is_full_scan_matches_storage_and_inmemory_variants():
+    def step(options):
+        return db_utils.PlanStep(1, "TABLE ACCESS", options, "APP", "T", None, None)
+
+    assert step("FULL").is_full_scan
+    assert step("STORAGE FULL").is_full_scan
+    assert step("INMEMORY FULL").is_full_scan
+    assert not step("BY INDEX ROWID").is_full_scan
+    assert not db_utils.PlanStep(1, "INDEX", "FAST FULL SCAN", "APP", "I", None, None).is_full_scan
+
+
+def test_explain_plan_reads_steps_and_cleans_plan_table():
+    conn = StubConnection(PLANS, STATS)
+    steps = db_utils.explain_plan(conn, UPDATE_BIG)
+    assert [s.operation for s in steps] == ["UPDATE STATEMENT", "UPDATE", "TABLE ACCESS"]
+    assert steps[2].options == "STORAGE FULL" and steps[2].cardinality == 10
+    assert conn.executed[-1].startswith("DELETE FROM plan_table")
+
+
+def test_fetch_table_stats_reads_five_columns():
+    conn = StubConnection(PLANS, STATS)
+    stats = db_utils.fetch_table_stats(conn, [("app", "orders"), ("APP", "MISSING")])
+    assert stats[("APP", "ORDERS")].num_rows == 2_000_000
+    assert stats[("APP", "ORDERS")].est_bytes == 240_000_000
+    assert stats[("APP", "MISSING")].num_rows is None
+
+
+def test_check_statement_plans_reports_large_full_scans_once_per_shape():
+    conn = StubConnection(PLANS, STATS)
+    done = []
+    findings, errors, explained = db_utils.check_statement_plans(
+        conn,
+        [UPDATE_BIG, UPDATE_BIG + ";", UPDATE_SMALL, UPDATE_PK, "UPDATE APP.GONE SET A = 1", "BEGIN NULL; END;"],
+        progress=done.append,
+    )
+    assert explained == 4
+    assert done == [1, 2, 3, 4]
+    assert [(f.table, f.table_rows, f.executions) for f in findings] == [("ORDERS", 2_000_000, 2)]
+    assert len(errors) == 1 and "ORA-00942" in errors[0][1]